@@ -3,6 +3,7 @@
 import hmac
 import random
 import struct
+from dataclasses import dataclass
 
 import bson
 import d20
@@ -11,7 +12,7 @@
 import draconic
 
 from cogs5e.utils.gameutils import parse_coin_args
-from utils import config
+from utils import config, rollplan
 from utils.dice import RerollableStringifier
 from .context import AliasAuthor, AliasChannel, AliasGuild
 from ..errors import AliasException
@@ -82,34 +83,38 @@ def roll(dice):
     return _roll(str(dice))
 
 
-def _roll(dice, roller=None):
-    if roller is None:
-        roller = d20.Roller()
-
+def _roll(dice, context=None):
     try:
-        result = roller.roll(dice)
+        result = rollplan.roll(dice, context=context)
     except d20.RollError:
         return 0
     return result.total
 
 
-def _vroll(dice, multiply=1, add=0, roller=None):
-    if roller is None:
-        roller = d20.Roller()
-
-    dice_ast = roller.parse(dice)
+@dataclass(frozen=True)
+class _ScaleDice:
+    """A roll plan transform that multiplies the number of each set of dice by *multiply*, then adds *add*."""
 
-    if multiply != 1 or add != 0:
+    multiply: int
+    add: int
 
+    def __call__(self, dice_ast):
         def mapper(node):
             if isinstance(node, d20.ast.Dice):
-                node.num = (node.num * multiply) + add
+                node.num = (node.num * self.multiply) + self.add
             return node
 
-        dice_ast = d20.utils.tree_map(mapper, dice_ast)
+        return d20.utils.tree_map(mapper, dice_ast)
+
+
+def _vroll(dice, multiply=1, add=0, context=None):
+    transforms = []
+    if multiply != 1 or add != 0:
+        transforms.append(_ScaleDice(multiply, add))
+    plan = rollplan.get_plan(dice, transforms)
 
     try:
-        rolled = roller.roll(dice_ast)
+        rolled = plan.roll(context=context)
     except d20.RollError:
         return None
     return SimpleRollResult(rolled)
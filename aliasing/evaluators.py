@@ -1,8 +1,11 @@
+import ast
 import asyncio
 import functools
+import hashlib
 import json
 import re
 import textwrap
+import threading
 import time
 from collections import namedtuple
 from functools import cached_property
@@ -10,7 +13,7 @@
 from types import SimpleNamespace
 from typing import Optional, Union
 
-import d20
+import cachetools
 import draconic
 import json.scanner
 import yaml
@@ -83,6 +86,58 @@
 # an alias/snippet that can invoke draconic code
 _CodeInvokerT = Optional[Union[_CustomizationBase, WorkshopCollectableObject]]
 ScriptingWarning = namedtuple("ScriptingWarning", "msg node expr")
+# how many levels of using() imports to follow when prefetching gvars
+MAX_GVAR_PREFETCH_DEPTH = 5
+# builtins that touch uvars, or look up names (which include uvars) by a runtime string
+UVAR_BUILTINS = frozenset(
+    ("get_uvar", "get_uvars", "set_uvar", "set_uvar_nx", "delete_uvar", "uvar_exists", "exists", "get")
+)
+
+
+class ParseCache:
+    """
+    A process-wide LRU cache of parsed Draconic code, keyed by a hash of the source and shared across interpreters.
+    Parsing is pure, so the same alias body or gvar module only needs to be parsed once; the parsed AST is never
+    mutated during execution.
+    """
+
+    def __init__(self, max_source_size: int):
+        # sized by the length of the parsed source, as a proxy for the size of its AST
+        self._cache = cachetools.LRUCache(maxsize=max_source_size, getsizeof=lambda entry: entry[0])
+        # scripting runs in executor threads, and cachetools caches are not thread-safe
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, expr: str, parser):
+        """Returns the parsed form of *expr*, calling ``parser(expr)`` to parse it if it is not cached."""
+        key = hashlib.sha256(expr.encode()).digest()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        parsed = parser(expr)  # parse errors are not cached
+        with self._lock:
+            try:
+                self._cache[key] = (len(expr), parsed)
+            except ValueError:  # source too large to cache
+                pass
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+
+PARSE_CACHE = ParseCache(max_source_size=16_000_000)
 
 
 class MathEvaluator(draconic.SimpleInterpreter):
@@ -146,10 +201,12 @@ def __init__(self, ctx, *args, **kwargs):
         )
 
         # roll limiting
-        self._roller = d20.Roller(context=PersistentRollContext(max_rolls=1_000, max_total_rolls=10_000))
+        self._roll_context = PersistentRollContext(max_rolls=1_000, max_total_rolls=10_000)
         self.builtins.update(vroll=self._limited_vroll, roll=self._limited_roll)
 
-        self._cache = {"gvars": {}, "svars": {}, "uvars": {}, "imports": {}}
+        # uvars are only loaded once something might use them
+        self._cache = {"gvars": {}, "svars": {}, "uvars": None, "imports": {}}
+        self._uvar_names_bound = False
 
         self.ctx = ctx
         self.character_changed = False
@@ -168,9 +225,7 @@ def __init__(self, ctx, *args, **kwargs):
 
     @classmethod
     async def new(cls, ctx):
-        uvars = await helpers.get_uvars(ctx)
-        inst = cls(ctx, builtins=DEFAULT_BUILTINS, initial_names=uvars)
-        inst._cache["uvars"].update(uvars)
+        inst = cls(ctx, builtins=DEFAULT_BUILTINS)
         if ctx.guild:
             if hasattr(ctx, "get_server_settings"):
                 inst._cache["servsettings"] = await ctx.get_server_settings()
@@ -204,6 +259,28 @@ async def run_commits(self):
         if self.uvars_changed and "uvars" in self._cache and self._cache["uvars"] is not None:
             await helpers.update_uvars(self.ctx, self._cache["uvars"], self.uvars_changed)
 
+    # uvars
+    def _uvars(self):
+        """Returns the author's uvars, loading them if they were not prefetched."""
+        if self._cache["uvars"] is None:
+            owner = str(self.ctx.author.id)
+            uvars = helpers.get_cached_uvars(owner)
+            if uvars is None:
+                generation = helpers.uvar_cache_generation()
+                uvars = {uvar["name"]: uvar["value"] for uvar in self.ctx.bot.mdb.uvars.delegate.find({"owner": owner})}
+                helpers.cache_uvars(owner, uvars, generation)
+            self._cache["uvars"] = uvars
+        # uvars are names in the user's namespace, which is swapped out while a module is being imported
+        if not self._uvar_names_bound and not self._import_stack:
+            self._bind_uvar_names()
+        return self._cache["uvars"]
+
+    def _bind_uvar_names(self):
+        # uvars have the lowest priority of any name, as if they were set before anything else
+        for name, value in self._cache["uvars"].items():
+            self._names.setdefault(name, value)
+        self._uvar_names_bound = True
+
     # helpers
     def exists(self, name):
         """
@@ -212,6 +289,7 @@ def exists(self, name):
         :rtype: bool
         """
         name = str(name)
+        self._uvars()
         return name in self.names
 
     def combat(self):
@@ -243,7 +321,7 @@ def uvar_exists(self, name):
         :rtype: bool
         """
         name = str(name)
-        return name in self._cache["uvars"]
+        return name in self._uvars()
 
     def get_gvar(self, address):
         """
@@ -255,10 +333,15 @@ def get_gvar(self, address):
         """
         address = str(address)
         if address not in self._cache["gvars"]:
-            result = self.ctx.bot.mdb.gvars.delegate.find_one({"key": address})
-            if result is None:
-                return None
-            self._cache["gvars"][address] = result["value"]
+            value = helpers.get_cached_gvar(address)
+            if value is None:
+                generation = helpers.gvar_cache_generation()
+                result = self.ctx.bot.mdb.gvars.delegate.find_one({"key": address})
+                if result is None:
+                    return None
+                value = result["value"]
+                helpers.cache_gvar(address, value, generation)
+            self._cache["gvars"][address] = value
         return self._cache["gvars"][address]
 
     def get_svar(self, name, default=None):
@@ -297,7 +380,7 @@ def get_uvars(self):
         :return: A dict of all uvars.
         :rtype: dict
         """
-        return self._cache["uvars"]
+        return self._uvars()
 
     def get_uvar(self, name, default=None):
         """
@@ -309,9 +392,10 @@ def get_uvar(self, name, default=None):
         :rtype: str or None
         """
         name = str(name)
-        if name not in self._cache["uvars"]:
+        uvars = self._uvars()
+        if name not in uvars:
             return default
-        return self._cache["uvars"][name]
+        return uvars[name]
 
     def set_uvar(self, name: str, value: str):
         """
@@ -324,7 +408,7 @@ def set_uvar(self, name: str, value: str):
         value = str(value)
         if not name.isidentifier():
             raise InvalidArgument("Uvar contains invalid character.")
-        self._cache["uvars"][name] = value
+        self._uvars()[name] = value
         self._names[name] = value
         self.uvars_changed.add(name)
 
@@ -336,7 +420,7 @@ def set_uvar_nx(self, name, value: str):
         :param str value: The value to set it to.
         """
         name = str(name)
-        if not name in self._cache["uvars"]:
+        if not name in self._uvars():
             self.set_uvar(name, value)
 
     def delete_uvar(self, name):
@@ -346,8 +430,9 @@ def delete_uvar(self, name):
         :param str name: The name of the variable to delete.
         """
         name = str(name)
-        if name in self._cache["uvars"]:
-            del self._cache["uvars"][name]
+        uvars = self._uvars()
+        if name in uvars:
+            del uvars[name]
             self.uvars_changed.add(name)
 
     def get(self, name, default=None):
@@ -360,6 +445,7 @@ def get(self, name, default=None):
         :param default: What to return if the name is not set.
         """
         name = str(name)
+        self._uvars()
         if name in self.names:
             return self.names[name]
         return default
@@ -517,11 +603,11 @@ def dump_json(self, obj):
     # ==== roll limiters ====
     def _limited_vroll(self, dice, multiply=1, add=0):
         dice = str(dice)
-        return _vroll(dice, multiply, add, roller=self._roller)
+        return _vroll(dice, multiply, add, context=self._roll_context)
 
     def _limited_roll(self, dice):
         dice = str(dice)
-        return _roll(dice, roller=self._roller)
+        return _roll(dice, context=self._roll_context)
 
     # ==== audit functions ====
     def signature(self, data=0):
@@ -680,14 +766,129 @@ def _preflight(self):
         """We don't want limits to reset."""
         pass
 
+    def parse(self, expr: str):
+        """Parses Draconic code, reusing the parsed form of identical code from previous invocations."""
+        parsed = PARSE_CACHE.parse(expr, super().parse)
+        # hand out a copy of the statement list so the cached body can't be changed out from under other interpreters
+        return list(parsed) if isinstance(parsed, list) else parsed
+
     async def transformed_str_async(
         self, string, execution_scope: ExecutionScope = ExecutionScope.UNKNOWN, invoking_object: _CodeInvokerT = None
     ):
-        """Async convenience method around :meth:`ScriptingEvaluator.transformed_str`."""
+        """
+        Async convenience method around :meth:`ScriptingEvaluator.transformed_str`.
+        Gvars that the string statically references, and uvars if it might use them, are fetched before execution
+        starts.
+        """
+        await self.prefetch_gvars(string)
+        await self.prefetch_uvars(string)
         return await asyncio.get_event_loop().run_in_executor(
             None, self.transformed_str, string, execution_scope, invoking_object
         )
 
+    async def prefetch_gvars(self, string):
+        """
+        Fetches the gvars that the scripting in *string* references by a literal address (``get_gvar("...")`` or
+        ``using(name="...")``), and the gvars that imported modules reference in turn, so that executing the string
+        does not need to block on a database read for each of them.
+        """
+        loop = asyncio.get_event_loop()
+        seen = set(self._cache["gvars"])
+        code = list(_draconic_blocks(string))
+        for _ in range(MAX_GVAR_PREFETCH_DEPTH):
+            addresses, modules = await loop.run_in_executor(None, self._referenced_gvars, code)
+            addresses -= seen
+            if not addresses:
+                break
+            seen.update(addresses)
+            found = await helpers.fetch_gvars(self.ctx, addresses)
+            self._cache["gvars"].update(found)
+            # imported modules can import other modules
+            code = [found[address] for address in modules if address in found]
+
+    def _referenced_gvars(self, code: list[str]) -> tuple[set[str], set[str]]:
+        """
+        Returns the literal gvar addresses referenced by each piece of Draconic code, and the subset of those that are
+        imported as modules.
+        """
+        addresses = set()
+        modules = set()
+        for expr in code:
+            try:
+                parsed = self.parse(expr)
+            except Exception:  # errors will be raised when the code actually runs
+                continue
+            for root in parsed if isinstance(parsed, list) else (parsed,):
+                for node in ast.walk(root):
+                    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)):
+                        continue
+                    if node.func.id == "get_gvar" and node.args and _is_str_constant(node.args[0]):
+                        addresses.add(node.args[0].value)
+                    elif node.func.id == "using":
+                        imported = {kw.value.value for kw in node.keywords if _is_str_constant(kw.value)}
+                        addresses.update(imported)
+                        modules.update(imported)
+        return addresses, modules
+
+    async def prefetch_uvars(self, string):
+        """
+        Loads the author's uvars if the scripting in *string* might use them, so that executing the string does not
+        need to block on a database read for them.
+        """
+        if self._cache["uvars"] is not None:
+            return
+        if await asyncio.get_event_loop().run_in_executor(None, self._might_use_uvars, string):
+            self._cache["uvars"] = await helpers.get_uvars(self.ctx)
+            self._bind_uvar_names()
+
+    def _might_use_uvars(self, string) -> bool:
+        """
+        Returns whether the scripting in *string* might use uvars: if it substitutes names with <> or {}, if it or a
+        module it imports references a uvar builtin, or if it might read a name that is not bound on every path to the
+        read.
+        """
+        for match in SCRIPTING_RE.finditer(string):
+            if match.group("roll"):
+                return True
+            if match.group("lookup") and not re.match(r"<a?([@#]|:.+:)[&!]{0,2}\d+>", match.group(0)):
+                return True
+
+        defined = set(self.builtins).union(self._names)
+        seen_modules = set()
+        # blocks run in order, and imported modules run in their own namespace, so only their uvar builtin
+        # references matter
+        code = [(expr, False) for expr in reversed(list(_draconic_blocks(string)))]
+        while code:
+            expr, is_module = code.pop()
+            try:
+                parsed = self.parse(expr)
+            except Exception:  # errors will be raised when the code actually runs
+                continue
+            roots = parsed if isinstance(parsed, list) else [parsed]
+
+            for root in roots:
+                for node in ast.walk(root):
+                    if isinstance(node, ast.Name) and node.id in UVAR_BUILTINS:
+                        return True
+                    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "using":
+                        for kw in node.keywords:
+                            # a module imported from a runtime address could use anything
+                            if kw.arg is None or not _is_str_constant(kw.value):
+                                return True
+                            address = kw.value.value
+                            if address not in seen_modules and address in self._cache["gvars"]:
+                                seen_modules.add(address)
+                                code.append((self._cache["gvars"][address], True))
+
+            if is_module:
+                continue
+            # names bound at the top level of an earlier block are still bound when later blocks run
+            if _might_read_unbound([root for root in roots if isinstance(root, ast.stmt)], defined):
+                return True
+            if any(_unbound_loads(root, defined) for root in roots if not isinstance(root, ast.stmt)):
+                return True
+        return False
+
     def transformed_str(
         self, string, execution_scope: ExecutionScope = ExecutionScope.UNKNOWN, invoking_object: _CodeInvokerT = None
     ):
@@ -737,6 +938,127 @@ def evalrepl(match):
         return output
 
 
+def _draconic_blocks(string):
+    """Yields the Draconic code in each {{}} or <drac2></drac2> block of a scripting string, as it will be executed."""
+    for match in SCRIPTING_RE.finditer(string):
+        if match.group("drac1"):
+            yield match.group("drac1").strip()
+        elif match.group("drac2"):
+            yield textwrap.dedent(match.group("drac2")).strip()
+
+
+def _is_str_constant(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, str)
+
+
+# ---- uvar read analysis ----
+# uvars are read as bare names, so a script might use them if it reads a name that is not definitely bound at that
+# point. These only count a name as bound if it is bound on every path to the read: by a straight-line statement earlier
+# in the same block, or by the construct the read is in (a for loop's target, a function's arguments, ...). Anything
+# else - a name bound in only one branch of an if, in a loop body, or by a walrus - is assumed to maybe be a uvar.
+def _might_read_unbound(stmts, bound: set) -> bool:
+    """
+    Returns whether any of the statements, run in order, might read a name that is not bound. Adds the names that
+    the statements definitely bind to *bound*.
+    """
+    for stmt in stmts:
+        if isinstance(stmt, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = stmt.targets if isinstance(stmt, ast.Assign) else (stmt.target,)
+            # x += 1 reads x, and x[0] = 1 reads x, as a Load in the target
+            reads = [stmt.value] if stmt.value is not None else []
+            if isinstance(stmt, ast.AugAssign) and isinstance(stmt.target, ast.Name) and stmt.target.id not in bound:
+                return True
+            if any(_unbound_loads(node, bound) for node in reads + list(targets)):
+                return True
+            if stmt.value is not None:
+                bound.update(_stored_names(targets))
+        elif isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if any(_unbound_loads(node, bound) for node in stmt.decorator_list + _arg_defaults(stmt.args)):
+                return True
+            # the function might be called before names it reads are bound, but not before it exists
+            if _might_read_unbound(stmt.body, bound | _arg_names(stmt.args) | {stmt.name}):
+                return True
+            bound.add(stmt.name)
+        elif isinstance(stmt, (ast.If, ast.While)):
+            if _unbound_loads(stmt.test, bound):
+                return True
+            if _might_read_unbound(stmt.body, set(bound)) or _might_read_unbound(stmt.orelse, set(bound)):
+                return True
+        elif isinstance(stmt, (ast.For, ast.AsyncFor)):
+            if _unbound_loads(stmt.iter, bound) or _unbound_loads(stmt.target, bound):
+                return True
+            if _might_read_unbound(stmt.body, bound | _stored_names([stmt.target])):
+                return True
+            if _might_read_unbound(stmt.orelse, set(bound)):
+                return True
+        elif isinstance(stmt, ast.Try):
+            if _might_read_unbound(stmt.body, set(bound)):
+                return True
+            for handler in stmt.handlers:
+                if handler.type is not None and _unbound_loads(handler.type, bound):
+                    return True
+                if _might_read_unbound(handler.body, bound | ({handler.name} if handler.name else set())):
+                    return True
+            if _might_read_unbound(stmt.orelse, set(bound)) or _might_read_unbound(stmt.finalbody, set(bound)):
+                return True
+        elif isinstance(stmt, (ast.Expr, ast.Return, ast.Raise, ast.Assert, ast.Delete, ast.Pass, ast.Break)):
+            if _unbound_loads(stmt, bound):
+                return True
+            # using(name="...") binds each name
+            if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+                call = stmt.value
+                if isinstance(call.func, ast.Name) and call.func.id == "using":
+                    bound.update(kw.arg for kw in call.keywords if kw.arg is not None)
+        elif not isinstance(stmt, ast.Continue):
+            # anything else (with, match, global, ...) is not worth following
+            return True
+    return False
+
+
+def _unbound_loads(node, bound: set) -> bool:
+    """Returns whether the expression *node* might read a name that is not bound."""
+    if isinstance(node, ast.Name):
+        return isinstance(node.ctx, ast.Load) and node.id not in bound
+    elif isinstance(node, ast.Lambda):
+        if any(_unbound_loads(default, bound) for default in _arg_defaults(node.args)):
+            return True
+        return _unbound_loads(node.body, bound | _arg_names(node.args))
+    elif isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+        # each generator's iterable can read the targets of the ones before it, and the element can read all of them
+        inner = set(bound)
+        for generator in node.generators:
+            if _unbound_loads(generator.iter, inner):
+                return True
+            inner |= _stored_names([generator.target])
+            if any(_unbound_loads(cond, inner) for cond in generator.ifs):
+                return True
+        elts = (node.key, node.value) if isinstance(node, ast.DictComp) else (node.elt,)
+        return any(_unbound_loads(elt, inner) for elt in elts)
+    return any(_unbound_loads(child, bound) for child in ast.iter_child_nodes(node))
+
+
+def _stored_names(targets) -> set:
+    return {
+        node.id
+        for target in targets
+        for node in ast.walk(target)
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)
+    }
+
+
+def _arg_names(args: ast.arguments) -> set:
+    names = {arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs}
+    if args.vararg:
+        names.add(args.vararg.arg)
+    if args.kwarg:
+        names.add(args.kwarg.arg)
+    return names
+
+
+def _arg_defaults(args: ast.arguments) -> list:
+    return args.defaults + [default for default in args.kw_defaults if default is not None]
+
+
 class AutomationEvaluator(MathEvaluator):
     @classmethod
     def with_caster(cls, caster):
@@ -1,13 +1,17 @@
+import collections
 import copy
 import textwrap
+import threading
 import traceback
 import uuid
 from contextlib import suppress
 from typing import List, TYPE_CHECKING
 
+import cachetools
 import disnake
 import draconic
 from disnake.ext.commands import ArgumentParsingError
+from pymongo import DeleteOne, UpdateOne
 
 from aliasing import evaluators
 from aliasing.constants import CVAR_SIZE_LIMIT, GVAR_SIZE_LIMIT, SVAR_SIZE_LIMIT, UVAR_SIZE_LIMIT, VAR_NAME_LIMIT
@@ -18,6 +22,7 @@
     CollectableRequiresLicenses,
     EvaluationError,
 )
+from aliasing.namespace import NamespaceEntry, cache_namespace, get_cached_namespace, namespace_generation
 from aliasing.personal import Alias, Servalias, Servsnippet, Snippet
 from aliasing.utils import ExecutionScope
 from aliasing.workshop import WorkshopAlias, WorkshopCollection, WorkshopSnippet
@@ -31,6 +36,29 @@
 if TYPE_CHECKING:
     from utils.context import AvraeContext
 
+# gvars are read by scripts far more often than they are edited, so their values are cached in-process for a short
+# time, sized by the length of the values; they are invalidated over pubsub when edited through the bot, so the TTL
+# only bounds staleness for edits made elsewhere (e.g. the dashboard)
+GVAR_CACHE_TTL = 60
+GVAR_INVALIDATE_COMMAND = "invalidate_gvar"
+_gvar_cache = cachetools.TTLCache(maxsize=32_000_000, ttl=GVAR_CACHE_TTL, getsizeof=len)
+# gvars are read from scripting executor threads, and cachetools caches are not thread-safe
+_gvar_cache_lock = threading.Lock()
+# incremented on every change, so a load that raced with a change is not cached
+_gvar_generation = 0
+
+# almost every script run by a user reads their uvars, but few change them; they are invalidated over pubsub when
+# written, so the TTL only bounds staleness if an invalidation is missed
+UVAR_CACHE_TTL = 600
+UVAR_INVALIDATE_COMMAND = "invalidate_uvars"
+# owner id -> {name: value}, sized by the length of the names and values
+_uvar_cache = cachetools.TTLCache(
+    maxsize=64_000_000, ttl=UVAR_CACHE_TTL, getsizeof=lambda uvars: 64 + sum(len(k) + len(v) for k, v in uvars.items())
+)
+_uvar_cache_lock = threading.Lock()
+# incremented on every change, so a load that raced with a change is not cached
+_uvar_generation = 0
+
 
 async def handle_aliases(ctx: "AvraeContext"):
     # ctx.prefix: the invoking prefix
@@ -156,18 +184,43 @@ async def handle_alias_arguments(command, ctx):
 
 
 # getters
+async def get_collectable_namespace(ctx, personal_cls, workshop_sub_meth, is_alias):
+    """
+    Returns a dict mapping {name: NamespaceEntry} for every personal customization and workshop binding in scope,
+    cached per user/guild.
+    """
+    owner = personal_cls.ctx_owner(ctx)
+    namespace = get_cached_namespace(personal_cls, owner)
+    if namespace is not None:
+        return namespace
+
+    generation = namespace_generation()
+    binding_key = "alias_bindings" if is_alias else "snippet_bindings"
+    personal_names = await personal_cls.get_ctx_names(ctx)
+    workshop_ids = collections.defaultdict(list)
+    async for subscription_doc in workshop_sub_meth(ctx):
+        for binding in subscription_doc[binding_key]:
+            workshop_ids[binding["name"]].append(binding["id"])
+
+    namespace = {
+        name: NamespaceEntry(personal=name in personal_names, workshop_ids=workshop_ids.get(name, []))
+        for name in personal_names.union(workshop_ids)
+    }
+    cache_namespace(personal_cls, owner, namespace, generation)
+    return namespace
+
+
 async def get_collectable_named(
     ctx, name, personal_cls, workshop_cls, workshop_sub_meth, is_alias, obj_name, obj_name_pl, obj_command_name
 ):
-    binding_key = "alias_bindings" if is_alias else "snippet_bindings"
+    namespace = await get_collectable_namespace(ctx, personal_cls, workshop_sub_meth, is_alias)
+    entry = namespace.get(name)
+    # most words are not bound to anything
+    if entry is None:
+        return None
 
-    personal_obj = await personal_cls.get_named(name, ctx)
-    # get list of subscription object ids
-    subscribed_obj_ids = []
-    async for subscription_doc in workshop_sub_meth(ctx):
-        for binding in subscription_doc[binding_key]:
-            if binding["name"] == name:
-                subscribed_obj_ids.append(binding["id"])
+    personal_obj = await personal_cls.get_named(name, ctx) if entry.personal else None
+    subscribed_obj_ids = entry.workshop_ids
 
     # if only personal, return personal (or none)
     if not subscribed_obj_ids:
@@ -267,14 +320,18 @@ def set_cvar(character, name, value):
 
 # uvars
 async def get_uvars(ctx):
-    uvars = {}
-    async for uvar in ctx.bot.mdb.uvars.find({"owner": str(ctx.author.id)}):
-        uvars[uvar["name"]] = uvar["value"]
+    owner = str(ctx.author.id)
+    uvars = get_cached_uvars(owner)
+    if uvars is None:
+        generation = uvar_cache_generation()
+        uvars = {}
+        async for uvar in ctx.bot.mdb.uvars.find({"owner": owner}):
+            uvars[uvar["name"]] = uvar["value"]
+        cache_uvars(owner, uvars, generation)
     return uvars
 
 
-async def set_uvar(ctx, name, value):
-    value = str(value)
+def _check_uvar(name, value):
     if not name.isidentifier():
         raise InvalidArgument(
             "Uvar names must be valid identifiers (only contain a-z, A-Z, 0-9, _, and not start with a number)."
@@ -283,19 +340,66 @@ async def set_uvar(ctx, name, value):
         raise InvalidArgument(f"Uvar name must be shorter than {VAR_NAME_LIMIT} characters.")
     elif len(value) > UVAR_SIZE_LIMIT:
         raise InvalidArgument(f"Uvars must be shorter than {UVAR_SIZE_LIMIT} characters.")
+
+
+async def set_uvar(ctx, name, value):
+    value = str(value)
+    _check_uvar(name, value)
     await ctx.bot.mdb.uvars.update_one({"owner": str(ctx.author.id), "name": name}, {"$set": {"value": value}}, True)
+    await invalidate_uvars(ctx)
 
 
 async def update_uvars(ctx, uvar_dict, changed=None):
+    """Writes the uvars named in *changed* (or all of *uvar_dict*), deleting those not in *uvar_dict*, in one batch."""
+    owner = str(ctx.author.id)
     if changed is None:
-        for name, value in uvar_dict.items():
-            await set_uvar(ctx, name, value)
-    else:
-        for name in changed:
-            if name in uvar_dict:
-                await set_uvar(ctx, name, uvar_dict[name])
-            else:
-                await ctx.bot.mdb.uvars.delete_one({"owner": str(ctx.author.id), "name": name})
+        changed = uvar_dict.keys()
+    requests = []
+    for name in changed:
+        if name in uvar_dict:
+            value = str(uvar_dict[name])
+            _check_uvar(name, value)
+            requests.append(UpdateOne({"owner": owner, "name": name}, {"$set": {"value": value}}, upsert=True))
+        else:
+            requests.append(DeleteOne({"owner": owner, "name": name}))
+    if not requests:
+        return
+    await ctx.bot.mdb.uvars.bulk_write(requests, ordered=False)
+    await invalidate_uvars(ctx)
+
+
+async def invalidate_uvars(ctx):
+    """Drops the contextual author's cached uvars in every cluster. Call this after writing to their uvars."""
+    owner = str(ctx.author.id)
+    invalidate_cached_uvars(owner)
+    await ctx.bot.rdb.publish_command(UVAR_INVALIDATE_COMMAND, owner)
+
+
+def uvar_cache_generation() -> int:
+    """Returns a token to pass to :func:`cache_uvars` along with uvars loaded after calling this."""
+    return _uvar_generation
+
+
+def get_cached_uvars(owner: str):
+    """Returns a copy of the cached uvars of the user *owner*, or None if they are not cached."""
+    with _uvar_cache_lock:
+        uvars = _uvar_cache.get(owner)
+    return dict(uvars) if uvars is not None else None
+
+
+def cache_uvars(owner: str, uvars: dict, generation: int):
+    """Caches a copy of the uvars of the user *owner*, unless any uvars changed since *generation* was taken."""
+    with _uvar_cache_lock:
+        if generation == _uvar_generation:
+            _uvar_cache[owner] = dict(uvars)
+
+
+def invalidate_cached_uvars(owner: str):
+    """Drops the cached uvars of the user *owner* in this process."""
+    global _uvar_generation
+    with _uvar_cache_lock:
+        _uvar_generation += 1
+        _uvar_cache.pop(owner, None)
 
 
 # svars
@@ -353,6 +457,65 @@ async def update_gvar(ctx, gid, value):
     elif len(value) > GVAR_SIZE_LIMIT:
         raise InvalidArgument(f"Gvars must be shorter than {GVAR_SIZE_LIMIT} characters.")
     await ctx.bot.mdb.gvars.update_one({"key": gid}, {"$set": {"value": value}})
+    await invalidate_gvar(ctx, gid)
+
+
+async def invalidate_gvar(ctx, address: str):
+    """Drops the cached value of the gvar at *address* in every cluster. Call this after writing to the gvar."""
+    invalidate_cached_gvar(address)
+    await ctx.bot.rdb.publish_command(GVAR_INVALIDATE_COMMAND, address)
+
+
+def gvar_cache_generation() -> int:
+    """Returns a token to pass to :func:`cache_gvar` along with gvars loaded after calling this."""
+    return _gvar_generation
+
+
+def get_cached_gvar(address: str):
+    """Returns the cached value of the gvar at *address*, or None if it is not cached."""
+    with _gvar_cache_lock:
+        return _gvar_cache.get(address)
+
+
+def cache_gvar(address: str, value: str, generation: int):
+    """Caches the value of the gvar at *address*, unless any gvars changed since *generation* was taken."""
+    with _gvar_cache_lock:
+        if generation != _gvar_generation:
+            return
+        try:
+            _gvar_cache[address] = value
+        except ValueError:  # too large to cache
+            pass
+
+
+def invalidate_cached_gvar(address: str):
+    """Drops the cached value of the gvar at *address* in this process."""
+    global _gvar_generation
+    with _gvar_cache_lock:
+        _gvar_generation += 1
+        _gvar_cache.pop(address, None)
+
+
+async def fetch_gvars(ctx, addresses) -> dict[str, str]:
+    """
+    Returns a dict mapping gvar address to value for each of the given gvars that exist, reading from the gvar cache
+    and fetching the rest in a single query.
+    """
+    found = {}
+    missing = []
+    for address in set(addresses):
+        value = get_cached_gvar(address)
+        if value is None:
+            missing.append(address)
+        else:
+            found[address] = value
+
+    if missing:
+        generation = gvar_cache_generation()
+        async for gvar in ctx.bot.mdb.gvars.find({"key": {"$in": missing}}, projection={"key": True, "value": True}):
+            found[gvar["key"]] = gvar["value"]
+            cache_gvar(gvar["key"], gvar["value"], generation)
+    return found
 
 
 # snippets
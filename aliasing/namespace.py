@@ -0,0 +1,57 @@
+"""
+An in-process index of the alias and snippet names in scope for each user and guild.
+
+Every prefixed message that is not a builtin command is looked up as an alias, and almost all of those lookups miss.
+The index maps each name a user or guild has a personal customization or a workshop binding for, so names that are
+not bound resolve without touching the database.
+"""
+
+from typing import List, NamedTuple
+
+import cachetools
+
+# namespaces are invalidated in every cluster on write; the TTL bounds how long writes that don't publish an
+# invalidation (e.g. workshop changes made on the dashboard) can leave stale names
+NAMESPACE_TTL = 60
+NAMESPACE_INVALIDATE_COMMAND = "invalidate_alias_namespace"
+# {(personal_cls name, owner): {name: NamespaceEntry}}
+_namespace_cache = cachetools.TTLCache(maxsize=50_000, ttl=NAMESPACE_TTL)
+# incremented on every invalidation, so a namespace built while it was changing is not cached
+_namespace_generation = 0
+
+
+class NamespaceEntry(NamedTuple):
+    personal: bool
+    workshop_ids: List
+
+
+def namespace_generation() -> int:
+    return _namespace_generation
+
+
+def get_cached_namespace(personal_cls, owner):
+    """Returns the cached {name: NamespaceEntry} of the customizations of *personal_cls* owned by *owner*, or None."""
+    return _namespace_cache.get((personal_cls.__name__, str(owner)))
+
+
+def cache_namespace(personal_cls, owner, namespace: dict, generation: int):
+    """Caches a namespace, unless it was invalidated since *generation* (from :func:`namespace_generation`)."""
+    if generation == _namespace_generation:
+        _namespace_cache[(personal_cls.__name__, str(owner))] = namespace
+
+
+async def invalidate_namespace(personal_cls, owner, rdb=None):
+    """
+    Drops the cached namespace of the customizations of *personal_cls* owned by *owner* in this process, and in every
+    cluster if *rdb* is given.
+    """
+    invalidate_cached_namespace(personal_cls.__name__, owner)
+    if rdb is not None:
+        await rdb.publish_command(NAMESPACE_INVALIDATE_COMMAND, personal_cls.__name__, str(owner))
+
+
+def invalidate_cached_namespace(personal_cls_name: str, owner):
+    """Drops the cached namespace of the customizations of the class named *personal_cls_name* in this process."""
+    global _namespace_generation
+    _namespace_generation += 1
+    _namespace_cache.pop((personal_cls_name, str(owner)), None)
@@ -6,6 +6,7 @@
 import datetime
 
 from aliasing.constants import ALIAS_SIZE_LIMIT, SNIPPET_SIZE_LIMIT
+from aliasing.namespace import invalidate_namespace
 from cogs5e.models.errors import InvalidArgument
 
 
@@ -32,22 +33,24 @@ def new(cls, name, code, owner):
         cls.precreate_checks(name, code)
         return cls(None, name, code, str(owner))
 
-    async def commit(self, mdb):
+    async def commit(self, mdb, rdb=None):
         """
         Writes the customization to MongoDB, creating it if necessary.
 
         :param mdb: The database.
         :type mdb: motor.motor_asyncio.AsyncIOMotorDatabase
+        :param rdb: If given, the customization's name is invalidated in every cluster.
+        :type rdb: utils.redisIO.RedisIO
         """
         raise NotImplementedError
 
-    async def rename(self, mdb, new_name):
+    async def rename(self, mdb, new_name, rdb=None):
         """
         Renames this customization, deleting the old binding and creating the new binding (db-touching).
         """
         raise NotImplementedError
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
         """
         Deletes this customization from the database.
         """
@@ -66,6 +69,20 @@ async def get_ctx_map(ctx):
         """
         raise NotImplementedError
 
+    @staticmethod
+    async def get_ctx_names(ctx):
+        """
+        Returns a set of the names of all customizations in scope.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def ctx_owner(ctx):
+        """
+        Returns the owner (user/guild ID, as a str) of the customizations in scope.
+        """
+        raise NotImplementedError
+
     @classmethod
     async def get_named(cls, name, ctx):
         """
@@ -114,19 +131,22 @@ def precreate_checks(name, code):
 
 
 class Alias(_AliasBase):
-    async def commit(self, mdb):
+    async def commit(self, mdb, rdb=None):
         result = await mdb.aliases.update_one(
             {"owner": self.owner, "name": self.name}, {"$set": {"commands": self.code}}, upsert=True
         )
         if result.upserted_id:
             self.id = result.upserted_id
+            await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def rename(self, mdb, new_name):
+    async def rename(self, mdb, new_name, rdb=None):
         await mdb.aliases.update_one({"owner": self.owner, "name": self.name}, {"$set": {"name": new_name}})
         self.name = new_name
+        await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
         await mdb.aliases.delete_one({"owner": self.owner, "name": self.name})
+        await invalidate_namespace(type(self), self.owner, rdb)
 
     async def log_invocation(self, ctx, _):
         await ctx.bot.mdb.analytics_alias_events.insert_one(
@@ -140,6 +160,15 @@ async def get_ctx_map(ctx):
             aliases[alias["name"]] = alias["commands"]
         return aliases
 
+    @staticmethod
+    async def get_ctx_names(ctx):
+        cursor = ctx.bot.mdb.aliases.find({"owner": str(ctx.author.id)}, projection={"name": True, "_id": False})
+        return {doc["name"] async for doc in cursor}
+
+    @staticmethod
+    def ctx_owner(ctx):
+        return str(ctx.author.id)
+
     @classmethod
     async def get_named(cls, name, ctx):
         doc = await ctx.bot.mdb.aliases.find_one({"owner": str(ctx.author.id), "name": name})
@@ -149,19 +178,22 @@ async def get_named(cls, name, ctx):
 
 
 class Servalias(_AliasBase):
-    async def commit(self, mdb):
+    async def commit(self, mdb, rdb=None):
         result = await mdb.servaliases.update_one(
             {"server": self.owner, "name": self.name}, {"$set": {"commands": self.code}}, upsert=True
         )
         if result.upserted_id:
             self.id = result.upserted_id
+            await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def rename(self, mdb, new_name):
+    async def rename(self, mdb, new_name, rdb=None):
         await mdb.servaliases.update_one({"server": self.owner, "name": self.name}, {"$set": {"name": new_name}})
         self.name = new_name
+        await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
         await mdb.servaliases.delete_one({"server": self.owner, "name": self.name})
+        await invalidate_namespace(type(self), self.owner, rdb)
 
     async def log_invocation(self, ctx, _):
         await ctx.bot.mdb.analytics_alias_events.insert_one({
@@ -178,6 +210,17 @@ async def get_ctx_map(ctx):
             servaliases[servalias["name"]] = servalias["commands"]
         return servaliases
 
+    @staticmethod
+    async def get_ctx_names(ctx):
+        if not ctx.guild:
+            return set()
+        cursor = ctx.bot.mdb.servaliases.find({"server": str(ctx.guild.id)}, projection={"name": True, "_id": False})
+        return {doc["name"] async for doc in cursor}
+
+    @staticmethod
+    def ctx_owner(ctx):
+        return str(ctx.guild.id)
+
     @classmethod
     async def get_named(cls, name, ctx):
         doc = await ctx.bot.mdb.servaliases.find_one({"server": str(ctx.guild.id), "name": name})
@@ -187,19 +230,22 @@ async def get_named(cls, name, ctx):
 
 
 class Snippet(_SnippetBase):
-    async def commit(self, mdb):
+    async def commit(self, mdb, rdb=None):
         result = await mdb.snippets.update_one(
             {"owner": self.owner, "name": self.name}, {"$set": {"snippet": self.code}}, upsert=True
         )
         if result.upserted_id:
             self.id = result.upserted_id
+            await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def rename(self, mdb, new_name):
+    async def rename(self, mdb, new_name, rdb=None):
         await mdb.snippets.update_one({"owner": self.owner, "name": self.name}, {"$set": {"name": new_name}})
         self.name = new_name
+        await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
         await mdb.snippets.delete_one({"owner": self.owner, "name": self.name})
+        await invalidate_namespace(type(self), self.owner, rdb)
 
     async def log_invocation(self, ctx, _):
         await ctx.bot.mdb.analytics_alias_events.insert_one(
@@ -213,6 +259,15 @@ async def get_ctx_map(ctx):
             snippets[snippet["name"]] = snippet["snippet"]
         return snippets
 
+    @staticmethod
+    async def get_ctx_names(ctx):
+        cursor = ctx.bot.mdb.snippets.find({"owner": str(ctx.author.id)}, projection={"name": True, "_id": False})
+        return {doc["name"] async for doc in cursor}
+
+    @staticmethod
+    def ctx_owner(ctx):
+        return str(ctx.author.id)
+
     @classmethod
     async def get_named(cls, name, ctx):
         doc = await ctx.bot.mdb.snippets.find_one({"owner": str(ctx.author.id), "name": name})
@@ -222,19 +277,22 @@ async def get_named(cls, name, ctx):
 
 
 class Servsnippet(_SnippetBase):
-    async def commit(self, mdb):
+    async def commit(self, mdb, rdb=None):
         result = await mdb.servsnippets.update_one(
             {"server": self.owner, "name": self.name}, {"$set": {"snippet": self.code}}, upsert=True
         )
         if result.upserted_id:
             self.id = result.upserted_id
+            await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def rename(self, mdb, new_name):
+    async def rename(self, mdb, new_name, rdb=None):
         await mdb.servsnippets.update_one({"server": self.owner, "name": self.name}, {"$set": {"name": new_name}})
         self.name = new_name
+        await invalidate_namespace(type(self), self.owner, rdb)
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
         await mdb.servsnippets.delete_one({"server": self.owner, "name": self.name})
+        await invalidate_namespace(type(self), self.owner, rdb)
 
     async def log_invocation(self, ctx, _):
         await ctx.bot.mdb.analytics_alias_events.insert_one({
@@ -252,6 +310,17 @@ async def get_ctx_map(ctx):
                 servsnippets[servsnippet["name"]] = servsnippet["snippet"]
         return servsnippets
 
+    @staticmethod
+    async def get_ctx_names(ctx):
+        if not ctx.guild:
+            return set()
+        cursor = ctx.bot.mdb.servsnippets.find({"server": str(ctx.guild.id)}, projection={"name": True, "_id": False})
+        return {doc["name"] async for doc in cursor}
+
+    @staticmethod
+    def ctx_owner(ctx):
+        return str(ctx.guild.id)
+
     @classmethod
     async def get_named(cls, name, ctx):
         doc = await ctx.bot.mdb.servsnippets.find_one({"server": str(ctx.guild.id), "name": name})
@@ -7,6 +7,8 @@
 from bson import ObjectId
 
 from aliasing.errors import CollectableNotFound, CollectionNotFound
+from aliasing.namespace import invalidate_namespace
+from aliasing.personal import Alias, Servalias, Servsnippet, Snippet
 from cogs5e.models.errors import NotAllowed
 from utils.subscription_mixins import EditorMixin, GuildActiveMixin, SubscriberMixin
 
@@ -216,6 +218,7 @@ async def subscribe(self, ctx):
             "alias_bindings": alias_bindings,
             "snippet_bindings": snippet_bindings,
         })
+        await self._invalidate_namespaces(ctx, "subscribe", ctx.author.id)
         # increase subscription count
         await ctx.bot.mdb.workshop_collections.update_one({"_id": self.id}, {"$inc": {"num_subscribers": 1}})
         # log subscribe event
@@ -229,6 +232,7 @@ async def subscribe(self, ctx):
     async def unsubscribe(self, ctx):
         # remove sub doc
         await super().unsubscribe(ctx)
+        await self._invalidate_namespaces(ctx, "subscribe", ctx.author.id)
         # decr sub count
         await ctx.bot.mdb.workshop_collections.update_one({"_id": self.id}, {"$inc": {"num_subscribers": -1}})
         # log unsub event
@@ -258,6 +262,7 @@ async def set_server_active(self, ctx):
             "alias_bindings": alias_bindings,
             "snippet_bindings": snippet_bindings,
         })
+        await self._invalidate_namespaces(ctx, "server_active", ctx.guild.id)
         # incr sub count
         await ctx.bot.mdb.workshop_collections.update_one({"_id": self.id}, {"$inc": {"num_guild_subscribers": 1}})
         # log sub event
@@ -274,6 +279,7 @@ async def unset_server_active(self, ctx):
 
         # remove sub doc
         await super().unset_server_active(ctx)
+        await self._invalidate_namespaces(ctx, "server_active", ctx.guild.id)
         # decr sub count
         await ctx.bot.mdb.workshop_collections.update_one({"_id": self.id}, {"$inc": {"num_guild_subscribers": -1}})
         # log unsub event
@@ -304,6 +310,9 @@ async def update_alias_bindings(self, ctx, subscription_doc):
         await self.sub_coll(ctx).update_one(
             {"_id": subscription_doc["_id"]}, {"$set": {"alias_bindings": the_bindings}}
         )
+        await self._invalidate_namespaces(
+            ctx, subscription_doc["type"], subscription_doc["subscriber_id"], snippets=False
+        )
 
     async def update_snippet_bindings(self, ctx, subscription_doc):
         """Updates the snippet bindings for a given subscription (given the entire subscription document)."""
@@ -314,6 +323,24 @@ async def update_snippet_bindings(self, ctx, subscription_doc):
         await self.sub_coll(ctx).update_one(
             {"_id": subscription_doc["_id"]}, {"$set": {"snippet_bindings": the_bindings}}
         )
+        await self._invalidate_namespaces(
+            ctx, subscription_doc["type"], subscription_doc["subscriber_id"], aliases=False
+        )
+
+    @staticmethod
+    async def _invalidate_namespaces(ctx, subscription_type, subscriber_id, aliases=True, snippets=True):
+        """
+        Drops the cached alias/snippet names of a subscriber in every cluster after their subscription or bindings
+        change.
+        """
+        if subscription_type == "server_active":
+            alias_cls, snippet_cls = Servalias, Servsnippet
+        else:
+            alias_cls, snippet_cls = Alias, Snippet
+        if aliases:
+            await invalidate_namespace(alias_cls, subscriber_id, ctx.bot.rdb)
+        if snippets:
+            await invalidate_namespace(snippet_cls, subscriber_id, ctx.bot.rdb)
 
 
 class WorkshopCollectableObject(abc.ABC):
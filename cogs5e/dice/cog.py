@@ -11,6 +11,7 @@
 from cogsmisc.stats import Stats
 from gamedata import Monster
 from gamedata.lookuputils import handle_source_footer, select_monster_full, select_spell_full
+from utils import rollplan
 from utils.argparser import argparse
 from utils.constants import SKILL_NAMES
 from utils.dice import PersistentRollContext, VerboseMDStringifier
@@ -95,7 +96,7 @@ async def roll_cmd(self, ctx, *, dice: str = "1d20"):
 
         dice, adv = string_search_adv(dice)
 
-        res = d20.roll(dice, advantage=adv, allow_comments=True, stringifier=VerboseMDStringifier())
+        res = rollplan.roll(dice, advantage=adv, allow_comments=True, stringifier=VerboseMDStringifier())
         out = f"{ctx.author.mention}  :game_die:\n{str(res)}"
         if len(out) > 1999:
             out = f"{ctx.author.mention}  :game_die:\n{str(res)[:100]}...\n**Total**: {res.total}"
@@ -128,11 +129,11 @@ async def _roll_many(ctx, iterations, roll_str, dc=None, adv=None):
             adv = d20.AdvType.NONE
         results = []
         successes = 0
-        ast = d20.parse(roll_str, allow_comments=True)
-        roller = d20.Roller(context=PersistentRollContext())
+        plan = rollplan.get_plan(roll_str, allow_comments=True)
+        context = PersistentRollContext()
 
         for _ in range(iterations):
-            res = roller.roll(ast, advantage=adv)
+            res = plan.roll(advantage=adv, context=context)
             if dc is not None and res.total >= dc:
                 successes += 1
             results.append(res)
@@ -144,8 +145,8 @@ async def _roll_many(ctx, iterations, roll_str, dc=None, adv=None):
             header = f"Rolling {iterations} iterations, DC {dc}..."
             footer = f"{successes} successes, {sum(o.total for o in results)} total."
 
-        if ast.comment:
-            header = f"{ast.comment}: {header}"
+        if plan.ast.comment:
+            header = f"{plan.ast.comment}: {header}"
 
         result_strs = "\n".join(str(o) for o in results)
 
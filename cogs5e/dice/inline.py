@@ -7,7 +7,7 @@
 import utils.settings
 from cogs5e.models import embeds
 from cogs5e.models.errors import AvraeException, InvalidArgument, NoCharacter
-from utils import constants
+from utils import constants, rollplan
 from utils.dice import PersistentRollContext
 from utils.functions import camel_to_title, verbose_stat
 from .utils import string_search_adv
@@ -100,7 +100,7 @@ async def do_inline_rolls(self, message):
         roll_exprs = _find_inline_exprs(message.content)
 
         out = []
-        roller = d20.Roller(context=PersistentRollContext())
+        context = PersistentRollContext()
         char_replacer = CharacterReplacer(self.bot, message)
         for expr, context_before, context_after in roll_exprs:
             context_before = context_before.replace("\n", " ")
@@ -109,7 +109,7 @@ async def do_inline_rolls(self, message):
             try:
                 expr, char_comment = await char_replacer.replace(expr)
                 expr, adv = string_search_adv(expr)
-                result = roller.roll(expr, advantage=adv, allow_comments=True)
+                result = rollplan.roll(expr, allow_comments=True, advantage=adv, context=context)
                 if result.comment:
                     out.append(f"**{result.comment.strip()}**: {result.result}")
                 elif char_comment:
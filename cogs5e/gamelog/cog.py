@@ -163,7 +163,7 @@ async def campaign_remove(self, ctx, name):
             )
 
         # remove campaign link
-        await the_link.delete(ctx.bot.mdb)
+        await the_link.delete(ctx.bot.mdb, ctx.bot.rdb)
         await ctx.send(f"Okay, removed the link from {the_link.campaign_name}. Its rolls will no longer show up here.")
 
     # ==== game log send methods ====
@@ -21,7 +21,8 @@
 from cogs5e.utils import actionutils, checkutils, gameutils, targetutils
 from cogs5e.utils.gameutils import resolve_strict_coins
 from cogs5e.utils.help_constants import *
-from gamedata.lookuputils import filter_spells_by_version, get_spell_choices, select_spell_full
+from gamedata.compendium import compendium
+from gamedata.lookuputils import get_versioned_spell_choices, select_spell_full
 from utils.constants import COUNTER_BUBBLES
 from utils.argparser import argparse
 from utils.functions import confirm, maybe_mod, search, search_and_select, try_delete
@@ -411,8 +412,7 @@ async def spellbook(self, ctx, *args):
         flag_show_prepared_underline_help = False
 
         spells_known = collections.defaultdict(lambda: [])
-        choices = await get_spell_choices(ctx)
-        choices = await filter_spells_by_version(ctx, choices)
+        choices = compendium.search_index(await get_versioned_spell_choices(ctx))
 
         for sb_spell in character.spellbook.spells:
             if not (sb_spell.prepared or show_unprepared):
@@ -7,7 +7,9 @@
 from d20 import roll
 from pydantic import BaseModel
 
+import cogs5e.models.character
 from cogs5e.models.errors import NoCharacter
+from utils.dbdiff import copy_document, document_update
 from utils.functions import search_and_select
 from .combatant import Combatant, MonsterCombatant, PlayerCombatant
 from .errors import *
@@ -68,6 +70,8 @@ def __init__(
         self.ctx = ctx  # try to avoid using this whereever possible - this is *not* always the current ctx
         self.metadata = metadata
         self.nlp_record_session_id = nlp_record_session_id
+        # the contents of the database document as of the last load or commit, if any
+        self._committed = None
 
     @classmethod
     def new(
@@ -100,6 +104,7 @@ async def from_id(cls, channel_id: str, ctx):
 
     @classmethod
     async def from_dict(cls, raw, ctx):
+        snapshot = copy_document(raw)
         # noinspection DuplicatedCode
         inst = cls(
             channel_id=raw["channel"],
@@ -114,8 +119,13 @@ async def from_dict(cls, raw, ctx):
             metadata=raw.get("metadata"),
             nlp_record_session_id=raw.get("nlp_record_session_id"),
         )
+        # load every player character up front in one round-trip, rather than one per player combatant
+        characters = await cogs5e.models.character.Character.from_bot_and_ids_many(
+            ctx.bot, _character_ids(raw["combatants"])
+        )
         for c in raw["combatants"]:
-            inst._combatants.append(await deserialize_combatant(c, ctx, inst))
+            inst._combatants.append(await deserialize_combatant(c, ctx, inst, characters))
+        inst._committed = snapshot
         return inst
 
     # sync deser/ser
@@ -135,6 +145,7 @@ def from_ctx_sync(cls, ctx):  # cached
 
     @classmethod
     def from_dict_sync(cls, raw, ctx):
+        snapshot = copy_document(raw)
         # noinspection DuplicatedCode
         inst = cls(
             channel_id=raw["channel"],
@@ -149,8 +160,12 @@ def from_dict_sync(cls, raw, ctx):
             metadata=raw.get("metadata"),
             nlp_record_session_id=raw.get("nlp_record_session_id"),
         )
+        characters = cogs5e.models.character.Character.from_bot_and_ids_many_sync(
+            ctx.bot, _character_ids(raw["combatants"])
+        )
         for c in raw["combatants"]:
-            inst._combatants.append(deserialize_combatant_sync(c, ctx, inst))
+            inst._combatants.append(deserialize_combatant_sync(c, ctx, inst, characters))
+        inst._committed = snapshot
         return inst
 
     def to_dict(self):
@@ -583,15 +598,28 @@ def get_summary(self, private=False) -> str:
 
     # db
     async def commit(self, ctx):
-        """Commits the combat to db."""
+        """
+        Commits the combat to db.
+        Only the fields that changed since the combat was loaded or last committed are written, and nothing is written
+        if nothing changed.
+        """
         for pc in self.get_combatants():
             if isinstance(pc, PlayerCombatant):
                 await pc.character.commit(ctx)
-        await ctx.bot.mdb.combats.update_one(
-            {"channel": self._channel},
-            {"$set": self.to_dict(), "$currentDate": {"lastchanged": True}},
-            upsert=True,
-        )
+        data = self.to_dict()
+        if self._committed is not None:
+            # combats are only ever written by the bot, so combatants can be diffed in place
+            update = document_update(self._committed, data, recurse_lists=True)
+            if update:
+                update["$currentDate"] = {"lastchanged": True}
+                await ctx.bot.mdb.combats.update_one({"channel": self._channel}, update)
+        else:
+            await ctx.bot.mdb.combats.update_one(
+                {"channel": self._channel},
+                {"$set": data, "$currentDate": {"lastchanged": True}},
+                upsert=True,
+            )
+        self._committed = copy_document(data)
 
     async def final(self, ctx):
         """Commit, update the summary message, and fire any recorder events in parallel."""
@@ -635,7 +663,17 @@ def __str__(self):
         return f"Initiative in <#{self.channel_id}>"
 
 
-async def deserialize_combatant(raw_combatant, ctx, combat):
+def _character_ids(raw_combatants):
+    """Returns the (owner id, character id) of each player combatant in a list of serialized combatants."""
+    for raw_combatant in raw_combatants:
+        ctype = CombatantType(raw_combatant["type"])
+        if ctype == CombatantType.PLAYER:
+            yield raw_combatant["character_owner"], raw_combatant["character_id"]
+        elif ctype == CombatantType.GROUP:
+            yield from _character_ids(raw_combatant["combatants"])
+
+
+async def deserialize_combatant(raw_combatant, ctx, combat, characters=None):
     ctype = CombatantType(raw_combatant["type"])
     if ctype == CombatantType.GENERIC:
         return Combatant.from_dict(raw_combatant, ctx, combat)
@@ -643,19 +681,19 @@ async def deserialize_combatant(raw_combatant, ctx, combat):
         return MonsterCombatant.from_dict(raw_combatant, ctx, combat)
     elif ctype == CombatantType.PLAYER:
         try:
-            return await PlayerCombatant.from_dict(raw_combatant, ctx, combat)
+            return await PlayerCombatant.from_dict(raw_combatant, ctx, combat, characters)
         except NoCharacter:
             # if the character was deleted, make a best effort to restore what we know
             # note: PlayerCombatant.from_dict mutates raw_combatant so we don't have to call the normal from_dict
             # operations here (this is hacky)
             return Combatant(ctx, combat, **raw_combatant)
     elif ctype == CombatantType.GROUP:
-        return await CombatantGroup.from_dict(raw_combatant, ctx, combat)
+        return await CombatantGroup.from_dict(raw_combatant, ctx, combat, characters)
     else:
         raise CombatException(f"Unknown combatant type: {raw_combatant['type']}")
 
 
-def deserialize_combatant_sync(raw_combatant, ctx, combat):
+def deserialize_combatant_sync(raw_combatant, ctx, combat, characters=None):
     ctype = CombatantType(raw_combatant["type"])
     if ctype == CombatantType.GENERIC:
         return Combatant.from_dict(raw_combatant, ctx, combat)
@@ -663,13 +701,13 @@ def deserialize_combatant_sync(raw_combatant, ctx, combat):
         return MonsterCombatant.from_dict(raw_combatant, ctx, combat)
     elif ctype == CombatantType.PLAYER:
         try:
-            return PlayerCombatant.from_dict_sync(raw_combatant, ctx, combat)
+            return PlayerCombatant.from_dict_sync(raw_combatant, ctx, combat, characters)
         except NoCharacter:
             # if the character was deleted, make a best effort to restore what we know
             # note: PlayerCombatant.from_dict mutates raw_combatant so we don't have to call the normal from_dict
             # operations here (this is hacky)
             return Combatant(ctx, combat, **raw_combatant)
     elif ctype == CombatantType.GROUP:
-        return CombatantGroup.from_dict_sync(raw_combatant, ctx, combat)
+        return CombatantGroup.from_dict_sync(raw_combatant, ctx, combat, characters)
     else:
         raise CombatException(f"Unknown combatant type: {raw_combatant['type']}")
@@ -18,7 +18,7 @@
 from .errors import RequiresContext
 from .types import BaseCombatant, CombatantType
 from .utils import create_combatant_id
-from ..models.errors import InvalidArgument
+from ..models.errors import InvalidArgument, NoCharacter
 
 if TYPE_CHECKING:
     from .group import CombatantGroup
@@ -719,25 +719,41 @@ def from_character(cls, character, ctx, combat, controller_id, init, private):
 
     # ==== serialization ====
     @classmethod
-    async def from_dict(cls, raw, ctx, combat):
+    async def from_dict(cls, raw, ctx, combat, characters=None):
+        """
+        :param characters: If passed, a dict of prefetched characters keyed by (owner id, character id) (see
+                           :meth:`Character.from_bot_and_ids_many`) to use instead of retrieving the character.
+        """
         inst = super().from_dict(raw, ctx, combat)
         inst.character_id = raw["character_id"]
         inst.character_owner = raw["character_owner"]
-        inst._character = await cogs5e.models.character.Character.from_bot_and_ids(
-            ctx.bot, inst.character_owner, inst.character_id
-        )
+        if characters is not None:
+            inst._character = inst._prefetched_character(characters)
+        else:
+            inst._character = await cogs5e.models.character.Character.from_bot_and_ids(
+                ctx.bot, inst.character_owner, inst.character_id
+            )
         return inst
 
     @classmethod
-    def from_dict_sync(cls, raw, ctx, combat):
+    def from_dict_sync(cls, raw, ctx, combat, characters=None):
         inst = super().from_dict(raw, ctx, combat)
         inst.character_id = raw["character_id"]
         inst.character_owner = raw["character_owner"]
-        inst._character = cogs5e.models.character.Character.from_bot_and_ids_sync(
-            ctx.bot, inst.character_owner, inst.character_id
-        )
+        if characters is not None:
+            inst._character = inst._prefetched_character(characters)
+        else:
+            inst._character = cogs5e.models.character.Character.from_bot_and_ids_sync(
+                ctx.bot, inst.character_owner, inst.character_id
+            )
         return inst
 
+    def _prefetched_character(self, characters):
+        try:
+            return characters[str(self.character_owner), self.character_id]
+        except KeyError:
+            raise NoCharacter()
+
     def to_dict(self):
         ignored_attributes = ("stats", "levels", "skills", "saves", "spellbook", "hp", "temp_hp")
         raw = super().to_dict()
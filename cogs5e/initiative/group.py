@@ -19,25 +19,25 @@ def new(cls, combat, name, init, ctx=None):
         return cls(ctx, combat, id, [], name, init)
 
     @classmethod
-    async def from_dict(cls, raw, ctx, combat):
+    async def from_dict(cls, raw, ctx, combat, characters=None):
         # this import is here because Combat imports CombatantGroup - it's a 1-time cost on first call but
         # practically free afterwards (<1us)
         from .combat import deserialize_combatant
 
         combatants = []
         for c in raw.pop("combatants"):
-            combatant = await deserialize_combatant(c, ctx, combat)
+            combatant = await deserialize_combatant(c, ctx, combat, characters)
             combatants.append(combatant)
 
         return cls(ctx, combat, combatants=combatants, **raw)
 
     @classmethod
-    def from_dict_sync(cls, raw, ctx, combat):
+    def from_dict_sync(cls, raw, ctx, combat, characters=None):
         from .combat import deserialize_combatant_sync
 
         combatants = []
         for c in raw.pop("combatants"):
-            combatant = deserialize_combatant_sync(c, ctx, combat)
+            combatant = deserialize_combatant_sync(c, ctx, combat, characters)
             combatants.append(combatant)
 
         return cls(ctx, combat, combatants=combatants, **raw)
@@ -8,11 +8,13 @@
 recording.
 """
 
+import asyncio
+import copy
 import datetime
 import logging
 import re
 import time
-from typing import Any, List, MutableMapping, Optional, Sequence, TYPE_CHECKING, Tuple, Union
+from typing import Any, Awaitable, Callable, List, MutableMapping, Optional, Sequence, TYPE_CHECKING, Tuple, Union
 
 import botocore.exceptions
 import cachetools
@@ -30,6 +32,17 @@
     from .combat import Combat
 
 ONE_MONTH_SECS = 2592000
+# events are written to firehose in the background, in batches of at most FIREHOSE_MAX_BATCH_RECORDS records and
+# FIREHOSE_MAX_BATCH_BYTES bytes (the PutRecordBatch limits), at least every FIREHOSE_FLUSH_INTERVAL seconds
+FIREHOSE_MAX_BATCH_RECORDS = 500
+FIREHOSE_MAX_BATCH_BYTES = 4 * 1024 * 1024
+FIREHOSE_MAX_RECORD_BYTES = 1000 * 1024
+FIREHOSE_FLUSH_INTERVAL = 5
+# records that firehose fails to put are retried with exponential backoff, up to FIREHOSE_MAX_ATTEMPTS times in all
+FIREHOSE_MAX_ATTEMPTS = 4
+FIREHOSE_RETRY_BASE_DELAY = 0.5
+# the most events to hold until they are written; further events are dropped
+MAX_PENDING_NLP_EVENTS = 10_000
 
 log = logging.getLogger(__name__)
 
@@ -252,11 +265,138 @@ def from_combat(cls, combat: "Combat", ctx: Union["AvraeContext", disnake.Intera
         return cls(
             combat_id=combat.nlp_record_session_id,
             probable_interaction_id=interaction_id(ctx),
-            data=combat.to_dict(),
+            # the writer serializes events later, so take a snapshot that later commands can't change
+            data=copy.deepcopy(combat.to_dict()),
             human_readable=combat.get_summary(private=True),
         )
 
 
+# ==== writer ====
+class FirehoseEventWriter:
+    """
+    Queues recorded events and writes them to a Kinesis Firehose delivery stream in batches, in the background.
+
+    Events are serialized by the writer, so recording an event on the command path only costs building it.
+    """
+
+    def __init__(self, firehose, delivery_stream: str, is_enabled: Callable[[], Awaitable[bool]]):
+        """
+        :param firehose: The aiobotocore Firehose client.
+        :param delivery_stream: The name of the delivery stream to write to.
+        :param is_enabled: Returns whether events should be written; checked once per batch.
+        """
+        self.firehose = firehose
+        self.delivery_stream = delivery_stream
+        self.is_enabled = is_enabled
+        self._queue: asyncio.Queue[RecordedEvent] = asyncio.Queue(maxsize=MAX_PENDING_NLP_EVENTS)
+        self._closing = False
+        # metrics (cumulative)
+        self.dropped_events = 0
+        self.failed_records = 0
+        self.written_records = 0
+        self._last_logged_dropped_events = 0
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of events waiting to be written."""
+        return self._queue.qsize()
+
+    def put(self, event: RecordedEvent):
+        """Queues an event to be written. If the queue is full or the writer is closed, the event is dropped."""
+        if self._closing:
+            self.dropped_events += 1
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+
+    async def close(self):
+        """Writes all queued events, then stops the writer."""
+        self._closing = True
+        await self._task
+
+    # ==== internals ====
+    async def _run(self):
+        while not (self._closing and self._queue.empty()):
+            batch = await self._next_batch()
+            if self.dropped_events > self._last_logged_dropped_events:
+                dropped = self.dropped_events - self._last_logged_dropped_events
+                log.warning(f"Dropped {dropped} NLP events (queue depth: {self.queue_depth})")
+                self._last_logged_dropped_events = self.dropped_events
+            if not batch:
+                continue
+            try:
+                await self._write(batch)
+            except Exception as e:
+                log.exception(f"Error writing {len(batch)} NLP events: {e!r}")
+
+    async def _next_batch(self) -> List[RecordedEvent]:
+        """Returns the events queued in the next FIREHOSE_FLUSH_INTERVAL seconds, up to FIREHOSE_MAX_BATCH_RECORDS."""
+        batch = []
+        deadline = time.monotonic() + FIREHOSE_FLUSH_INTERVAL
+        while len(batch) < FIREHOSE_MAX_BATCH_RECORDS:
+            try:
+                if self._closing:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    timeout = max(deadline - time.monotonic(), 0)
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _write(self, events: List[RecordedEvent]):
+        if not await self.is_enabled():
+            log.debug(f"NLP feature flag is disabled, dropping {len(events)} events")
+            return
+        # a combat state can be large, so serialize the batch in a thread
+        records = await asyncio.get_event_loop().run_in_executor(None, self._serialize, events)
+
+        chunk, chunk_bytes = [], 0
+        for record in records:
+            if len(record) > FIREHOSE_MAX_RECORD_BYTES:
+                log.warning(f"Dropping NLP event of {len(record)} bytes, larger than the firehose record limit")
+                self.failed_records += 1
+                continue
+            if chunk_bytes + len(record) > FIREHOSE_MAX_BATCH_BYTES:
+                await self._put_batch(chunk)
+                chunk, chunk_bytes = [], 0
+            chunk.append(record)
+            chunk_bytes += len(record)
+        if chunk:
+            await self._put_batch(chunk)
+
+    @staticmethod
+    def _serialize(events: List[RecordedEvent]) -> List[bytes]:
+        return [event.json().encode() for event in events]
+
+    async def _put_batch(self, records: List[bytes]):
+        """Puts the records, retrying any that fail with exponential backoff."""
+        for attempt in range(FIREHOSE_MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(FIREHOSE_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            try:
+                response = await self.firehose.put_record_batch(
+                    DeliveryStreamName=self.delivery_stream, Records=[{"Data": record} for record in records]
+                )
+            except botocore.exceptions.ClientError:
+                log.warning(f"Failed to put {len(records)} NLP events (attempt {attempt + 1})", exc_info=True)
+                continue
+            if not response.get("FailedPutCount"):
+                self.written_records += len(records)
+                return
+            # the responses are in the same order as the records, and failed records have an error code
+            failed = [
+                record for record, result in zip(records, response["RequestResponses"]) if result.get("ErrorCode")
+            ]
+            self.written_records += len(records) - len(failed)
+            records = failed
+        self.failed_records += len(records)
+        log.error(f"Failed to record {len(records)} NLP events after {FIREHOSE_MAX_ATTEMPTS} attempts")
+
+
 # ==== recorder ====
 class NLPRecorder:
     # cache: channel id -> (when channels are recorded until, combat id); (0, None) if not recorded
@@ -267,6 +407,7 @@ class NLPRecorder:
     def __init__(self, bot):
         self.bot = bot
         self._kinesis_firehose = None
+        self._writer: Optional[FirehoseEventWriter] = None
 
     async def initialize(self):
         if config.NLP_KINESIS_DELIVERY_STREAM is None:
@@ -276,10 +417,18 @@ async def initialize(self):
         self._kinesis_firehose = await boto_session.create_client(
             "firehose", region_name=config.DYNAMO_REGION
         ).__aenter__()
+        self._writer = FirehoseEventWriter(
+            self._kinesis_firehose, config.NLP_KINESIS_DELIVERY_STREAM, lambda: nlp_feature_flag_enabled(self.bot)
+        )
 
     def close(self):
         if self._kinesis_firehose is not None:
-            self.bot.loop.create_task(self._kinesis_firehose.__aexit__(None, None, None))
+            self.bot.loop.create_task(self._close())
+
+    async def _close(self):
+        # write any queued events before closing the client
+        await self._writer.close()
+        await self._kinesis_firehose.__aexit__(None, None, None)
 
     def register_listeners(self):
         self.bot.add_listener(self.on_message)
@@ -541,52 +690,29 @@ async def _update_channel_recording_until(
         return recording_until
 
     async def _record_event(self, event: RecordedEvent):
-        """Saves an event to the recording for the given combat ID."""
-        if self._kinesis_firehose is None:
+        """Queues an event to be saved to the recording for the given combat ID."""
+        if self._writer is None:
             log.warning("skipping event because kinesis firehose is not initialized")
             return
-        if not await nlp_feature_flag_enabled(self.bot):
-            log.debug("NLP feature flag is disabled, dropping event")
-            return
 
         log.debug(f"saving 1 event to {event.combat_id=} of type {event.event_type!r}")
         if config.TESTING:
             # this is behind this if because .json() is (relatively) slow, even if the output is discarded
             # so only call it on local dev
             log.debug(event.json(indent=2))
-
-        try:
-            response = await self._kinesis_firehose.put_record(
-                DeliveryStreamName=config.NLP_KINESIS_DELIVERY_STREAM, Record={"Data": event.json().encode()}
-            )
-        except botocore.exceptions.ClientError:
-            log.exception(f"Failed to record NLP event to {event.combat_id=} of type {event.event_type!r}")
-        else:
-            log.debug(str(response))
+        self._writer.put(event)
 
     async def _record_events(self, events: Sequence[RecordedEvent]):
-        """Saves many events to the recording for the given combat ID."""
+        """Queues many events to be saved to the recording for the given combat ID."""
         if not events:
             return
-        if self._kinesis_firehose is None:
+        if self._writer is None:
             log.warning(f"skipping {len(events)} events because kinesis firehose is not initialized")
             return
-        if not await nlp_feature_flag_enabled(self.bot):
-            log.debug("NLP feature flag is disabled, dropping event")
-            return
 
         log.debug(f"saving {len(events)} events to kinesis")
-        try:
-            response = await self._kinesis_firehose.put_record_batch(
-                DeliveryStreamName=config.NLP_KINESIS_DELIVERY_STREAM,
-                Records=[{"Data": event.json().encode()} for event in events],
-            )
-        except botocore.exceptions.ClientError:
-            log.exception(f"Failed to record {len(events)} NLP events")
-        else:
-            log.debug(str(response))
-            if failed_count := response.get("FailedPutCount"):
-                log.error(f"Failed to record {failed_count} NLP events; response={response!r}")
+        for event in events:
+            self._writer.put(event)
 
 
 # ==== helpers ====
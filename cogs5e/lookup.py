@@ -12,13 +12,14 @@
 from disnake.ext import commands
 
 import gamedata
-from gamedata.lookuputils import VALID_VERSIONS, extract_and_set_version, filter_spells_by_version
+from gamedata.lookuputils import VALID_VERSIONS, extract_and_set_version
 import ui
 import utils.settings
 from cogs5e.models.embeds import EmbedWithAuthor, add_fields_from_long_text, set_maybe_long_desc
 from cogs5e.models.errors import RequiresLicense
 from cogsmisc.stats import Stats
 from gamedata import lookuputils
+from gamedata.autocomplete import AutocompleteSession, autocomplete, clear_sessions
 from gamedata.compendium import compendium
 from gamedata.klass import ClassFeature
 from gamedata.lookuputils import create_selectkey, get_lookup_version, lookup_converter, can_access, slash_match_key
@@ -26,7 +27,7 @@
 from gamedata.shared import CachedSourced, Sourced
 from utils import checks, img
 from utils.argparser import argparse
-from utils.functions import chunk_text, get_positivity, search_and_select, smart_trim, trim_str, try_delete, search
+from utils.functions import chunk_text, get_positivity, search_and_select, smart_trim, trim_str, try_delete, SearchIndex
 from utils.settings import ServerSettings
 
 LARGE_THRESHOLD = 200
@@ -35,6 +36,10 @@
 log = logging.getLogger(__name__)
 
 
+def _rule_name(rule):
+    return rule["fullName"]
+
+
 class Lookup(commands.Cog):
     """Commands to help look up items, status effects, rules, etc."""
 
@@ -129,19 +134,20 @@ async def slash_rule(
 
     @slash_rule.autocomplete("name")
     async def slash_rule_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        choices = []
         if "version" not in inter.filled_options:
             version = await get_lookup_version(inter)
         else:
             version = inter.filled_options["version"]
 
-        for actiontype in (a for a in compendium.rule_references if a.get("version") == version or "version" not in a):
-            choices.extend(actiontype["items"])
+        async def new_session():
+            choices = []
+            for actiontype in (
+                a for a in compendium.rule_references if a.get("version") == version or "version" not in a
+            ):
+                choices.extend(actiontype["items"])
+            return AutocompleteSession(SearchIndex(choices, _rule_name), _rule_name, cutoff=25)
 
-        result, strict = search(choices, user_input, lambda e: e["fullName"], 25)
-        if strict:
-            return [result["fullName"]]
-        return [r["fullName"] for r in result][:25]
+        return await autocomplete(inter, ("rule", version), user_input, new_session)
 
     async def _rule(self, ctx, rule, version=None):
         if version is None:
@@ -180,13 +186,10 @@ async def slash_feat(
 
     @slash_feat.autocomplete("name")
     async def slash_feat_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {"feat": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "feat")}
-        select_key = create_selectkey(available_ids)
+        async def choices():
+            return compendium.search_index(compendium.feats, slash_match_key)
 
-        result, strict = search(compendium.feats, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "feat", choices, ["feat"], cutoff=25)
 
     async def _feat(self, ctx, result: gamedata.feat):
         destination = await self._get_destination(ctx)
@@ -226,15 +229,13 @@ async def slash_racefeat(
 
     @slash_racefeat.autocomplete("name")
     async def slash_racefeat_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {
-            k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in ("race", "subrace")
-        }
-        select_key = create_selectkey(available_ids)
+        async def choices():
+            return SearchIndex.chain(
+                compendium.search_index(compendium.rfeats, slash_match_key),
+                compendium.search_index(compendium.subrfeats, slash_match_key),
+            )
 
-        result, strict = search(compendium.rfeats + compendium.subrfeats, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "racefeat", choices, ["race", "subrace"], cutoff=25)
 
     @slash_lookup.sub_command(name="speciesfeat", description="Looks up a species feature.")
     async def slash_speciesfeat(
@@ -254,15 +255,13 @@ async def slash_speciesfeat(
 
     @slash_speciesfeat.autocomplete("name")
     async def slash_speciesfeat_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {
-            k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in ("race", "subrace")
-        }
-        select_key = create_selectkey(available_ids)
+        async def choices():
+            return SearchIndex.chain(
+                compendium.search_index(compendium.rfeats, slash_match_key),
+                compendium.search_index(compendium.subrfeats, slash_match_key),
+            )
 
-        result, strict = search(compendium.rfeats + compendium.subrfeats, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "racefeat", choices, ["race", "subrace"], cutoff=25)
 
     async def _racefeat(self, ctx, result: RaceFeature):
         destination = await self._get_destination(ctx)
@@ -299,15 +298,13 @@ async def slash_race(
 
     @slash_race.autocomplete("name")
     async def slash_race_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {
-            k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in ("race", "subrace")
-        }
-        select_key = create_selectkey(available_ids)
+        async def choices():
+            return SearchIndex.chain(
+                compendium.search_index(compendium.races, slash_match_key),
+                compendium.search_index(compendium.subraces, slash_match_key),
+            )
 
-        result, strict = search(compendium.races + compendium.subraces, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "race", choices, ["race", "subrace"], cutoff=25)
 
     @slash_lookup.sub_command(name="species", description="Looks up a species.")
     async def slash_species(
@@ -327,15 +324,13 @@ async def slash_species(
 
     @slash_species.autocomplete("name")
     async def slash_species_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {
-            k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in ("race", "subrace")
-        }
-        select_key = create_selectkey(available_ids)
+        async def choices():
+            return SearchIndex.chain(
+                compendium.search_index(compendium.races, slash_match_key),
+                compendium.search_index(compendium.subraces, slash_match_key),
+            )
 
-        result, strict = search(compendium.races + compendium.subraces, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "race", choices, ["race", "subrace"], cutoff=25)
 
     async def _race(self, ctx, result: gamedata.race):
         destination = await self._get_destination(ctx)
@@ -376,16 +371,15 @@ async def slash_classfeat(
 
     @slash_classfeat.autocomplete("name")
     async def slash_classfeat_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {
-            k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in ("class", "class-feature")
-        }
-        select_key = create_selectkey(available_ids)
-
-        result, strict = search(compendium.cfeats + compendium.optional_cfeats, user_input, slash_match_key, 25)
+        async def choices():
+            return SearchIndex.chain(
+                compendium.search_index(compendium.cfeats, slash_match_key),
+                compendium.search_index(compendium.optional_cfeats, slash_match_key),
+            )
 
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(
+            inter, user_input, "classfeat", choices, ["class", "class-feature"], cutoff=25
+        )
 
     async def _classfeat(self, ctx, result: ClassFeature):
         destination = await self._get_destination(ctx)
@@ -428,12 +422,10 @@ async def slash_class(
 
     @slash_class.autocomplete("name")
     async def slash_class_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {"class": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "class")}
-        select_key = create_selectkey(available_ids)
-        result, strict = search(compendium.classes, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        async def choices():
+            return compendium.search_index(compendium.classes, slash_match_key)
+
+        return await self._autocomplete_entities(inter, user_input, "class", choices, ["class"], cutoff=25)
 
     async def _class(self, ctx, result: gamedata.Class, level):
         destination = await self._get_destination(ctx)
@@ -515,12 +507,10 @@ async def slash_subclass(
 
     @slash_subclass.autocomplete("name")
     async def slash_subclass_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {"class": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "class")}
-        select_key = create_selectkey(available_ids)
-        result, strict = search(compendium.subclasses, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        async def choices():
+            return compendium.search_index(compendium.subclasses, slash_match_key)
+
+        return await self._autocomplete_entities(inter, user_input, "subclass", choices, ["class"], cutoff=25)
 
     async def _subclass(self, ctx, result: gamedata.Subclass):
         destination = await self._get_destination(ctx)
@@ -570,12 +560,10 @@ async def slash_background(
 
     @slash_background.autocomplete("name")
     async def slash_background_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        available_ids = {"background": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "background")}
-        select_key = create_selectkey(available_ids)
-        result, strict = search(compendium.backgrounds, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        async def choices():
+            return compendium.search_index(compendium.backgrounds, slash_match_key)
+
+        return await self._autocomplete_entities(inter, user_input, "background", choices, ["background"], cutoff=25)
 
     async def _background(self, ctx, result: gamedata.Background):
         destination = await self._get_destination(ctx)
@@ -896,21 +884,18 @@ async def slash_token(
     @slash_monimage.autocomplete("name")
     @slash_token.autocomplete("name")
     async def slash_monster_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        choices = await self._get_entities(inter, "monster", lookuputils.get_monster_choices)
-
-        # If this autocomplete is for token or monimage, filter out monsters without tokens or images
         lookup_command = list(inter.options)[0]
-        if lookup_command == "token":
-            choices = list(filter(lambda x: x.has_token, choices))
-        elif lookup_command == "monimage":
-            choices = list(filter(lambda x: x.has_image, choices))
-
-        available_ids = {"monster": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "monster")}
-        select_key = create_selectkey(available_ids)
-        result, strict = search(choices, user_input, slash_match_key)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+
+        async def choices():
+            monsters = await self._get_entities(inter, "monster", lookuputils.get_monster_choices)
+            # If this autocomplete is for token or monimage, filter out monsters without tokens or images
+            if lookup_command == "token":
+                monsters = list(filter(lambda x: x.has_token, monsters))
+            elif lookup_command == "monimage":
+                monsters = list(filter(lambda x: x.has_image, monsters))
+            return monsters
+
+        return await self._autocomplete_entities(inter, user_input, ("monster", lookup_command), choices, ["monster"])
 
     async def _token(self, ctx, monster: gamedata.Monster, plain_border, hide_name):
         destination = await self._get_destination(ctx)
@@ -957,8 +942,7 @@ async def spell(self, ctx, *, name: str):
         """Looks up a spell."""
         version, name, strict = await extract_and_set_version(ctx, name)
 
-        choices = await lookuputils.get_spell_choices(ctx)
-        choices = await filter_spells_by_version(ctx, choices, version, strict)
+        choices = await lookuputils.get_versioned_spell_choices(ctx, version, strict)
         spell = await lookuputils.search_entities(ctx, {"spell": choices}, name)
 
         return await self._spell(ctx, spell)
@@ -981,15 +965,10 @@ async def slash_spell(
 
     @slash_spell.autocomplete("name")
     async def slash_spell_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        choices = await self._get_entities(inter, "spell", lookuputils.get_spell_choices)
-
-        available_ids = {"spell": await self.bot.ddb.get_accessible_entities(inter, inter.author.id, "spell")}
-        select_key = create_selectkey(available_ids)
-        result, strict = search(choices, user_input, slash_match_key, 25)
+        async def choices():
+            return await self._get_entities(inter, "spell", lookuputils.get_spell_choices)
 
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "spell", choices, ["spell"], cutoff=25)
 
     async def _spell(self, ctx, spell: gamedata.spell):
         destination = await self._get_destination(ctx)
@@ -1089,21 +1068,10 @@ async def slash_item(
 
     @slash_item.autocomplete("name")
     async def slash_item_auto(self, inter: disnake.ApplicationCommandInteraction, user_input: str):
-        choices = await self._get_entities(inter, "item", lookuputils.get_item_entitlement_choice_map)
+        async def choices():
+            return await self._get_entities(inter, "item", lookuputils.get_item_entitlement_choice_map)
 
-        choice_dict = {}
-        for choice in choices:
-            if choice.entity_type not in choice_dict:
-                choice_dict[choice.entity_type] = []
-            choice_dict[choice.entity_type].append(choice)
-
-        available_ids = {k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in choice_dict}
-
-        select_key = create_selectkey(available_ids)
-        result, strict = search(choices, user_input, slash_match_key, 25)
-        if strict:
-            return [select_key(result, True)]
-        return [select_key(r, True) for r in result][:25]
+        return await self._autocomplete_entities(inter, user_input, "item", choices, cutoff=25)
 
     async def _item(self, ctx, item: gamedata.item):
         """Looks up an item."""
@@ -1160,7 +1128,7 @@ async def lookup_settings(self, ctx, *, args=""):
             out.append(f"pm_result set to {setting}!")
 
         if out:
-            await guild_settings.commit(ctx.bot.mdb)
+            await guild_settings.commit(ctx.bot.mdb, ctx.bot.rdb)
             await ctx.send("Lookup settings set:\n" + "\n".join(out))
         else:
             await ctx.send(f"No settings found. Try using `{ctx.prefix}lookup_settings` to open an interactive menu.")
@@ -1190,6 +1158,29 @@ async def _check_access(self, inter, entity: Sourced, entity_choices: list[str])
         if not can_access(entity, available_ids[entity.entitlement_entity_type]):
             raise RequiresLicense(entity, available_ids[entity.entitlement_entity_type] is not None)
 
+    async def _autocomplete_entities(
+        self, inter, user_input, session_key, choices_factory, entity_types=None, cutoff=5
+    ) -> list[str]:
+        """
+        Autocompletes the name of an entity, marking entities the user does not have access to.
+
+        :param session_key: A hashable key identifying the set of choices.
+        :param choices_factory: An async function returning the entities to choose from, as a list or SearchIndex.
+        :param entity_types: The entitlement entity types of the choices. Defaults to the types of every choice.
+        :param cutoff: The scorer cutoff value for fuzzy searching.
+        """
+
+        async def new_session():
+            choices = await choices_factory()
+            if not isinstance(choices, SearchIndex):
+                choices = SearchIndex(choices, slash_match_key)
+            types = entity_types if entity_types is not None else {e.entitlement_entity_type for e in choices}
+            available_ids = {k: await self.bot.ddb.get_accessible_entities(inter, inter.author.id, k) for k in types}
+            select_key = create_selectkey(available_ids)
+            return AutocompleteSession(choices, lambda e: select_key(e, True), cutoff)
+
+        return await autocomplete(inter, session_key, user_input, new_session)
+
     async def _get_entities(self, ctx, entity_type, entity_source):
         """
         Caches a minimal version of each entity of a given type available to a user for a particular context
@@ -1247,6 +1238,7 @@ async def clear_cache(self, ctx, entity_type):
         if key in ENTITY_CACHE:
             del ENTITY_CACHE[key]
         await self.bot.rdb.delete(key)
+        clear_sessions(ctx.author.id, ctx.guild.id if ctx.guild is not None else None)
 
     # ==== listeners ====
     @commands.Cog.listener()
@@ -1259,7 +1251,7 @@ async def on_guild_join(self, guild):
 
         if guild.member_count >= LARGE_THRESHOLD:
             guild_settings = utils.settings.ServerSettings(guild_id=guild.id, lookup_dm_required=False)
-            await guild_settings.commit(self.bot.mdb)
+            await guild_settings.commit(self.bot.mdb, self.bot.rdb)
 
 
 def setup(bot):
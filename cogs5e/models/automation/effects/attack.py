@@ -1,5 +1,6 @@
 import d20
 
+from utils import rollplan
 from utils.enums import AdvantageType
 from utils.functions import reconcile_adv
 from . import Effect
@@ -157,9 +158,9 @@ def run(self, autoctx):
                 to_hit_message = f"{to_hit_message} Forced Roll!"
 
             if b:
-                to_hit_roll = d20.roll(f"{formatted_d20}+{attack_bonus}+{b}")
+                to_hit_roll = rollplan.roll(f"{formatted_d20}+{attack_bonus}+{b}")
             else:
-                to_hit_roll = d20.roll(f"{formatted_d20}+{attack_bonus}")
+                to_hit_roll = rollplan.roll(f"{formatted_d20}+{attack_bonus}")
 
             # hit/miss/crit processing
             # leftmost roll value - -criton
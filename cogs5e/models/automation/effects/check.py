@@ -2,7 +2,7 @@
 
 import d20
 
-from utils import constants, enums
+from utils import constants, enums, rollplan
 from utils.functions import camel_to_title, maybe_mod, natural_join, reconcile_adv
 from . import Effect
 from ..errors import AutomationException, InvalidIntExpression, TargetException
@@ -150,7 +150,7 @@ def run(self, autoctx: "AutomationContext"):
                 base_adv=self_adv,
                 min_check=self_min,
             )
-            contest_roll = d20.roll(contest_dice)
+            contest_roll = rollplan.roll(contest_dice)
 
             autoctx.metavars["lastContestRollTotal"] = contest_roll.total
             autoctx.metavars["lastContestNaturalRoll"] = d20.utils.leftmost(contest_roll.expr).total
@@ -179,7 +179,7 @@ def run(self, autoctx: "AutomationContext"):
                 base_adv=base_adv,
                 min_check=min_check,
             )
-            check_roll = d20.roll(check_dice)
+            check_roll = rollplan.roll(check_dice)
 
             autoctx.metavars["lastCheckRollTotal"] = check_roll.total
             autoctx.metavars["lastCheckNaturalRoll"] = d20.utils.leftmost(check_roll.expr).total
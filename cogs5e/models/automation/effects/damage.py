@@ -1,10 +1,8 @@
-import copy
-
 import d20
 import draconic
 
 from cogs5e.models.sheet.resistance import Resistances, do_resistances
-from utils.enums import CritDamageType
+from utils import rollplan
 from . import Effect
 from .roll import RollEffectMetaVar
 from .. import utils
@@ -85,58 +83,39 @@ def run(self, autoctx):
             # add on combatant damage effects (#224)
             d_args.extend(autoctx.caster_active_effects(mapper=lambda effect: effect.effects.damage_bonus, default=[]))
 
-        # set up damage AST
+        # set up damage roll plan
         damage = autoctx.parse_annostr(damage)
-        dice_ast = copy.copy(d20.parse(damage))
-        dice_ast = utils.upcast_scaled_dice(self, autoctx, dice_ast)
+        transforms = utils.upcast_transforms(self, autoctx)
 
         if savage:
-            dice_ast.roll = d20.ast.OperatedSet(
-                d20.ast.NumberSet([dice_ast.roll, dice_ast.roll]), d20.SetOperator("k", [d20.SetSelector("h", 1)])
-            )
+            transforms.append(utils.KeepHigherRoll())
 
         # -mi # (#527)
         if mi_arg:
-            dice_ast = d20.utils.tree_map(utils.mi_mapper(mi_arg), dice_ast)
+            transforms.append(utils.MinimumDice(mi_arg))
 
         # -d #
         for d_arg in d_args:
-            d_ast = d20.parse(d_arg)
-            dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", d_ast.roll)
+            transforms.append(utils.AddRoll(d_arg))
 
         # crit
         # nocrit (#1216)
         # Disable critical damage in saves (#1556)
         in_crit = (autoctx.in_crit or crit_arg) and not (nocrit or autoctx.in_save)
         if in_crit:
-            if crit_damage_type == CritDamageType.MAX_ADD:
-                dice_ast = utils.tree_map_prefix(utils.max_add_crit_mapper, dice_ast)
-            elif crit_damage_type == CritDamageType.DOUBLE_ALL:
-                dice_ast.roll = d20.ast.BinOp(d20.ast.Parenthetical(dice_ast.roll), "*", d20.ast.Literal(2))
-            elif crit_damage_type == CritDamageType.DOUBLE_DICE:
-                dice_ast = utils.tree_map_prefix(utils.double_dice_crit_mapper, dice_ast)
-            else:
-                dice_ast = d20.utils.tree_map(utils.crit_mapper, dice_ast)
-            if critdice and not autoctx.is_spell:
-                if crit_damage_type in (CritDamageType.DOUBLE_ALL, CritDamageType.DOUBLE_DICE):
-                    crit_ast = utils.crit_dice_gen(dice_ast, critdice)
-                    if crit_ast:
-                        dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", crit_ast)
-                else:
-                    utils.critdice_tree_update(dice_ast, int(critdice))
+            transforms.append(utils.CritDamage(crit_damage_type, critdice if not autoctx.is_spell else 0))
 
         # -c #
         if in_crit:
             for c_arg in c_args:
-                c_ast = d20.parse(c_arg)
-                dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", c_ast.roll)
+                transforms.append(utils.AddRoll(c_arg))
 
         # max
         if max_arg:
-            dice_ast = d20.utils.tree_map(utils.max_mapper, dice_ast)
+            transforms.append(utils.MaximizeDice())
 
         # evaluate damage
-        dmgroll = d20.roll(dice_ast)
+        dmgroll = rollplan.get_plan(damage, transforms).roll()
 
         # magic arg (#853), magical effect (#1063)
         # silvered arg (#1544)
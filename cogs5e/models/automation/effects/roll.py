@@ -5,6 +5,7 @@
 import draconic
 import math
 
+from utils import rollplan
 from utils.dice import RerollableStringifier
 from . import Effect
 from .. import utils
@@ -48,8 +49,7 @@ def to_dict(self):
     def run(self, autoctx):
         super().run(autoctx)
 
-        dice_ast = copy.copy(d20.parse(autoctx.parse_annostr(self.dice)))
-        dice_ast = utils.upcast_scaled_dice(self, autoctx, dice_ast)
+        transforms = utils.upcast_transforms(self, autoctx)
 
         if not (self.fixedValue or self.hidden):
             d = autoctx.args.join("d", "+", ephem=True)
@@ -65,20 +65,19 @@ def run(self, autoctx):
                     d = effect_d
 
             if d:
-                d_ast = d20.parse(d)
-                dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", d_ast.roll)
+                transforms.append(utils.AddRoll(d))
         if not self.hidden:
             maxdmg = autoctx.args.last("max", None, bool, ephem=True)
             mi = autoctx.args.last("mi", None, int)
 
             # -mi # (#527)
             if mi:
-                dice_ast = d20.utils.tree_map(utils.mi_mapper(mi), dice_ast)
+                transforms.append(utils.MinimumDice(mi))
 
             if maxdmg:
-                dice_ast = d20.utils.tree_map(utils.max_mapper, dice_ast)
+                transforms.append(utils.MaximizeDice())
 
-        rolled = d20.roll(dice_ast)
+        rolled = rollplan.get_plan(autoctx.parse_annostr(self.dice), transforms).roll()
         if not self.hidden:
             name_out = self.displayName
             if not name_out:
@@ -1,7 +1,7 @@
 import d20
 
 from cogs5e.models.errors import InvalidSaveType
-from utils import enums
+from utils import enums, rollplan
 from utils.functions import maybe_mod, reconcile_adv, verbose_stat
 from . import Effect
 from ..errors import AutomationException, NoSpellDC, TargetException
@@ -131,7 +131,7 @@ def run(self, autoctx):
                 autoctx.queue(f"**{save_blurb}:** Automatic failure!")
             else:
                 save_dice = autoctx.target.get_save_dice(save_skill, adv=adv, sb=sb)
-                save_roll = d20.roll(save_dice)
+                save_roll = rollplan.roll(save_dice)
                 is_success = save_roll.total >= dc
 
                 # get natural roll
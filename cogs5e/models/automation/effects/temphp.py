@@ -1,8 +1,6 @@
-import copy
-
-import d20
 import draconic
 
+from utils import rollplan
 from . import Effect
 from .. import utils
 from ..errors import TargetException
@@ -40,13 +38,12 @@ def run(self, autoctx):
             return
 
         amount = autoctx.parse_annostr(amount)
-        dice_ast = copy.copy(d20.parse(amount))
-        dice_ast = utils.upcast_scaled_dice(self, autoctx, dice_ast)
+        transforms = utils.upcast_transforms(self, autoctx)
 
         if maxdmg:
-            dice_ast = d20.utils.tree_map(utils.max_mapper, dice_ast)
+            transforms.append(utils.MaximizeDice())
 
-        dmgroll = d20.roll(dice_ast)
+        dmgroll = rollplan.get_plan(amount, transforms).roll()
         thp_amount = max(dmgroll.total, 0)
         autoctx.queue(f"**THP**: {dmgroll.result}")
         autoctx.metavars["lastTempHp"] = thp_amount  # #1335
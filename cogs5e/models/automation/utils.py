@@ -1,4 +1,5 @@
 import copy
+from dataclasses import dataclass
 from typing import Callable
 
 import d20
@@ -7,6 +8,8 @@
 
 import aliasing.api.statblock
 from cogs5e.models.sheet.statblock import StatBlock
+from utils import rollplan
+from utils.enums import CritDamageType
 
 
 def maybe_alias_statblock(target):
@@ -19,8 +22,12 @@ def maybe_alias_statblock(target):
     return aliasing.api.statblock.AliasStatBlock(StatBlock(name=target or "Target"))
 
 
-def upcast_scaled_dice(effect, autoctx, dice_ast):
-    """Scales the dice of the cast to its appropriate amount (handling cantrip scaling and higher level addition)."""
+def upcast_transforms(effect, autoctx) -> list:
+    """
+    Returns the roll plan transforms that scale the dice of the cast to its appropriate amount (handling cantrip
+    scaling and higher level addition).
+    """
+    transforms = []
     if effect.cantripScale:
         level = autoctx.caster.spellbook.caster_level
         if level < 5:
@@ -32,21 +39,14 @@ def upcast_scaled_dice(effect, autoctx, dice_ast):
         else:
             level_dice = 4
         level_dice = autoctx.args.last("cantripdice", default=level_dice, type_=int)
-
-        def mapper(node):
-            if isinstance(node, d20.ast.Dice):
-                node.num = level_dice
-            return node
-
-        dice_ast = d20.utils.tree_map(mapper, dice_ast)
+        transforms.append(ScaleDice(level_dice))
 
     if effect.higher:
         higher = effect.higher.get(str(autoctx.get_cast_level()))
         if higher:
-            higher_ast = d20.parse(higher)
-            dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", higher_ast.roll)
+            transforms.append(AddRoll(higher))
 
-    return dice_ast
+    return transforms
 
 
 def mi_mapper(minimum: int) -> Callable[[d20.ast.Node], d20.ast.Node]:
@@ -133,6 +133,95 @@ def critdice_tree_update(dice_ast: d20.ast.Node, critdice: int):
         left.num += critdice
 
 
+# ==== roll plan transforms ====
+# these are hashable so that they can be part of a roll plan's cache key (see utils.rollplan); each returns a
+# transformed copy of the AST it's given
+@dataclass(frozen=True)
+class ScaleDice:
+    """Sets the number of each Dice AST node to *num*."""
+
+    num: int
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        def mapper(node):
+            if isinstance(node, d20.ast.Dice):
+                node.num = self.num
+            return node
+
+        return d20.utils.tree_map(mapper, dice_ast)
+
+
+@dataclass(frozen=True)
+class AddRoll:
+    """Adds the roll *expr* to the end of the AST."""
+
+    expr: str
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        dice_ast = copy.copy(dice_ast)
+        dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", rollplan.parse(self.expr).roll)
+        return dice_ast
+
+
+@dataclass(frozen=True)
+class KeepHigherRoll:
+    """Rolls the AST twice and keeps the higher result (e.g. Savage Attacker)."""
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        dice_ast = copy.copy(dice_ast)
+        dice_ast.roll = d20.ast.OperatedSet(
+            d20.ast.NumberSet([dice_ast.roll, dice_ast.roll]), d20.SetOperator("k", [d20.SetSelector("h", 1)])
+        )
+        return dice_ast
+
+
+@dataclass(frozen=True)
+class MinimumDice:
+    """Sets the minimum value of each die to *minimum*."""
+
+    minimum: int
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        return d20.utils.tree_map(mi_mapper(self.minimum), dice_ast)
+
+
+@dataclass(frozen=True)
+class MaximizeDice:
+    """Sets the value of each die to its maximum."""
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        return d20.utils.tree_map(max_mapper, dice_ast)
+
+
+@dataclass(frozen=True)
+class CritDamage:
+    """Applies critical damage of the given type to the AST, adding *critdice* extra dice if given."""
+
+    crit_type: CritDamageType
+    critdice: int = 0
+
+    def __call__(self, dice_ast: d20.ast.Expression) -> d20.ast.Expression:
+        if self.crit_type == CritDamageType.MAX_ADD:
+            dice_ast = tree_map_prefix(max_add_crit_mapper, dice_ast)
+        elif self.crit_type == CritDamageType.DOUBLE_ALL:
+            dice_ast = copy.copy(dice_ast)
+            dice_ast.roll = d20.ast.BinOp(d20.ast.Parenthetical(dice_ast.roll), "*", d20.ast.Literal(2))
+        elif self.crit_type == CritDamageType.DOUBLE_DICE:
+            dice_ast = tree_map_prefix(double_dice_crit_mapper, dice_ast)
+        else:
+            dice_ast = d20.utils.tree_map(crit_mapper, dice_ast)
+
+        if self.critdice:
+            if self.crit_type in (CritDamageType.DOUBLE_ALL, CritDamageType.DOUBLE_DICE):
+                crit_ast = crit_dice_gen(dice_ast, self.critdice)
+                if crit_ast:
+                    dice_ast.roll = d20.ast.BinOp(dice_ast.roll, "+", crit_ast)
+            else:
+                # the tree was copied by the crit mapper above
+                critdice_tree_update(dice_ast, int(self.critdice))
+        return dice_ast
+
+
 def stringify_intexpr(evaluator, expr):
     """
     For use in str builders - use the given evaluator to return the result of the intexpr, or nan if any exception is
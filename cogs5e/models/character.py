@@ -20,6 +20,7 @@
 from cogs5e.models.sheet.statblock import DESERIALIZE_MAP as _DESER, StatBlock
 from cogs5e.models.sheet.coinpurse import Coinpurse
 from cogs5e.sheets.abc import SHEET_VERSION
+from utils.dbdiff import copy_document, document_update
 from utils.functions import confirm, search_and_select
 from utils.settings import CharacterSettings
 from enum import Enum
@@ -34,6 +35,10 @@ class CharacterLocationContext(Enum):
     NOCHARACTER = "No Character"
 
 
+# bindings are invalidated over pubsub when they change; the TTL only bounds staleness if an invalidation is missed
+BINDINGS_CACHE_TTL = 600
+BINDINGS_INVALIDATE_COMMAND = "invalidate_character_bindings"
+
 # constants at bottom (yay execution order)
 
 
@@ -43,6 +48,12 @@ class Character(StatBlock):
     # retrieve/modify the same Character state
     # caches based on (owner, upstream)
     _cache = cachetools.TTLCache(maxsize=50, ttl=5)
+    # which character each user has active globally, per guild, and per channel, so that resolving the active
+    # character does not need any queries; invalidated over pubsub whenever a user's bindings change
+    # caches based on owner
+    _bindings_cache = cachetools.TTLCache(maxsize=100_000, ttl=BINDINGS_CACHE_TTL)
+    # incremented on every change, so a load that raced with a change is not cached
+    _bindings_generation = 0
 
     def __init__(
         self,
@@ -158,6 +169,9 @@ def __init__(
         # action automation
         self.actions = actions
 
+        # the (owner, upstream) and contents of the database document as of the last load or commit, if any
+        self._committed = None
+
     # ---------- Deserialization ----------
     @classmethod
     def from_dict(cls, d):
@@ -168,29 +182,38 @@ def from_dict(cls, d):
                 d[key] = klass.from_dict(d[key])
         return cls(**d)
 
+    @classmethod
+    def from_document(cls, d):
+        """
+        Deserializes a character from its database document, remembering the document so that later commits only
+        write the fields that changed.
+        """
+        snapshot = copy_document(d)
+        inst = cls.from_dict(d)
+        inst._set_committed(snapshot)
+        return inst
+
     @classmethod
     async def from_ctx(cls, ctx, use_global: bool = False, use_guild: bool = False, use_channel: bool = False):
         owner_id = str(ctx.author.id)
-        active_character = None
-        if ctx.channel is not None and use_channel:
-            channel_id = str(ctx.channel.id)
-            active_character = await ctx.bot.mdb.characters.find_one({"owner": owner_id, "active_channels": channel_id})
-        if ctx.guild is not None and use_guild and active_character is None:
-            guild_id = str(ctx.guild.id)
-            active_character = await ctx.bot.mdb.characters.find_one({"owner": owner_id, "active_guilds": guild_id})
-        if use_global and active_character is None:
-            active_character = await ctx.bot.mdb.characters.find_one({"owner": owner_id, "active": True})
-        if active_character is None:
-            raise NoCharacter()
+        channel_id = str(ctx.channel.id) if ctx.channel is not None and use_channel else None
+        guild_id = str(ctx.guild.id) if ctx.guild is not None and use_guild else None
 
+        bindings = await cls.get_bindings(ctx.bot.mdb, owner_id)
+        upstream = bindings.resolve(channel_id, guild_id, use_global)
+        if upstream is None:
+            raise NoCharacter()
         try:
-            # return from cache if available
-            return cls._cache[owner_id, active_character["upstream"]]
-        except KeyError:
-            # otherwise deserialize and write to cache
-            inst = cls.from_dict(active_character)
-            cls._cache[owner_id, active_character["upstream"]] = inst
-            return inst
+            return await cls.from_bot_and_ids(ctx.bot, owner_id, upstream)
+        except NoCharacter:
+            # the bound character was deleted since the bindings were cached
+            cls.invalidate_cached_bindings(owner_id)
+
+        bindings = await cls.get_bindings(ctx.bot.mdb, owner_id)
+        upstream = bindings.resolve(channel_id, guild_id, use_global)
+        if upstream is None:
+            raise NoCharacter()
+        return await cls.from_bot_and_ids(ctx.bot, owner_id, upstream)
 
     @classmethod
     async def from_bot_and_ids(cls, bot, owner_id: str, character_id: str):
@@ -206,10 +229,58 @@ async def from_bot_and_ids(cls, bot, owner_id: str, character_id: str):
         if character is None:
             raise NoCharacter()
         # write to cache
-        inst = cls.from_dict(character)
+        inst = cls.from_document(character)
         cls._cache[owner_id, character_id] = inst
         return inst
 
+    @classmethod
+    async def from_bot_and_ids_many(cls, bot, ids):
+        """
+        Gets many characters by (owner id, character id) in a single database round-trip.
+
+        :param bot: The bot.
+        :param ids: An iterable of (owner id, character id) pairs.
+        :return: A dict mapping (owner id, character id) to Character. Characters that do not exist are omitted.
+        :rtype: dict[tuple[str, str], Character]
+        """
+        found, missing = cls._get_many_from_cache(ids)
+        if missing:
+            query = {"$or": [{"owner": owner_id, "upstream": character_id} for owner_id, character_id in missing]}
+            async for character in bot.mdb.characters.find(query):
+                cls._deserialize_many_into(found, character)
+        return found
+
+    @classmethod
+    def from_bot_and_ids_many_sync(cls, bot, ids):
+        """Synchronous version of :meth:`from_bot_and_ids_many`."""
+        found, missing = cls._get_many_from_cache(ids)
+        if missing:
+            query = {"$or": [{"owner": owner_id, "upstream": character_id} for owner_id, character_id in missing]}
+            for character in bot.mdb.characters.delegate.find(query):
+                cls._deserialize_many_into(found, character)
+        return found
+
+    @classmethod
+    def _get_many_from_cache(cls, ids):
+        found = {}
+        missing = set()
+        for owner_id, character_id in ids:
+            key = (str(owner_id), character_id)
+            try:
+                # read from cache if available
+                found[key] = cls._cache[key]
+            except KeyError:
+                missing.add(key)
+        return found, missing
+
+    @classmethod
+    def _deserialize_many_into(cls, found, character):
+        key = (character["owner"], character["upstream"])
+        # write to cache
+        inst = cls.from_document(character)
+        cls._cache[key] = inst
+        found[key] = inst
+
     @classmethod
     def deserialize_character_from_dict(cls, owner_id, character_dictionary):
         char = Character.from_dict(character_dictionary)
@@ -231,7 +302,7 @@ async def from_bot_and_channel_id(cls, ctx, owner_id: str, channel_id: str):
         if character is None:
             raise NoCharacter()
         # write to cache
-        inst = cls.from_dict(character)
+        inst = cls.from_document(character)
         cls._cache[owner_id, channel_id] = inst
         return inst
 
@@ -249,10 +320,69 @@ def from_bot_and_ids_sync(cls, bot, owner_id: str, character_id: str):
         if character is None:
             raise NoCharacter()
         # write to cache
-        inst = cls.from_dict(character)
+        inst = cls.from_document(character)
         cls._cache[owner_id, character_id] = inst
         return inst
 
+    # ---------- Bindings ----------
+    @classmethod
+    async def get_bindings(cls, mdb, owner_id: str):
+        """
+        Returns which of a user's characters are active globally, per guild, and per channel. Bindings are cached.
+
+        :rtype: CharacterBindings
+        """
+        owner_id = str(owner_id)
+        try:
+            return cls._bindings_cache[owner_id]
+        except KeyError:
+            pass
+
+        generation = cls._bindings_generation
+        query = {
+            "owner": owner_id,
+            "$or": [{"active": True}, {"active_guilds.0": {"$exists": True}}, {"active_channels.0": {"$exists": True}}],
+        }
+        bindings = CharacterBindings.from_directory([
+            CharacterDirectoryEntry.from_document(d)
+            async for d in mdb.characters.find(query, projection=CHARACTER_DIRECTORY_PROJECTION)
+        ])
+        if generation == cls._bindings_generation:
+            cls._bindings_cache[owner_id] = bindings
+        return bindings
+
+    @classmethod
+    def invalidate_cached_bindings(cls, owner_id: str):
+        """Drops the cached bindings of a user in this process, if any."""
+        cls._bindings_generation += 1
+        cls._bindings_cache.pop(str(owner_id), None)
+
+    @classmethod
+    async def invalidate_bindings(cls, ctx, owner_id: str):
+        """Drops the cached bindings of a user, and tells every other cluster to drop theirs."""
+        cls.invalidate_cached_bindings(owner_id)
+        await ctx.bot.rdb.publish_command(BINDINGS_INVALIDATE_COMMAND, str(owner_id))
+
+    # ---------- Directory ----------
+    @staticmethod
+    async def get_directory(mdb, owner_id: str):
+        """
+        Returns the names and active bindings of every character a user owns, without loading the characters.
+        Use :meth:`from_bot_and_ids` to load a character from its entry.
+
+        :rtype: list[CharacterDirectoryEntry]
+        """
+        return [
+            CharacterDirectoryEntry.from_document(d)
+            async for d in mdb.characters.find({"owner": str(owner_id)}, projection=CHARACTER_DIRECTORY_PROJECTION)
+        ]
+
+    @staticmethod
+    async def exists(mdb, owner_id: str, upstream: str) -> bool:
+        """Returns whether the user owns a character with the given upstream, without loading it."""
+        character = await mdb.characters.find_one({"owner": str(owner_id), "upstream": upstream}, projection=["_id"])
+        return character is not None
+
     # ---------- Serialization ----------
     def to_dict(self):
         d = super().to_dict()
@@ -283,6 +413,7 @@ def to_dict(self):
     @staticmethod
     async def delete(ctx, owner_id, upstream):
         await ctx.bot.mdb.characters.delete_one({"owner": owner_id, "upstream": upstream})
+        await Character.invalidate_bindings(ctx, owner_id)
         try:
             del Character._cache[owner_id, upstream]
         except KeyError:
@@ -370,29 +501,47 @@ def get_scope_locals(self, no_cvars=False):
 
     # ---------- DATABASE ----------
     async def commit(self, ctx, do_live_integrations=True):
-        """Writes a character object to the database, under the contextual author."""
+        """
+        Writes a character object to the database, under the contextual author.
+        Only the fields that changed since the character was loaded or last committed are written.
+        """
         data = self.to_dict()
         data.pop("active")  # #1472 - may regress when doing atomic commits, be careful
         data.pop("active_guilds")
         data.pop("active_channels")
+        key = (self._owner, self._upstream)
         try:
-            await ctx.bot.mdb.characters.update_one(
-                {"owner": self._owner, "upstream": self._upstream},
-                {
-                    "$set": data,
-                    "$setOnInsert": {
-                        "active": self._active,
-                        "active_guilds": self._active_guilds,
-                        "active_channels": self._active_channels,
-                    },  # also #1472
-                },
-                upsert=True,
-            )
+            if self._committed is not None and self._committed[0] == key:
+                update = document_update(self._committed[1], data)
+                if update:
+                    await ctx.bot.mdb.characters.update_one({"owner": key[0], "upstream": key[1]}, update)
+            else:
+                # never committed, or moved to a different document (e.g. transferred) - write the whole thing
+                await ctx.bot.mdb.characters.update_one(
+                    {"owner": key[0], "upstream": key[1]},
+                    {
+                        "$set": data,
+                        "$setOnInsert": {
+                            "active": self._active,
+                            "active_guilds": self._active_guilds,
+                            "active_channels": self._active_channels,
+                        },  # also #1472
+                    },
+                    upsert=True,
+                )
+                # a new document for this owner may carry bindings (e.g. a transferred active character)
+                await Character.invalidate_bindings(ctx, key[0])
         except OverflowError:
             raise ExternalImportError("A number on the character sheet is too large to store.")
+        self._set_committed(data, key)
         if self._live_integration is not None and do_live_integrations and self.options.sync_outbound:
             self._live_integration.commit_soon(ctx)  # creates a task to commit eventually
 
+    def _set_committed(self, data, key=None):
+        if key is None:
+            key = (self._owner, self._upstream)
+        self._committed = (key, copy_document(data))
+
     async def set_active(self, ctx):
         """Sets the character as globally active and unsets any server-active character or channel-active characters."""
         channel_character = None
@@ -442,6 +591,7 @@ async def set_global_active(self, ctx, previous_character):
         await ctx.bot.mdb.characters.update_one(
             {"owner": owner_id, "upstream": self._upstream}, {"$set": {"active": True}}
         )
+        await Character.invalidate_bindings(ctx, owner_id)
         self._active = True
         message = f"Global character set to '{self.name}'"
         if previous_character:
@@ -468,6 +618,7 @@ async def set_server_active(self, ctx, previous_character):
         await ctx.bot.mdb.characters.update_one(
             {"owner": owner_id, "upstream": self._upstream}, {"$addToSet": {"active_guilds": guild_id}}
         )
+        await Character.invalidate_bindings(ctx, owner_id)
         if guild_id not in self._active_guilds:
             self._active_guilds.append(guild_id)
         message = f"Server character set to '{self.name}'"
@@ -490,6 +641,7 @@ async def unset_server_active(self, ctx):
         unset_result = await ctx.bot.mdb.characters.update_one(
             {"owner": str(ctx.author.id), "upstream": self._upstream}, {"$pull": {"active_guilds": guild_id}}
         )
+        await Character.invalidate_bindings(ctx, ctx.author.id)
         try:
             self._active_guilds.remove(guild_id)
         except ValueError:
@@ -522,6 +674,7 @@ async def set_channel_active(self, ctx, previous_character):
         await ctx.bot.mdb.characters.update_one(
             {"owner": owner_id, "upstream": self._upstream}, {"$addToSet": {"active_channels": channel_id}}
         )
+        await Character.invalidate_bindings(ctx, owner_id)
         if channel_id not in self._active_channels:
             self._active_channels.append(channel_id)
 
@@ -549,6 +702,7 @@ async def unset_active_channel_helper(self, ctx, channel_id):
         unset_result = await ctx.bot.mdb.characters.update_one(
             {"owner": str(ctx.author.id), "upstream": self._upstream}, {"$pull": {"active_channels": channel_id}}
         )
+        await Character.invalidate_bindings(ctx, ctx.author.id)
         try:
             self._active_channels.remove(channel_id)
         except ValueError:
@@ -876,6 +1030,71 @@ def set_slots(self, *args, **kwargs):
 
 SetActiveResult = namedtuple("SetActiveResult", ["did_unset_active_location", "message"])
 
+# the fields of a character document needed to list, select, and resolve the active bindings of a user's characters
+CHARACTER_DIRECTORY_PROJECTION = {
+    "_id": False,
+    "upstream": True,
+    "name": True,
+    "active": True,
+    "active_guilds": True,
+    "active_channels": True,
+}
+
+
+class CharacterDirectoryEntry(
+    namedtuple("CharacterDirectoryEntry", ["upstream", "name", "active", "active_guilds", "active_channels"])
+):
+    """The name and active bindings of a character, as returned by :meth:`Character.get_directory`."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_document(cls, d):
+        return cls(
+            upstream=d["upstream"],
+            name=d["name"],
+            active=d.get("active", False),
+            active_guilds=d.get("active_guilds", []),
+            active_channels=d.get("active_channels", []),
+        )
+
+
+class CharacterBindings(namedtuple("CharacterBindings", ["global_upstream", "guilds", "channels"])):
+    """
+    The upstreams of the characters a user has active globally, per guild ID, and per channel ID, as returned by
+    :meth:`Character.get_bindings`.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_directory(cls, entries):
+        global_upstream = None
+        guilds = {}
+        channels = {}
+        for entry in entries:
+            if entry.active and global_upstream is None:
+                global_upstream = entry.upstream
+            for guild_id in entry.active_guilds:
+                guilds.setdefault(guild_id, entry.upstream)
+            for channel_id in entry.active_channels:
+                channels.setdefault(channel_id, entry.upstream)
+        return cls(global_upstream, guilds, channels)
+
+    def resolve(self, channel_id: str = None, guild_id: str = None, use_global: bool = False):
+        """
+        Returns the upstream of the character active in the given channel, else the given guild, else globally (if
+        *use_global*), or None if there is none.
+        """
+        if channel_id is not None and channel_id in self.channels:
+            return self.channels[channel_id]
+        if guild_id is not None and guild_id in self.guilds:
+            return self.guilds[guild_id]
+        if use_global:
+            return self.global_upstream
+        return None
+
+
 INTEGRATION_MAP = {"dicecloud": DicecloudIntegration, "beyond": DDBSheetSync}
 DESERIALIZE_MAP = {
     **_DESER,
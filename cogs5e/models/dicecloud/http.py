@@ -4,6 +4,7 @@
 
 import aiohttp
 
+from utils import httpclient
 from .errors import Forbidden, HTTPException, NotFound, Timeout
 
 MAX_TRIES = 10
@@ -32,31 +33,36 @@ async def request(self, method, endpoint, body, headers=None, query=None):
         if self.debug:
             print(f"{method} {endpoint}: {body}")
         data = None
-        async with aiohttp.ClientSession() as session:
-            for _ in range(MAX_TRIES):
-                try:
-                    async with session.request(
-                        method, f"{self.base}{endpoint}", data=body, headers=headers, params=query
-                    ) as resp:
-                        log.info(f"Dicecloud returned {resp.status} ({endpoint})")
-                        if resp.status == 200:
-                            data = await resp.json(encoding="utf-8")
-                            break
-                        elif resp.status == 429:
-                            timeout = await resp.json(encoding="utf-8")
-                            log.warning(f"Dicecloud ratelimit hit ({endpoint}) - resets in {timeout}ms")
-                            await asyncio.sleep(timeout["timeToReset"] / 1000)  # rate-limited, wait and try again
-                        elif 400 <= resp.status < 600:
-                            if resp.status == 403:
-                                raise Forbidden(resp.reason)
-                            elif resp.status == 404:
-                                raise NotFound(resp.reason)
-                            else:
-                                raise HTTPException(resp.status, resp.reason)
+        # dicecloud tells us how long to wait when we are rate-limited, so we retry here instead of in the client
+        for _ in range(MAX_TRIES):
+            retry_after = None
+            try:
+                async with httpclient.client.request(
+                    method, f"{self.base}{endpoint}", data=body, headers=headers, params=query, max_tries=1
+                ) as resp:
+                    log.info(f"Dicecloud returned {resp.status} ({endpoint})")
+                    if resp.status == 200:
+                        data = await resp.json(encoding="utf-8")
+                        break
+                    elif resp.status == 429:
+                        timeout = await resp.json(encoding="utf-8")
+                        log.warning(f"Dicecloud ratelimit hit ({endpoint}) - resets in {timeout}ms")
+                        retry_after = timeout["timeToReset"] / 1000
+                    elif 400 <= resp.status < 600:
+                        if resp.status == 403:
+                            raise Forbidden(resp.reason)
+                        elif resp.status == 404:
+                            raise NotFound(resp.reason)
                         else:
-                            log.warning(f"Unknown response from Dicecloud: {resp.status}")
-                except aiohttp.ServerDisconnectedError:
-                    raise HTTPException(None, "Server disconnected")
+                            raise HTTPException(resp.status, resp.reason)
+                    else:
+                        log.warning(f"Unknown response from Dicecloud: {resp.status}")
+            except aiohttp.ServerDisconnectedError:
+                raise HTTPException(None, "Server disconnected")
+
+            # rate-limited, wait and try again - after releasing the response, so we don't hold the host's slot
+            if retry_after is not None:
+                await asyncio.sleep(retry_after)
         if not data:  # we did 10 loops and always got either 200 or 429 but we have no data, so we must have 429ed
             raise Timeout(f"Dicecloud failed to respond after {MAX_TRIES} tries. Please try again.")
 
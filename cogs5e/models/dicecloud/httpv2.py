@@ -6,6 +6,7 @@
 
 import aiohttp
 
+from utils import httpclient
 from .errors import Forbidden, HTTPException, NotFound, Timeout
 
 MAX_TRIES = 10
@@ -47,38 +48,44 @@ async def request(self, method, endpoint, body, headers=None, query=None):
         return data
 
     async def try_until_max(self, method, endpoint, data={}, headers={}, params={}):
-        async with aiohttp.ClientSession() as session:
-            reauthed = self.no_auth
-            for _ in range(MAX_TRIES):
-                try:
-                    async with session.request(
-                        method, f"{self.base}{endpoint}", data=data, headers=headers, params=params
-                    ) as resp:
-                        log.info(f"Dicecloud V2 returned {resp.status} ({endpoint})")
-                        data = await resp.json(encoding="utf-8")
-                        if resp.status == 200:
-                            return data
-                        elif resp.status == 429:
-                            timeout = data
-                            log.warning(f"Dicecloud V2 ratelimit hit ({endpoint}) - resets in {timeout}ms")
-                            await asyncio.sleep(timeout["timeToReset"] / 1000)  # rate-limited, wait and try again
-                        elif 400 <= resp.status < 600:
-                            if resp.status == 403:
-                                if not reauthed and data.get("reason") == "Invalid authentication token":
-                                    auth_token = await self.get_auth(force_reauth=True)
-                                    if auth_token:
-                                        headers["Authorization"] = "Bearer " + auth_token
-                                    reauthed = True
-                                else:
-                                    raise Forbidden(data.get("reason") or resp.reason)
-                            elif resp.status == 404:
-                                raise NotFound(data.get("reason") or resp.reason)
-                            else:
-                                raise HTTPException(resp.status, data.get("reason") or resp.reason)
+        reauthed = self.no_auth
+        # dicecloud tells us how long to wait when we are rate-limited, so we retry here instead of in the client
+        for _ in range(MAX_TRIES):
+            retry_after = None
+            try:
+                async with httpclient.client.request(
+                    method, f"{self.base}{endpoint}", data=data, headers=headers, params=params, max_tries=1
+                ) as resp:
+                    log.info(f"Dicecloud V2 returned {resp.status} ({endpoint})")
+                    resp_data = await resp.json(encoding="utf-8")
+                    if resp.status == 200:
+                        return resp_data
+                    elif resp.status == 429:
+                        timeout = resp_data
+                        log.warning(f"Dicecloud V2 ratelimit hit ({endpoint}) - resets in {timeout}ms")
+                        retry_after = timeout["timeToReset"] / 1000
+                    elif 400 <= resp.status < 600:
+                        if resp.status == 403:
+                            if reauthed or resp_data.get("reason") != "Invalid authentication token":
+                                raise Forbidden(resp_data.get("reason") or resp.reason)
+                        elif resp.status == 404:
+                            raise NotFound(resp_data.get("reason") or resp.reason)
                         else:
-                            log.warning(f"Unknown response from Dicecloud: {resp.status}")
-                except aiohttp.ServerDisconnectedError:
-                    raise HTTPException(None, "Server disconnected")
+                            raise HTTPException(resp.status, resp_data.get("reason") or resp.reason)
+                    else:
+                        log.warning(f"Unknown response from Dicecloud: {resp.status}")
+            except aiohttp.ServerDisconnectedError:
+                raise HTTPException(None, "Server disconnected")
+
+            # wait or reauthenticate after releasing the response, so we don't hold the host's slot (logging in is a
+            # request to the same host)
+            if retry_after is not None:
+                await asyncio.sleep(retry_after)  # rate-limited, wait and try again
+            elif resp.status == 403:
+                auth_token = await self.get_auth(force_reauth=True)
+                if auth_token:
+                    headers["Authorization"] = "Bearer " + auth_token
+                reauthed = True
         raise Timeout(
             f"Dicecloud failed to respond after {MAX_TRIES} tries. Please try again."
         )  # we did 10 loops and never got 200, so we must have 429ed
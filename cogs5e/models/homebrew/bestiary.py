@@ -6,6 +6,7 @@
 
 import aiohttp
 import automation_common
+import cachetools
 import pydantic
 import yaml
 from markdownify import markdownify
@@ -17,6 +18,7 @@
 from cogs5e.models.sheet.resistance import Resistances
 from cogs5e.models.sheet.spellcasting import SpellbookSpell
 from gamedata.monster import Monster, MonsterSpellbook, Trait
+from utils import httpclient
 from utils.functions import search_and_select
 from utils.subscription_mixins import CommonHomebrewMixin
 
@@ -26,6 +28,18 @@
 # to invalidate the existing cache of data
 BESTIARY_SCHEMA_VERSION = b"2"
 
+# cache
+# bestiaries are content-addressed by (id, sha256), so a parsed bestiary never changes and can be shared by every
+# lookup in this process; the parsed monster cache is bounded by the total number of monsters it holds
+PARSED_MONSTER_CACHE_SIZE = 20000
+PARSED_MONSTER_CACHE = cachetools.LRUCache(PARSED_MONSTER_CACHE_SIZE, getsizeof=len)  # {(oid, sha256): (Monster,)}
+BESTIARY_METADATA_CACHE = cachetools.LRUCache(1024)  # {oid: dict}
+# subscriptions are invalidated locally on write; the TTL bounds how long other clusters can see stale subscriptions
+SUBSCRIPTION_TTL = 60
+USER_ACTIVE_CACHE = cachetools.TTLCache(4096, SUBSCRIPTION_TTL)  # {user_id: oid or None}
+GUILD_ACTIVE_CACHE = cachetools.TTLCache(4096, SUBSCRIPTION_TTL)  # {guild_id: (oid,)}
+_CACHE_MISS = object()
+
 
 class Bestiary(CommonHomebrewMixin):
     # site_type = CRITTER_DB or BESTIARY_BUILDER
@@ -71,10 +85,13 @@ async def from_ctx(cls, ctx):
 
     @classmethod
     async def from_id(cls, ctx, oid):
-        bestiary = await ctx.bot.mdb.bestiaries.find_one({"_id": oid}, projection={"monsters": False})
+        bestiary = BESTIARY_METADATA_CACHE.get(oid)
         if bestiary is None:
-            raise ValueError("Bestiary does not exist")
-        return cls.from_dict(bestiary)
+            bestiary = await ctx.bot.mdb.bestiaries.find_one({"_id": oid}, projection={"monsters": False})
+            if bestiary is None:
+                raise ValueError("Bestiary does not exist")
+            BESTIARY_METADATA_CACHE[oid] = bestiary
+        return cls.from_dict(dict(bestiary))
 
     @classmethod
     async def from_bestiary_builder(cls, ctx, url):
@@ -83,22 +100,21 @@ async def from_bestiary_builder(cls, ctx, url):
         sha256_hash = hashlib.sha256()
         sha256_hash.update(BESTIARY_SCHEMA_VERSION)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{api_base}/{url}") as resp:
-                try:
-                    raw = await resp.json()
-                    sha256_hash.update(await resp.read())
-                except (ValueError, aiohttp.ContentTypeError):
-                    raise ExternalImportError("Error importing bestiary: bad data. Are you sure the link is right?")
+        async with httpclient.client.get(f"{api_base}/{url}") as resp:
+            try:
+                raw = await resp.json()
+                sha256_hash.update(await resp.read())
+            except (ValueError, aiohttp.ContentTypeError):
+                raise ExternalImportError("Error importing bestiary: bad data. Are you sure the link is right?")
 
-                if raw.get("error", None):
-                    raise ExternalImportError(f"Error importing bestiary: {raw['error']}")
+            if raw.get("error", None):
+                raise ExternalImportError(f"Error importing bestiary: {raw['error']}")
 
-                creatures = raw["creatures"]
-                metadata = raw["metadata"]
-                name = metadata["name"]
-                desc = metadata["description"]
-                sha256_hash.update(name.encode() + desc.encode())
+            creatures = raw["creatures"]
+            metadata = raw["metadata"]
+            name = metadata["name"]
+            desc = metadata["description"]
+            sha256_hash.update(name.encode() + desc.encode())
 
         # try and find a bestiary by looking up upstream|hash
         # if it exists, return it
@@ -128,20 +144,19 @@ async def from_critterdb(cls, ctx, url, published=True):
         )
         sha256_hash = hashlib.sha256()
         sha256_hash.update(BESTIARY_SCHEMA_VERSION)
-        async with aiohttp.ClientSession() as session:
-            if published:
-                creatures = await get_published_bestiary_creatures(url, session, api_base, sha256_hash)
-            else:
-                creatures = await get_link_shared_bestiary_creatures(url, session, api_base, sha256_hash)
+        if published:
+            creatures = await get_published_bestiary_creatures(url, httpclient.client, api_base, sha256_hash)
+        else:
+            creatures = await get_link_shared_bestiary_creatures(url, httpclient.client, api_base, sha256_hash)
 
-            async with session.get(f"{api_base}/{url}") as resp:
-                try:
-                    raw = await resp.json()
-                except (ValueError, aiohttp.ContentTypeError):
-                    raise ExternalImportError("Error importing bestiary metadata. Are you sure the link is right?")
-                name = raw["name"]
-                desc = raw["description"]
-                sha256_hash.update(name.encode() + desc.encode())
+        async with httpclient.client.get(f"{api_base}/{url}") as resp:
+            try:
+                raw = await resp.json()
+            except (ValueError, aiohttp.ContentTypeError):
+                raise ExternalImportError("Error importing bestiary metadata. Are you sure the link is right?")
+            name = raw["name"]
+            desc = raw["description"]
+            sha256_hash.update(name.encode() + desc.encode())
 
         # try and find a bestiary by looking up upstream|hash
         # if it exists, return it
@@ -163,10 +178,20 @@ async def from_critterdb(cls, ctx, url, published=True):
 
     async def load_monsters(self, ctx):
         if not self._monsters:
-            bestiary = await ctx.bot.mdb.bestiaries.find_one({"_id": self.id}, projection=["monsters"])
-            self._monsters = [Monster.from_bestiary(m, self.name) for m in bestiary["monsters"]]
+            monsters = PARSED_MONSTER_CACHE.get((self.id, self.sha256))
+            if monsters is None:
+                bestiary = await ctx.bot.mdb.bestiaries.find_one({"_id": self.id}, projection=["monsters"])
+                monsters = tuple(Monster.from_bestiary(m, self.name) for m in bestiary["monsters"])
+                self._cache_monsters(monsters)
+            self._monsters = list(monsters)
         return self._monsters
 
+    def _cache_monsters(self, monsters):
+        try:
+            PARSED_MONSTER_CACHE[self.id, self.sha256] = monsters
+        except ValueError:  # this bestiary alone is larger than the cache
+            log.debug(f"Bestiary {self.id} is too large to cache ({len(monsters)} monsters)")
+
     @property
     def monsters(self):
         if self._monsters is None:
@@ -190,16 +215,46 @@ async def write_to_db(self, ctx):
 
         result = await ctx.bot.mdb.bestiaries.insert_one(data)
         self.id = result.inserted_id
+        self._cache_monsters(tuple(self._monsters))
 
     async def delete(self, ctx):
         await ctx.bot.mdb.bestiaries.delete_one({"_id": self.id})
         await self.remove_all_tracking(ctx)
+        PARSED_MONSTER_CACHE.pop((self.id, self.sha256), None)
+        BESTIARY_METADATA_CACHE.pop(self.id, None)
+        GUILD_ACTIVE_CACHE.clear()
 
     # ==== subscriber helpers ====
     @staticmethod
     def sub_coll(ctx):
         return ctx.bot.mdb.bestiary_subscriptions
 
+    @classmethod
+    async def active_id(cls, ctx):
+        active_id = USER_ACTIVE_CACHE.get(ctx.author.id, _CACHE_MISS)
+        if active_id is not _CACHE_MISS:
+            return active_id
+        active_id = await super().active_id(ctx)
+        USER_ACTIVE_CACHE[ctx.author.id] = active_id
+        return active_id
+
+    @classmethod
+    async def guild_active_ids(cls, ctx):
+        active_ids = GUILD_ACTIVE_CACHE.get(ctx.guild.id)
+        if active_ids is None:
+            uncached_ids = super().guild_active_ids(ctx)
+            active_ids = GUILD_ACTIVE_CACHE[ctx.guild.id] = tuple([oid async for oid in uncached_ids])
+        for oid in active_ids:
+            yield oid
+
+    async def set_active(self, ctx):
+        await super().set_active(ctx)
+        USER_ACTIVE_CACHE.pop(ctx.author.id, None)
+
+    async def unset_server_active(self, ctx):
+        await super().unset_server_active(ctx)
+        GUILD_ACTIVE_CACHE.pop(ctx.guild.id, None)
+
     async def set_server_active(self, ctx):
         """
         Sets the object as active for the contextual guild.
@@ -212,6 +267,7 @@ async def set_server_active(self, ctx):
             "provider_id": ctx.author.id,
         }
         await self.sub_coll(ctx).insert_one(sub_doc)
+        GUILD_ACTIVE_CACHE.pop(ctx.guild.id, None)
 
     async def unsubscribe(self, ctx):
         """The unsubscribe operation for bestiaries actually acts as a delete operation."""
@@ -222,6 +278,8 @@ async def unsubscribe(self, ctx):
         await self.sub_coll(ctx).delete_many(
             {"type": "server_active", "provider_id": ctx.author.id, "object_id": self.id}
         )
+        USER_ACTIVE_CACHE.pop(ctx.author.id, None)
+        GUILD_ACTIVE_CACHE.clear()
 
         # if no one is subscribed to this bestiary anymore, delete it.
         if not await self.num_subscribers(ctx):
@@ -261,6 +319,8 @@ async def add_server_subscriptions(self, ctx, serv_ids):
         ]
         if sub_docs:
             await ctx.bot.mdb.bestiary_subscriptions.insert_many(sub_docs)
+            for sub_doc in sub_docs:
+                GUILD_ACTIVE_CACHE.pop(sub_doc["subscriber_id"], None)
 
     @staticmethod
     async def num_user(ctx):
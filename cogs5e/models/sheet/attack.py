@@ -11,6 +11,20 @@ class Attack:
     Actually an automation script.
     """
 
+    __slots__ = (
+        "name",
+        "automation",
+        "verb",
+        "proper",
+        "criton",
+        "phrase",
+        "thumb",
+        "extra_crit_damage",
+        "activation_type",
+        "list_display_override",
+        "_run_automation_kwargs",
+    )
+
     def __init__(
         self,
         name: str,
@@ -154,7 +168,16 @@ def __str__(self):
 
     # ==== helpers ====
     # for custom behaviour defined by wrappers, passed to the automation context when run
-    __run_automation_kwargs__ = {}
+    @property
+    def __run_automation_kwargs__(self):
+        try:
+            return self._run_automation_kwargs
+        except AttributeError:
+            return {}
+
+    @__run_automation_kwargs__.setter
+    def __run_automation_kwargs__(self, value):
+        self._run_automation_kwargs = value
 
 
 class AttackList:
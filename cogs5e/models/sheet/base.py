@@ -3,6 +3,8 @@
 
 
 class BaseStats:
+    __slots__ = ("prof_bonus", "strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+
     def __init__(
         self,
         prof_bonus: int,
@@ -101,6 +103,8 @@ def __str__(self):
 
 
 class Skill:
+    __slots__ = ("value", "prof", "bonus", "adv")
+
     def __init__(self, value, prof: float = 0, bonus: int = 0, adv=None):
         # mod = value = base + (pb * prof) + bonus
         # adv = tribool (False, None, True) = (dis, normal, adv)
@@ -1,4 +1,5 @@
 import re
+import sys
 
 import d20
 
@@ -141,23 +142,18 @@ class Resistance:
     Note: transforms all damage types given to lowercase.
     """
 
+    __slots__ = ("dtype", "unless", "only")
+
     def __init__(self, dtype, unless=None, only=None):
         """
         :type dtype: str
         :type unless: set[str] or list[str]
         :type only: set[str] or list[str]
         """
-        if unless is None:
-            unless = set()
-        else:
-            unless = set(t.lower() for t in unless)
-        if only is None:
-            only = set()
-        else:
-            only = set(t.lower() for t in only)
-        self.dtype = dtype.lower()
-        self.unless = unless
-        self.only = only
+        # the same few damage types and conditions appear in thousands of statblocks, so share them
+        self.dtype = sys.intern(dtype.lower())
+        self.unless = _intern_tokens(unless)
+        self.only = _intern_tokens(only)
 
     @classmethod
     def from_dict(cls, d, smart=True):
@@ -239,6 +235,15 @@ def __eq__(self, other):
         return self.dtype == other.dtype and self.only == other.only and self.unless == other.unless
 
 
+_NO_TOKENS = frozenset()
+
+
+def _intern_tokens(tokens) -> frozenset[str]:
+    if not tokens:
+        return _NO_TOKENS
+    return frozenset(sys.intern(t.lower()) for t in tokens)
+
+
 def _resist_tokenize(res_str):
     """Extracts a list of tokens from a string (any consecutive chain of letters)."""
     return [m.group(0) for m in re.finditer(r"\w+", res_str)]
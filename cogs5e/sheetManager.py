@@ -436,15 +436,16 @@ async def character(self, ctx, *, name: str = None):
         await ctx.send(embed=embed, delete_after=DELETE_AFTER_SECONDS)
 
     async def get_character_by_name(self, ctx, name):
-        user_characters = await self.bot.mdb.characters.find({"owner": str(ctx.author.id)}).to_list(None)
+        user_characters = await Character.get_directory(self.bot.mdb, str(ctx.author.id))
         if not user_characters:
             return await ctx.send("You have no characters.")
 
         selected_char = await search_and_select(
-            ctx, user_characters, name, lambda e: e["name"], selectkey=lambda e: f"{e['name']} (`{e['upstream']}`)"
+            ctx, user_characters, name, lambda e: e.name, selectkey=lambda e: f"{e.name} (`{e.upstream}`)"
         )
 
-        return Character.deserialize_character_from_dict(str(ctx.author.id), selected_char)
+        # only load the selected character
+        return await Character.from_bot_and_ids(self.bot, str(ctx.author.id), selected_char.upstream)
 
     @character.group(name="server", invoke_without_command=True)
     @commands.guild_only()
@@ -633,12 +634,10 @@ async def character_list(self, ctx):
         Returns:
             None
         """
-        user_characters = await self.bot.mdb.characters.find(
-            {"owner": str(ctx.author.id)}, ["name", "upstream"]
-        ).to_list(None)
+        user_characters = await Character.get_directory(self.bot.mdb, str(ctx.author.id))
         if not user_characters:
             return await ctx.send("You have no characters.")
-        user_characters = {c["upstream"]: c["name"] for c in user_characters}
+        user_characters = {c.upstream: c.name for c in user_characters}
 
         try:
             char = await Character.from_ctx(ctx, use_global=True, use_guild=True, use_channel=True)
@@ -679,19 +678,17 @@ async def character_delete(self, ctx, *, name):
         Returns:
             None
         """
-        user_characters = await self.bot.mdb.characters.find(
-            {"owner": str(ctx.author.id)}, ["name", "upstream"]
-        ).to_list(None)
+        user_characters = await Character.get_directory(self.bot.mdb, str(ctx.author.id))
         if not user_characters:
             return await ctx.send("You have no characters.")
 
         selected_char = await search_and_select(
-            ctx, user_characters, name, lambda e: e["name"], selectkey=lambda e: f"{e['name']} (`{e['upstream']}`)"
+            ctx, user_characters, name, lambda e: e.name, selectkey=lambda e: f"{e.name} (`{e.upstream}`)"
         )
 
-        if await confirm(ctx, f"Are you sure you want to delete {selected_char['name']}? (Reply with yes/no)"):
-            await Character.delete(ctx, str(ctx.author.id), selected_char["upstream"])
-            return await ctx.send(f"{selected_char['name']} has been deleted.")
+        if await confirm(ctx, f"Are you sure you want to delete {selected_char.name}? (Reply with yes/no)"):
+            await Character.delete(ctx, str(ctx.author.id), selected_char.upstream)
+            return await ctx.send(f"{selected_char.name} has been deleted.")
         else:
             return await ctx.send("Ok, cancelling.")
 
@@ -769,8 +766,7 @@ async def transferchar(self, ctx, user: disnake.Member):
         character: Character = await ctx.get_character()
         overwrite = ""
 
-        conflict = await self.bot.mdb.characters.find_one({"owner": str(user.id), "upstream": character.upstream})
-        if conflict:
+        if await Character.exists(self.bot.mdb, str(user.id), character.upstream):
             overwrite = "**WARNING**: This will overwrite an existing character."
 
         await ctx.send(
@@ -831,8 +827,7 @@ async def csettings(self, ctx, *args):
     async def _confirm_overwrite(self, ctx, _id):
         """Prompts the user if command would overwrite another character.
         Returns True to overwrite, False or None otherwise."""
-        conflict = await self.bot.mdb.characters.find_one({"owner": str(ctx.author.id), "upstream": _id})
-        if conflict:
+        if await Character.exists(self.bot.mdb, str(ctx.author.id), _id):
             return await confirm(
                 ctx,
                 "Warning: This will overwrite a character with the same ID. Do you wish to continue "
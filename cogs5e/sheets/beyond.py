@@ -8,7 +8,6 @@
 import logging
 import re
 
-import aiohttp
 from markdownify import markdownify
 
 import gamedata
@@ -24,7 +23,7 @@
 from cogs5e.models.sheet.spellcasting import Spellbook, SpellbookSpell
 from cogs5e.sheets.abc import SHEET_VERSION, SheetLoaderABC
 from gamedata.compendium import compendium
-from utils import config, constants, enums
+from utils import config, constants, enums, httpclient
 from utils.enums import ActivationType
 from utils.functions import smart_trim
 
@@ -161,28 +160,27 @@ async def _get_character(self):
         if ddb_user is not None:
             headers = {"Authorization": f"Bearer {ddb_user.token}"}
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ENDPOINT}{char_id}", headers=headers) as resp:
-                log.debug(f"DDB returned {resp.status}")
-                if resp.status == 200:
-                    character = await resp.json()
-                elif resp.status == 403:
-                    if ddb_user is None:
-                        raise ExternalImportError(
-                            "This character is private. Link your D&D Beyond and Discord accounts to import it!"
-                        )
-                    else:
-                        raise ExternalImportError("You do not have permission to view this character.")
-                elif resp.status == 404:
+        async with httpclient.client.get(f"{ENDPOINT}{char_id}", headers=headers) as resp:
+            log.debug(f"DDB returned {resp.status}")
+            if resp.status == 200:
+                character = await resp.json()
+            elif resp.status == 403:
+                if ddb_user is None:
                     raise ExternalImportError(
-                        "This character does not exist, or you do not have access to it. Are you using the right link?"
-                    )
-                elif resp.status == 429:
-                    raise ExternalImportError(
-                        "Too many people are trying to import characters! Please try again in a few minutes."
+                        "This character is private. Link your D&D Beyond and Discord accounts to import it!"
                     )
                 else:
-                    raise ExternalImportError(f"Beyond returned an error: {resp.status} - {resp.reason}")
+                    raise ExternalImportError("You do not have permission to view this character.")
+            elif resp.status == 404:
+                raise ExternalImportError(
+                    "This character does not exist, or you do not have access to it. Are you using the right link?"
+                )
+            elif resp.status == 429:
+                raise ExternalImportError(
+                    "Too many people are trying to import characters! Please try again in a few minutes."
+                )
+            else:
+                raise ExternalImportError(f"Beyond returned an error: {resp.status} - {resp.reason}")
 
         character["_id"] = char_id
         self.character_data = character
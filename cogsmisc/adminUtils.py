@@ -5,6 +5,7 @@
 """
 
 import asyncio
+import collections
 import copy
 import io
 import itertools
@@ -22,16 +23,30 @@
 
 import cogs5e.models.sheet.action
 import utils.redisIO as redis
+from aliasing.helpers import (
+    GVAR_INVALIDATE_COMMAND,
+    UVAR_INVALIDATE_COMMAND,
+    invalidate_cached_gvar,
+    invalidate_cached_uvars,
+)
+from aliasing.namespace import NAMESPACE_INVALIDATE_COMMAND, invalidate_cached_namespace
 from cogs5e.models import embeds
+from cogs5e.models.character import BINDINGS_INVALIDATE_COMMAND, Character
 from cogs5e.utils import actionutils, targetutils
+from ddb.gamelog.link import CAMPAIGN_LINK_INVALIDATE_COMMAND, invalidate_cached_campaign_link
 from gamedata.compendium import compendium
 from utils import checks, config
 from utils.argparser import argparse
 from utils.functions import confirm, get_selection, search_and_select
+from utils.settings.guild import (
+    PREFIX_INVALIDATE_COMMAND,
+    SERVER_SETTINGS_INVALIDATE_COMMAND,
+    invalidate_server_settings,
+)
 
 log = logging.getLogger(__name__)
 
-COMMAND_PUBSUB_CHANNEL = f"admin-commands:{config.ENVIRONMENT}"  # >:c
+COMMAND_PUBSUB_CHANNEL = redis.COMMAND_PUBSUB_CHANNEL
 
 
 class AdminUtils(commands.Cog):
@@ -75,6 +90,14 @@ async def admin_pubsub(self):
             "restart_shard": self._restart_shard,
             "kill_cluster": self._kill_cluster,
             "set_dd_sample_rate": self._set_dd_sample_rate,
+            "flag_stats": self._flag_stats,
+            SERVER_SETTINGS_INVALIDATE_COMMAND: self._invalidate_server_settings,
+            PREFIX_INVALIDATE_COMMAND: self._invalidate_prefix,
+            UVAR_INVALIDATE_COMMAND: self._invalidate_uvars,
+            GVAR_INVALIDATE_COMMAND: self._invalidate_gvar,
+            CAMPAIGN_LINK_INVALIDATE_COMMAND: self._invalidate_campaign_link,
+            BINDINGS_INVALIDATE_COMMAND: self._invalidate_character_bindings,
+            NAMESPACE_INVALIDATE_COMMAND: self._invalidate_alias_namespace,
         }
         while True:  # if we ever disconnect from pubsub, wait 5s and try reinitializing
             try:  # connect to the pubsub channel
@@ -285,6 +308,21 @@ async def admin_dd_sample_rate(self, ctx, sample_rate: float):
         resp = await self.pscall("set_dd_sample_rate", kwargs={"sample_rate": sample_rate})
         await self._send_replies(ctx, resp)
 
+    @admin.command(hidden=True, name="flag-stats")
+    @checks.is_owner()
+    async def admin_flag_stats(self, ctx):
+        """Shows how feature flag evaluations were done across all clusters since they started."""
+        resp = await self.pscall("flag_stats")
+        totals = collections.defaultdict(collections.Counter)
+        for stats in resp.values():
+            for key, counts in stats.items():
+                totals[key].update(counts)
+        out = "\n".join(
+            f"`{key}`: {counts['memo']} memoized, {counts['sync']} in memory, {counts['executor']} in a thread"
+            for key, counts in sorted(totals.items())
+        )
+        await ctx.send(out or "No feature flags have been evaluated.")
+
     # ---- entity management ----
     @admin.command(hidden=True, name="reload_static")
     @checks.user_permissions("content-admin")
@@ -496,6 +534,9 @@ async def _whois(self, user_id):
     async def _ping(self):
         return dict(self.bot.latencies)
 
+    async def _flag_stats(self):
+        return self.bot.ldclient.flag_stats()
+
     async def _set_dd_sample_rate(self, sample_rate: float):
         if config.DD_SERVICE is None:
             return "no DD_SERVICE set, this process is not sampling"
@@ -521,6 +562,34 @@ async def _kill_cluster(self, cluster_id: int):
         os.kill(os.getpid(), signal.SIGTERM)  # please shut down gracefully
         return "Shutting down..."
 
+    async def _invalidate_server_settings(self, guild_id: int):
+        invalidate_server_settings(guild_id)
+        return False  # no reply
+
+    async def _invalidate_prefix(self, guild_id: str):
+        self.bot.invalidate_guild_prefix(guild_id)
+        return False  # no reply
+
+    async def _invalidate_uvars(self, owner: str):
+        invalidate_cached_uvars(owner)
+        return False  # no reply
+
+    async def _invalidate_gvar(self, address: str):
+        invalidate_cached_gvar(address)
+        return False  # no reply
+
+    async def _invalidate_campaign_link(self, campaign_id: str):
+        invalidate_cached_campaign_link(campaign_id)
+        return False  # no reply
+
+    async def _invalidate_character_bindings(self, owner_id: str):
+        Character.invalidate_cached_bindings(owner_id)
+        return False  # no reply
+
+    async def _invalidate_alias_namespace(self, personal_cls_name: str, owner: str):
+        invalidate_cached_namespace(personal_cls_name, owner)
+        return False  # no reply
+
     # ==== pubsub ====
     async def pscall(self, command, args=None, kwargs=None, *, expected_replies=config.NUM_CLUSTERS or 1, timeout=30):
         """Makes an IPC call to all clusters. Returns a dict of {cluster_id: reply_data}."""
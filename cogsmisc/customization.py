@@ -244,7 +244,7 @@ async def create_or_view(self, *args, **kwargs):
             await self.before_edit_check(ctx, name)
 
         obj = self.personal_cls.new(name, code, self.owner_from_ctx(ctx))
-        await obj.commit(ctx.bot.mdb)
+        await obj.commit(ctx.bot.mdb, ctx.bot.rdb)
 
         out = (
             f"{self.obj_name.capitalize()} `{name}` added.```py\n{ctx.prefix}{self.obj_copy_command} {name} {code}\n```"
@@ -343,7 +343,7 @@ async def delete(self, ctx, name):
                 "can unsubscribe on the Avrae Dashboard at <https://avrae.io/dashboard/workshop/my-subscriptions> "
                 f"or by using `{ctx.prefix}{self.name} unsubscribe <collection name>`."
             )
-        await obj.delete(ctx.bot.mdb)
+        await obj.delete(ctx.bot.mdb, ctx.bot.rdb)
         await ctx.send(f"{self.obj_name.capitalize()} {name} removed.")
 
     async def subscribe(self, ctx, url):
@@ -486,7 +486,7 @@ async def rename(self, ctx, old_name, new_name):
         if isinstance(old_obj, self.personal_cls):
             if await self.personal_cls.get_named(new_name, ctx):
                 return await ctx.send(f"You already have a {self.obj_name} named {new_name}.")
-            await old_obj.rename(ctx.bot.mdb, new_name)
+            await old_obj.rename(ctx.bot.mdb, new_name, ctx.bot.rdb)
             return await ctx.send(f"Okay, renamed the {self.obj_name} {old_name} to {new_name}.")
         else:  # old_obj is actually a subscription doc
             sub_doc = old_obj
@@ -557,7 +557,7 @@ async def serve(self, ctx, name):
         ):
             return await ctx.send("Ok, aborting.")
 
-        await server_obj.commit(ctx.bot.mdb)
+        await server_obj.commit(ctx.bot.mdb, ctx.bot.rdb)
         out = (
             f"Server {self.obj_name} `{server_obj.name}` added."
             f"```py\n{ctx.prefix}{self.obj_copy_command} {server_obj.name} {server_obj.code}\n```"
@@ -665,7 +665,6 @@ async def prefix(self, ctx, prefix: str = None):
 
         Forgot the prefix? Reset it with "@Avrae#6944 prefix !".
         """
-        guild_id = str(ctx.guild.id)
         if prefix is None:
             current_prefix = await self.bot.get_guild_prefix(ctx.guild)
             return await ctx.send(
@@ -696,11 +695,7 @@ async def prefix(self, ctx, prefix: str = None):
             ):
                 return await ctx.send("Ok, cancelling.")
 
-        # insert into cache
-        self.bot.prefixes[guild_id] = prefix
-
-        # update db
-        await self.bot.mdb.prefixes.update_one({"guild_id": guild_id}, {"$set": {"prefix": prefix}}, upsert=True)
+        await self.bot.set_guild_prefix(ctx.guild, prefix)
 
         await ctx.send(f"Prefix set to `{prefix}` for this server. Use commands like `{prefix}roll` now!")
 
@@ -978,6 +973,7 @@ async def uvar_remove(self, ctx, name):
         result = await self.bot.mdb.uvars.delete_one({"owner": str(ctx.author.id), "name": name})
         if not result.deleted_count:
             return await ctx.send("Uvar does not exist.")
+        await helpers.invalidate_uvars(ctx)
         await ctx.send("User variable {} removed.".format(name))
 
     @uservar.command(name="list")
@@ -1001,6 +997,7 @@ async def uvar_deleteall(self, ctx):
             return await ctx.send("Unconfirmed. Aborting.")
 
         await self.bot.mdb.uvars.delete_many({"owner": str(ctx.author.id)})
+        await helpers.invalidate_uvars(ctx)
         return await ctx.send("OK. I have deleted all your uvars.")
 
     @commands.group(invoke_without_command=True, aliases=["svar"])
@@ -1139,6 +1136,7 @@ async def gvar_remove(self, ctx, name):
         else:
             if await confirm(ctx, f"Are you sure you want to delete `{name}`? (Reply with yes/no)"):
                 await self.bot.mdb.gvars.delete_one({"key": name})
+                await helpers.invalidate_gvar(ctx, name)
             else:
                 return await ctx.send("Ok, cancelling.")
 
@@ -7,10 +7,9 @@
 import asyncio
 import logging
 
-import aiohttp
 from disnake.ext import commands
 
-from utils import config
+from utils import config, httpclient
 from cogsmisc.stats import Stats
 
 log = logging.getLogger(__name__)
@@ -32,13 +31,13 @@ async def update_server_count(self):
         if config.TESTING is not None or config.DBL_TOKEN is None:
             return
         payload = {"server_count": await Stats.get_guild_count(self.bot)}
-        async with aiohttp.ClientSession() as aioclient:
-            try:
-                await aioclient.post(
-                    f"{DBL_API}{self.bot.user.id}/stats", data=payload, headers={"Authorization": config.DBL_TOKEN}
-                )
-            except Exception as e:
-                log.error(f"Error posting server count: {e}")
+        try:
+            async with httpclient.client.post(
+                f"{DBL_API}{self.bot.user.id}/stats", data=payload, headers={"Authorization": config.DBL_TOKEN}
+            ):
+                pass
+        except Exception as e:
+            log.error(f"Error posting server count: {e}")
 
     async def background_update(self):
         try:
@@ -6,14 +6,113 @@
 
 import asyncio
 import datetime
+import logging
 import time
 from collections import Counter
 
 from disnake.ext import commands
+from pymongo import UpdateOne
 
 from utils import config
 
 GUILD_RDB_KEY = "stats.cluster_guilds"
+# command analytics are buffered in memory and written in batches every ANALYTICS_FLUSH_INTERVAL seconds
+ANALYTICS_FLUSH_INTERVAL = 10
+# the most command events to hold between flushes; further events are dropped (but still counted)
+MAX_PENDING_COMMAND_EVENTS = 10_000
+
+log = logging.getLogger(__name__)
+
+
+class CommandAnalyticsBuffer:
+    """
+    Coalesces per-user, per-guild, and per-command activity counters and command events in memory, so they can be
+    written in a handful of batched writes rather than several writes per command.
+    """
+
+    def __init__(self, mdb):
+        self.mdb = mdb
+        self._reset()
+        self.dropped_events = 0
+
+    def _reset(self):
+        # key -> [count, last time]
+        self.user_activity: dict[int, list] = {}
+        self.guild_activity: dict[int, list] = {}
+        self.command_activity: dict[str, list] = {}
+        self.command_events: list[dict] = []
+
+    @staticmethod
+    def _inc(activity, key, timestamp):
+        if key in activity:
+            activity[key][0] += 1
+            activity[key][1] = timestamp
+        else:
+            activity[key] = [1, timestamp]
+
+    def record_command(self, ctx):
+        timestamp = datetime.datetime.utcnow()
+        guild_id = 0 if ctx.guild is None else ctx.guild.id
+        command_name = ctx.command.qualified_name
+        self._inc(self.user_activity, ctx.author.id, timestamp)
+        self._inc(self.guild_activity, guild_id, timestamp)
+        self._inc(self.command_activity, command_name, timestamp)
+        if len(self.command_events) >= MAX_PENDING_COMMAND_EVENTS:
+            self.dropped_events += 1
+            return
+        self.command_events.append({
+            "timestamp": timestamp,
+            "command_name": command_name,
+            "user_id": ctx.author.id,
+            "guild_id": guild_id,
+        })
+
+    async def flush(self):
+        """Writes all buffered analytics to the database."""
+        user_activity = self.user_activity
+        guild_activity = self.guild_activity
+        command_activity = self.command_activity
+        command_events = self.command_events
+        self._reset()
+
+        if self.dropped_events:
+            log.warning(f"Dropped {self.dropped_events} command analytics events since the last flush")
+            self.dropped_events = 0
+        if not command_activity:
+            return
+
+        writes = [
+            self.mdb.analytics_user_activity.bulk_write(
+                self._activity_updates("user_id", user_activity, "commands_called", "last_command_time"),
+                ordered=False,
+            ),
+            self.mdb.analytics_guild_activity.bulk_write(
+                self._activity_updates("guild_id", guild_activity, "commands_called", "last_command_time"),
+                ordered=False,
+            ),
+            self.mdb.analytics_command_activity.bulk_write(
+                self._activity_updates("name", command_activity, "num_invocations", "last_invoked_time"),
+                ordered=False,
+            ),
+            self.mdb.random_stats.update_one(
+                {"key": "commands_used_life"},
+                {"$inc": {"value": sum(count for count, _ in command_activity.values())}},
+                upsert=True,
+            ),
+        ]
+        if command_events:
+            writes.append(self.mdb.analytics_command_events.insert_many(command_events, ordered=False))
+
+        for result in await asyncio.gather(*writes, return_exceptions=True):
+            if isinstance(result, Exception):
+                log.warning(f"Failed to write command analytics: {result!r}")
+
+    @staticmethod
+    def _activity_updates(key_field, activity, count_field, time_field):
+        return [
+            UpdateOne({key_field: key}, {"$inc": {count_field: count}, "$max": {time_field: last_time}}, upsert=True)
+            for key, (count, last_time) in activity.items()
+        ]
 
 
 class Stats(commands.Cog):
@@ -26,17 +125,21 @@ def __init__(self, bot):
         self.bot = bot
         self.start_time = time.monotonic()
         self.command_stats = Counter()
+        self.analytics = CommandAnalyticsBuffer(bot.mdb)
+        self._analytics_flush_task = self.bot.loop.create_task(self.flush_analytics_loop())
         if config.ENVIRONMENT != "development":  # do not run in tests
             self.bot.loop.create_task(self.scheduled_update())
 
+    def cog_unload(self):
+        self._analytics_flush_task.cancel()
+        self.bot.loop.create_task(self.analytics.flush())
+
     # ===== listeners =====
     @commands.Cog.listener()
     async def on_command(self, ctx):
         command = ctx.command.qualified_name
         self.command_stats[command] += 1
-        await self.user_activity(ctx)
-        await self.guild_activity(ctx)
-        await self.command_activity(ctx)
+        self.analytics.record_command(ctx)
 
     # ===== tasks =====
     async def scheduled_update(self):
@@ -49,6 +152,14 @@ async def scheduled_update(self):
             await self.publish_shared_statistics()
             await asyncio.sleep(60 * 60)  # every hour
 
+    async def flush_analytics_loop(self):
+        while not self.bot.is_closed():
+            await asyncio.sleep(ANALYTICS_FLUSH_INTERVAL)
+            try:
+                await self.analytics.flush()
+            except Exception as e:
+                log.exception(f"Error flushing command analytics: {e!r}")
+
     # ===== internal stat sharing =====
     async def clean_published_stats(self):
         cluster_servers = await self.bot.rdb.get_whole_dict(GUILD_RDB_KEY)
@@ -61,41 +172,10 @@ async def publish_shared_statistics(self):
         await self.bot.rdb.hset(GUILD_RDB_KEY, str(self.bot.cluster_id), cluster_servers)
 
     # ===== analytic loggers =====
-    async def user_activity(self, ctx):
-        await self.bot.mdb.analytics_user_activity.update_one(
-            {"user_id": ctx.author.id},
-            {"$inc": {"commands_called": 1}, "$currentDate": {"last_command_time": True}},
-            upsert=True,
-        )
-
-    async def guild_activity(self, ctx):
-        if ctx.guild is None:
-            guild_id = 0
-        else:
-            guild_id = ctx.guild.id
-
-        await self.bot.mdb.analytics_guild_activity.update_one(
-            {"guild_id": guild_id},
-            {"$inc": {"commands_called": 1}, "$currentDate": {"last_command_time": True}},
-            upsert=True,
-        )
-
-    async def command_activity(self, ctx):
-        await self.increase_stat(ctx, "commands_used_life")
-        # log command lifetime stat
-        await self.bot.mdb.analytics_command_activity.update_one(
-            {"name": ctx.command.qualified_name},
-            {"$inc": {"num_invocations": 1}, "$currentDate": {"last_invoked_time": True}},  # yay, atomic operations
-            upsert=True,
-        )
-        # log event
-        guild_id = 0 if ctx.guild is None else ctx.guild.id
-        await self.bot.mdb.analytics_command_events.insert_one({
-            "timestamp": datetime.datetime.utcnow(),
-            "command_name": ctx.command.qualified_name,
-            "user_id": ctx.author.id,
-            "guild_id": guild_id,
-        })
+    async def flush_analytics(self):
+        """Writes any buffered command analytics to the database (e.g. before shutting down)."""
+        self._analytics_flush_task.cancel()
+        await self.analytics.flush()
 
     async def update_hourly(self):
         class _ContextProxy:
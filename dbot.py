@@ -18,6 +18,7 @@
 
 
 from redis import asyncio as redis
+import cachetools
 import d20
 import disnake
 import motor.motor_asyncio
@@ -36,10 +37,11 @@
 from ddb.gamelog import GameLogClient
 from gamedata.compendium import compendium
 from gamedata.lookuputils import handle_required_license
-from utils import clustering, config, context
+from utils import clustering, config, context, httpclient, img
 from utils.feature_flags import AsyncLaunchDarklyClient
 from utils.help import help_command
 from utils.redisIO import RedisIO
+from utils.settings.guild import PREFIX_INVALIDATE_COMMAND
 
 # Confluent Kafka client
 from confluent_client.producer import KafkaProducer
@@ -70,6 +72,10 @@
     "cogsmisc.tutorials",
 )
 
+# guild prefixes are invalidated over pubsub when changed, so they do not expire - but evict the least recently used
+PREFIX_CACHE_SIZE = 100_000
+PREFIX_WARMUP_BATCH_SIZE = 1000
+
 
 async def get_prefix(the_bot, message):
     if not message.guild:
@@ -105,7 +111,9 @@ def __init__(self, prefix, description=None, **options):
         self.rdb = self.loop.run_until_complete(self.setup_rdb())
 
         # misc caches
-        self.prefixes = dict()
+        self.prefixes = cachetools.LRUCache(maxsize=PREFIX_CACHE_SIZE)
+        # incremented on every prefix change, so a load that raced with a change is not cached
+        self._prefix_generation = 0
         self.muted = set()
         self.cluster_id = 0
 
@@ -133,14 +141,44 @@ async def get_guild_prefix(self, guild: disnake.Guild) -> str:
         if guild_id in self.prefixes:
             return self.prefixes.get(guild_id, config.DEFAULT_PREFIX)
         # load from db and cache
+        generation = self._prefix_generation
         gp_obj = await self.mdb.prefixes.find_one({"guild_id": guild_id})
         if gp_obj is None:
             gp = config.DEFAULT_PREFIX
         else:
             gp = gp_obj.get("prefix", config.DEFAULT_PREFIX)
-        self.prefixes[guild_id] = gp
+        if generation == self._prefix_generation:
+            self.prefixes[guild_id] = gp
         return gp
 
+    async def set_guild_prefix(self, guild: disnake.Guild, prefix: str):
+        """Sets a guild's prefix, and tells every cluster to drop its cached prefix for the guild."""
+        guild_id = str(guild.id)
+        self._prefix_generation += 1
+        self.prefixes[guild_id] = prefix
+        await self.mdb.prefixes.update_one({"guild_id": guild_id}, {"$set": {"prefix": prefix}}, upsert=True)
+        await self.rdb.publish_command(PREFIX_INVALIDATE_COMMAND, guild_id)
+
+    def invalidate_guild_prefix(self, guild_id: str):
+        self._prefix_generation += 1
+        self.prefixes.pop(guild_id, None)
+
+    async def warm_prefix_cache(self):
+        """Loads the prefixes of the guilds this cluster is in that are not cached yet, in batches."""
+        to_load = [str(guild.id) for guild in self.guilds if str(guild.id) not in self.prefixes]
+        # don't evict prefixes we just loaded
+        to_load = to_load[: max(PREFIX_CACHE_SIZE - len(self.prefixes), 0)]
+        for i in range(0, len(to_load), PREFIX_WARMUP_BATCH_SIZE):
+            batch = to_load[i : i + PREFIX_WARMUP_BATCH_SIZE]
+            generation = self._prefix_generation
+            prefixes = dict.fromkeys(batch, config.DEFAULT_PREFIX)
+            async for gp_obj in self.mdb.prefixes.find({"guild_id": {"$in": batch}}, projection={"_id": False}):
+                prefixes[gp_obj["guild_id"]] = gp_obj.get("prefix", config.DEFAULT_PREFIX)
+            # if a prefix changed while the batch was loading, it might be stale; those guilds load on demand instead
+            if generation == self._prefix_generation:
+                self.prefixes.update(prefixes)
+        log.info(f"Loaded {len(to_load)} guild prefixes")
+
     @property
     def is_cluster_0(self):
         if self.cluster_id is None:  # we're not running in clustered mode anyway
@@ -208,10 +246,14 @@ async def close(self):
         #
         # These are caused by aioredis streams being GC'ed when discord.py cancels the tasks that create them
         # (because of course d.py decides it wants to cancel *all* tasks on its loop...)
+        if (stats := self.get_cog("Stats")) is not None:
+            await stats.flush_analytics()
         await super().close()
         await self.ddb.close()
         await self.rdb.close()
         await self.glclient.close()
+        await httpclient.client.close()
+        img.shutdown_render_pool()
         self.mclient.close()
         self.ldclient.close()
 
@@ -259,6 +301,7 @@ async def on_ready():
     log.info(bot.user.name)
     log.info(bot.user.id)
     log.info("------")
+    await bot.warm_prefix_cache()
 
 
 @bot.listen("on_command_error")
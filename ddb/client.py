@@ -23,7 +23,11 @@
 USER_ENTITLEMENT_TTL = 1 * 60
 ENTITY_ENTITLEMENT_TTL = 15 * 60
 USER_ENTITLEMENT_CACHE = cachetools.TTLCache(128, USER_ENTITLEMENT_TTL)
+# entity type -> EntityLicenseIndex
 ENTITY_ENTITLEMENT_CACHE = cachetools.TTLCache(64, ENTITY_ENTITLEMENT_TTL)
+# (entity type, user's licenses) -> (EntityLicenseIndex, accessible entity ids)
+# many users share the same set of licenses, so this is keyed by the licenses rather than the user
+ACCESSIBLE_ENTITY_CACHE = cachetools.LRUCache(1024)
 USER_ENTITLEMENTS_NONE_SENTINEL = object()
 
 log = logging.getLogger(__name__)
@@ -77,29 +81,32 @@ async def get_accessible_entities(self, ctx, user_id, entity_type):
         :type ctx: disnake.ext.commands.Context
         :type user_id: int
         :type entity_type: str
-        :rtype: set[int] or None
+        :rtype: frozenset[int] or None
         """
         log.debug(f"Getting DDB entitlements for Discord ID {user_id}")
         user_e10s = await self._get_user_entitlements(ctx, user_id)
         if user_e10s is None:
             return None
 
-        entity_e10s = await self._get_entity_entitlements(ctx, entity_type)
+        entity_index = await self._get_entity_license_index(ctx, entity_type)
+        user_licenses = user_e10s.licenses
+
+        # the result only depends on the licenses, so reuse it as long as the index is current
+        cache_key = (entity_type, user_licenses)
+        cached = ACCESSIBLE_ENTITY_CACHE.get(cache_key)
+        if cached is not None and cached[0] is entity_index:
+            return cached[1]
 
         # calculate visible entities
-        accessible = set()
-        user_licenses = user_e10s.licenses
-        for entity in entity_e10s:
-            if entity.is_free or user_licenses & entity.license_ids:
-                accessible.add(entity.entity_id)
+        accessible = entity_index.accessible_ids(user_licenses)
 
         # source 14 is TftYP, and 16-22 are the modules within.
         # DDB only gives entitlements for the modules
-        if entity_type == "source" and {16, 17, 18, 19, 20, 21, 22}.issubset(user_licenses):
-            accessible.add(14)
-
-        log.debug(f"Discord user {user_id} can see {entity_type}s {accessible}")
+        if entity_type == "source" and user_licenses.issuperset({16, 17, 18, 19, 20, 21, 22}):
+            accessible = accessible | {14}
 
+        log.debug(f"Discord user {user_id} can see {len(accessible)} {entity_type}s")
+        ACCESSIBLE_ENTITY_CACHE[cache_key] = (entity_index, accessible)
         return accessible
 
     async def get_ddb_user(self, ctx, user_id=None):
@@ -167,7 +174,9 @@ async def _get_user_entitlements(self, ctx, user_id):
         l2_user_entitlements = await ctx.bot.rdb.jget(user_entitlement_cache_key)
         if l2_user_entitlements is not None:
             log.debug("found user entitlements in l2 (redis) cache")
-            return entitlements.UserEntitlements.from_dict(l2_user_entitlements)
+            user_e10s = entitlements.UserEntitlements.from_dict(l2_user_entitlements)
+            USER_ENTITLEMENT_CACHE[user_id] = user_e10s
+            return user_e10s
 
         # fetch from ddb
         user = await self.get_ddb_user(ctx, user_id)
@@ -182,36 +191,41 @@ async def _get_user_entitlements(self, ctx, user_id):
         await ctx.bot.rdb.jsetex(user_entitlement_cache_key, user_e10s.to_dict(), USER_ENTITLEMENT_TTL)
         return user_e10s
 
-    async def _get_entity_entitlements(self, ctx, entity_type):
+    async def _get_entity_license_index(self, ctx, entity_type):
         """
-        Gets the latest entity entitlements, from cache or by communicating with DDB.
+        Gets the license index of the latest entity entitlements, from cache or by communicating with DDB.
 
         :type ctx: disnake.ext.commands.Context
         :type entity_type: str
-        :rtype: list[ddb.entitlements.EntityEntitlements]
+        :rtype: ddb.entitlements.EntityLicenseIndex
         """
         # L1: Memory
-        l1_entity_entitlements = ENTITY_ENTITLEMENT_CACHE.get(entity_type)
-        if l1_entity_entitlements is not None:
+        l1_entity_index = ENTITY_ENTITLEMENT_CACHE.get(entity_type)
+        if l1_entity_index is not None:
             log.debug("found entity entitlements in l1 (memory) cache")
-            return l1_entity_entitlements
+            return l1_entity_index
 
         # L2: Redis
         entity_entitlement_cache_key = f"entitlements.entity.{entity_type}"
         l2_entity_entitlements = await ctx.bot.rdb.jget(entity_entitlement_cache_key)
         if l2_entity_entitlements is not None:
             log.debug("found entity entitlements in l2 (redis) cache")
-            return [entitlements.EntityEntitlements.from_dict(e) for e in l2_entity_entitlements]
+            entity_index = entitlements.EntityLicenseIndex(
+                [entitlements.EntityEntitlements.from_dict(e) for e in l2_entity_entitlements]
+            )
+            ENTITY_ENTITLEMENT_CACHE[entity_type] = entity_index
+            return entity_index
 
         # fetch from DDB
         entity_e10s = await self._fetch_entities(entity_type)
 
         # cache entitlements
-        ENTITY_ENTITLEMENT_CACHE[entity_type] = entity_e10s
+        entity_index = entitlements.EntityLicenseIndex(entity_e10s)
+        ENTITY_ENTITLEMENT_CACHE[entity_type] = entity_index
         await ctx.bot.rdb.jsetex(
             entity_entitlement_cache_key, [e.to_dict() for e in entity_e10s], ENTITY_ENTITLEMENT_TTL
         )
-        return entity_e10s
+        return entity_index
 
     # ---- low-level auth ----
     async def _fetch_token(self, claim: str):
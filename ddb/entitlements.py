@@ -1,5 +1,5 @@
 class UserEntitlements:
-    __slots__ = ("acquired_license_ids", "shared_licenses")
+    __slots__ = ("acquired_license_ids", "shared_licenses", "_licenses")
 
     def __init__(self, acquired_license_ids, shared_licenses):
         """
@@ -8,6 +8,7 @@ def __init__(self, acquired_license_ids, shared_licenses):
         """
         self.acquired_license_ids = acquired_license_ids
         self.shared_licenses = shared_licenses
+        self._licenses = None
 
     @classmethod
     def from_dict(cls, d):
@@ -23,9 +24,13 @@ def to_dict(self):
     def licenses(self):
         """
         The set of all license IDs the user has access to.
-        :rtype: set[int]
+        :rtype: frozenset[int]
         """
-        return set(self.acquired_license_ids).union(*(sl.license_ids for sl in self.shared_licenses))
+        if self._licenses is None:
+            self._licenses = frozenset(self.acquired_license_ids).union(
+                *(sl.license_ids for sl in self.shared_licenses)
+            )
+        return self._licenses
 
 
 class SharedLicense:
@@ -73,3 +78,37 @@ def to_dict(self):
             "isFree": self.is_free,
             "licenseIDs": list(self.license_ids),
         }
+
+
+class EntityLicenseIndex:
+    """
+    An inverted index of the entitlements of every entity of a type, mapping each license ID to the IDs of the
+    entities it grants access to, so that the entities a user can access can be computed from the user's licenses
+    alone.
+    """
+
+    __slots__ = ("entitlements", "free_ids", "ids_by_license")
+
+    def __init__(self, entitlements):
+        """
+        :type entitlements: list[EntityEntitlements]
+        """
+        self.entitlements = entitlements
+        free_ids = set()
+        ids_by_license = {}
+        for entity in entitlements:
+            if entity.is_free:
+                free_ids.add(entity.entity_id)
+            for license_id in entity.license_ids:
+                ids_by_license.setdefault(license_id, set()).add(entity.entity_id)
+        self.free_ids = frozenset(free_ids)
+        self.ids_by_license = {license_id: frozenset(ids) for license_id, ids in ids_by_license.items()}
+
+    def accessible_ids(self, licenses):
+        """
+        Returns the IDs of the entities that are free or granted by any of the given licenses.
+
+        :type licenses: frozenset[int]
+        :rtype: frozenset[int]
+        """
+        return self.free_ids.union(*(self.ids_by_license[l] for l in licenses if l in self.ids_by_license))
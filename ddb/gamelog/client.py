@@ -8,13 +8,13 @@
 
 import ddb
 from ddb.baseclient import BaseClient
-from ddb.gamelog.constants import AVRAE_EVENT_SOURCE, GAME_LOG_PUBSUB_CHANNEL
+from ddb.gamelog.constants import AVRAE_EVENT_SOURCE, GAME_LOG_PUBSUB_CHANNEL, GAME_LOG_SHARD_PUBSUB_CHANNEL
 from ddb.gamelog.context import GameLogEventContext
 from ddb.gamelog.errors import CampaignAlreadyLinked, CampaignLinkException, IgnoreEvent, LinkNotAllowed, NoCampaignLink
 from ddb.gamelog.event import GameLogEvent
-from ddb.gamelog.link import CampaignLink
+from ddb.gamelog.link import CampaignLink, invalidate_campaign_link
 from ddb.utils import ddb_id_to_discord_id
-from utils.config import DDB_GAMELOG_ENDPOINT
+from utils.config import DDB_GAMELOG_ENDPOINT, DDB_GAMELOG_ROUTING
 
 log = logging.getLogger(__name__)
 
@@ -76,6 +76,7 @@ async def create_campaign_link(self, ctx, campaign_id: str, overwrite=False):
                 await self.bot.mdb.gamelog_campaigns.replace_one({"campaign_id": campaign_id}, link.to_dict())
             else:
                 raise CampaignAlreadyLinked()
+        await invalidate_campaign_link(campaign_id, self.rdb)
         return link
 
     # ==== http ====
@@ -98,9 +99,21 @@ async def post_message(self, ddb_user, message):
 
     # ==== game log event loop ====
     async def main_loop(self):
+        if DDB_GAMELOG_ROUTING == "broadcast":
+            await self._listen([GAME_LOG_PUBSUB_CHANNEL], self._recv)
+            return
+
+        # events are routed to the channels of the shards their guilds are on, which are known once we are ready
+        await self.bot.wait_until_ready()
+        listeners = [self._listen([self._shard_channel(shard_id) for shard_id in self._shard_ids()], self._recv)]
+        if DDB_GAMELOG_ROUTING == "router" and self.bot.is_cluster_0:
+            listeners.append(self._listen([GAME_LOG_PUBSUB_CHANNEL], self._route))
+        await asyncio.gather(*listeners)
+
+    async def _listen(self, channels, handler):
         while True:  # if we ever disconnect from pubsub, wait 5s and try reinitializing
-            try:  # connect to the pubsub channel
-                channel = await self.rdb.subscribe(GAME_LOG_PUBSUB_CHANNEL)
+            try:  # connect to the pubsub channels
+                channel = await self.rdb.subscribe(*channels)
             except Exception as e:
                 log.warning(f"Could not connect to pubsub! Waiting to reconnect...[{e}]")
                 await asyncio.sleep(5)
@@ -112,7 +125,7 @@ async def main_loop(self):
                     try:
                         if msg["type"] == "subscribe":
                             continue
-                        await self._recv(msg["data"])
+                        await handler(msg["data"])
                     except Exception as e:
                         log.error(str(e))
                 log.warning("Disconnected from Redis pubsub! Waiting to reconnect...")
@@ -121,19 +134,54 @@ async def main_loop(self):
                 log.exception(e)
                 continue
 
-    async def _recv(self, msg):
-        log.debug(f"Received message: {msg}")
-        # deserialize message into event
+    # ---- per-shard routing ----
+    @staticmethod
+    def _shard_channel(shard_id: int):
+        return GAME_LOG_SHARD_PUBSUB_CHANNEL.format(shard_id=shard_id)
+
+    def _shard_ids(self):
+        """Returns the IDs of the shards this cluster runs."""
+        if self.bot.shard_ids is not None:
+            return self.bot.shard_ids
+        return range(self.bot.shard_count or 1)
+
+    def _shard_id(self, guild_id: int):
+        """Returns the ID of the shard the guild is on."""
+        return (guild_id >> 22) % (self.bot.shard_count or 1)
+
+    async def _route(self, msg):
+        """Forwards an event to the channel of the shard its campaign's guild is on."""
         event = GameLogEvent.from_gamelog_message(msg)
+        if not self._is_handled(event):
+            return
 
+        try:
+            campaign = await CampaignLink.from_id(self.bot.mdb, event.game_id)
+        except NoCampaignLink:
+            log.debug(f"Campaign {event.game_id} is not linked to Discord - ignoring")
+            return
+
+        await self.rdb.publish(self._shard_channel(self._shard_id(campaign.guild_id)), msg)
+
+    # ---- handling ----
+    def _is_handled(self, event):
+        """Returns whether the event is one we should handle."""
         # check: is this event from us (ignore it)?
         if event.source == AVRAE_EVENT_SOURCE:
             log.debug(f"Event ID {event.id!r} is from avrae - ignoring")
-            return
+            return False
 
         # check: do we have a callback for this event?
         if event.event_type not in self._event_handlers:
             log.debug(f"No callback registered for event {event.event_type!r} - discarding event")
+            return False
+        return True
+
+    async def _recv(self, msg):
+        log.debug(f"Received message: {msg}")
+        # deserialize message into event
+        event = GameLogEvent.from_gamelog_message(msg)
+        if not self._is_handled(event):
             return
 
         # check: is this campaign linked to a channel?
@@ -1,2 +1,4 @@
 GAME_LOG_PUBSUB_CHANNEL = "game-log"
+# events for guilds on a given shard, when game log events are routed per shard
+GAME_LOG_SHARD_PUBSUB_CHANNEL = "game-log:shard:{shard_id}"
 AVRAE_EVENT_SOURCE = "avrae"
@@ -1,5 +1,16 @@
+import cachetools
+
 from ddb.gamelog import errors
 
+# links are invalidated over pubsub when they change; the TTL only bounds staleness if an invalidation is missed
+CAMPAIGN_LINK_CACHE_TTL = 600
+CAMPAIGN_LINK_INVALIDATE_COMMAND = "invalidate_campaign_link"
+
+# campaign id -> CampaignLink, or None if the campaign is not linked (most game log events are from unlinked campaigns)
+_link_cache = cachetools.TTLCache(maxsize=100_000, ttl=CAMPAIGN_LINK_CACHE_TTL)
+# incremented on every change, so a load that raced with a change is not cached
+_link_generation = 0
+
 
 class CampaignLink:
     def __init__(
@@ -14,10 +25,22 @@ def __init__(
     # ==== constructors ====
     @classmethod
     async def from_id(cls, mdb, the_id):
-        campaign_dict = await mdb.gamelog_campaigns.find_one({"campaign_id": the_id})
-        if campaign_dict is None:
+        """
+        Returns the link for the given campaign ID. Links (and campaigns without one) are cached.
+
+        :raises errors.NoCampaignLink: if the campaign is not linked
+        """
+        try:
+            link = _link_cache[the_id]
+        except KeyError:
+            generation = _link_generation
+            campaign_dict = await mdb.gamelog_campaigns.find_one({"campaign_id": the_id})
+            link = cls.from_dict(campaign_dict) if campaign_dict is not None else None
+            if generation == _link_generation:
+                _link_cache[the_id] = link
+        if link is None:
             raise errors.NoCampaignLink()
-        return cls.from_dict(campaign_dict)
+        return link
 
     @classmethod
     def from_dict(cls, d):
@@ -39,5 +62,31 @@ async def get_channel_links(cls, ctx):
             cls.from_dict(link) async for link in ctx.bot.mdb.gamelog_campaigns.find({"channel_id": ctx.channel.id})
         ]
 
-    async def delete(self, mdb):
+    async def delete(self, mdb, rdb=None):
+        """
+        Deletes the link from the database.
+
+        :param rdb: If given, tells every cluster to drop its cached copy of this link.
+        :type rdb: utils.redisIO.RedisIO
+        """
         await mdb.gamelog_campaigns.delete_one({"campaign_id": self.campaign_id, "channel_id": self.channel_id})
+        await invalidate_campaign_link(self.campaign_id, rdb)
+
+
+async def invalidate_campaign_link(campaign_id: str, rdb=None):
+    """
+    Drops the cached link for a campaign, if any.
+
+    :param rdb: If given, also tells every other cluster to drop its cached link.
+    :type rdb: utils.redisIO.RedisIO
+    """
+    invalidate_cached_campaign_link(campaign_id)
+    if rdb is not None:
+        await rdb.publish_command(CAMPAIGN_LINK_INVALIDATE_COMMAND, campaign_id)
+
+
+def invalidate_cached_campaign_link(campaign_id: str):
+    """Drops the cached link for a campaign in this process, if any."""
+    global _link_generation
+    _link_generation += 1
+    _link_cache.pop(campaign_id, None)
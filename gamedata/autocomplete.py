@@ -0,0 +1,84 @@
+"""
+Autocompletion for slash command entity names.
+
+Discord sends an autocomplete request for every keystroke, so each user's resolved choices (including homebrew and
+entitlements) are kept in a short-lived session, and each keystroke that extends the previous input only narrows
+down the previous input's matches rather than searching every choice again.
+"""
+
+from typing import Any, Awaitable, Callable
+
+import cachetools
+
+from utils.functions import SearchIndex
+
+AUTOCOMPLETE_SESSION_TTL = 60
+MAX_AUTOCOMPLETE_CHOICES = 25  # Discord's limit
+
+# (user id, guild id) -> {session key -> AutocompleteSession}
+_sessions = cachetools.TTLCache(maxsize=4096, ttl=AUTOCOMPLETE_SESSION_TTL)
+
+
+class AutocompleteSession:
+    """The choices available to a user for one autocomplete option, and the matches for their latest input."""
+
+    def __init__(self, index: SearchIndex, display_key: Callable[[Any], str], cutoff=5):
+        """
+        :param index: The choices to search.
+        :param display_key: A function returning the autocomplete choice to show for a result.
+        :param cutoff: The scorer cutoff value for fuzzy searching.
+        """
+        self.index = index
+        self.display_key = display_key
+        self.cutoff = cutoff
+        self._last_input = None
+        self._last_partial_matches = None
+
+    def complete(self, user_input: str) -> list[str]:
+        """Returns the autocomplete choices for the user's current input."""
+        value_lower = user_input.lower()
+        # every choice that contains the new input also contains any substring of it (e.g. the previous input)
+        within = None
+        if self._last_input is not None and self._last_input in value_lower:
+            within = self._last_partial_matches
+        partial_matches = self.index.partial_matches(value_lower, within)
+        self._last_input = value_lower
+        self._last_partial_matches = partial_matches
+
+        result, strict = self.index.search(
+            user_input, self.cutoff, limit=MAX_AUTOCOMPLETE_CHOICES, partial_matches=partial_matches
+        )
+        if strict:
+            return [self.display_key(result)]
+        return [self.display_key(r) for r in result]
+
+
+async def autocomplete(
+    inter,
+    session_key,
+    user_input: str,
+    session_factory: Callable[[], Awaitable[AutocompleteSession]],
+) -> list[str]:
+    """
+    Returns the autocomplete choices for *user_input*, reusing the interaction author's session for *session_key* if
+    one exists or creating one with *session_factory* otherwise.
+
+    :type inter: disnake.ApplicationCommandInteraction
+    :param session_key: A hashable key identifying the set of choices (e.g. the entity type and any filters on it).
+    :param user_input: The user's current input.
+    :param session_factory: An async function returning a new session.
+    """
+    user_key = (inter.author.id, inter.guild_id)
+    user_sessions = _sessions.get(user_key)
+    if user_sessions is None:
+        user_sessions = _sessions[user_key] = {}
+
+    session = user_sessions.get(session_key)
+    if session is None:
+        session = user_sessions[session_key] = await session_factory()
+    return session.complete(user_input)
+
+
+def clear_sessions(user_id: int, guild_id: int = None):
+    """Discards a user's autocomplete sessions (e.g. after their homebrew changed)."""
+    _sessions.pop((user_id, guild_id), None)
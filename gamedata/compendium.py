@@ -1,12 +1,17 @@
 import asyncio
 import collections
 import copy
+import hashlib
 import json
 import logging
 import os
-from typing import Callable, List, Type, TypeVar
+import pickle
+from typing import Any, Callable, List, Type, TypeVar
 
+import bson
 import motor.motor_asyncio
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 
 import gamedata.spell
 from gamedata.action import Action
@@ -16,15 +21,68 @@
 from gamedata.item import AdventuringGear, Armor, MagicItem, Weapon
 from gamedata.klass import Class, ClassFeature, Subclass
 from gamedata.mixins import LimitedUseGrantorMixin
-from gamedata.monster import Monster
+from gamedata.monster import LazyMonster, Monster
 from gamedata.race import Race, RaceFeature, SubRace
 from gamedata.shared import Sourced
 from utils import config
+from utils.functions import SearchIndex
 import ldclient
 
 log = logging.getLogger(__name__)
 T = TypeVar("T")
 
+# entity lists that get a precomputed search index each epoch
+SEARCHABLE_LISTS = (
+    "backgrounds",
+    "cfeats",
+    "optional_cfeats",
+    "classes",
+    "subclasses",
+    "races",
+    "subraces",
+    "rfeats",
+    "subrfeats",
+    "adventuring_gear",
+    "armor",
+    "magic_items",
+    "weapons",
+    "feats",
+    "monsters",
+    "spells",
+)
+
+
+# static data key -> (attribute holding the raw data, JSON file name)
+RAW_DATA_SOURCES = {
+    "classes": ("raw_classes", "classes.json"),
+    "feats": ("raw_feats", "feats.json"),
+    "monsters": ("raw_monsters", "monsters.json"),
+    "backgrounds": ("raw_backgrounds", "backgrounds.json"),
+    "adventuring-gear": ("raw_adventuring_gear", "adventuring-gear.json"),
+    "armor": ("raw_armor", "armor.json"),
+    "magic-items": ("raw_magic_items", "magic-items.json"),
+    "weapons": ("raw_weapons", "weapons.json"),
+    "races": ("raw_races", "races.json"),
+    "subraces": ("raw_subraces", "subraces.json"),
+    "spells": ("raw_spells", "spells.json"),
+    "books": ("raw_books", "books.json"),
+    "actions": ("raw_actions", "actions.json"),
+    "names": ("names", "names.json"),
+    "srd-references": ("rule_references", "srd-references.json"),
+}
+# the version of data that was never loaded, or does not exist
+_NOT_LOADED = object()
+_MISSING = "missing"
+# bump this when the layout of the snapshot changes in a way the git commit would not reflect
+SNAPSHOT_FORMAT_VERSION = 1
+# state that is rebuilt rather than stored in the snapshot
+_UNSNAPSHOTTED_ATTRS = frozenset(("_base_path", "_search_bases", "_derived_lists", "_changed_keys", "_epoch"))
+
+
+def entity_name(entity) -> str:
+    """The default search key for compendium entities."""
+    return entity.name
+
 
 class Compendium:
     # noinspection PyTypeHints
@@ -78,9 +136,18 @@ def __init__(self):
         self._entity_lookup = {}
         self._book_lookup = {}
         self._actions_by_uid = {}  # {uuid: Action}
-        self._actions_by_eid = collections.defaultdict(lambda: [])  # {(tid, eid): [Action]}
+        self._actions_by_eid = collections.defaultdict(list)  # {(tid, eid): [Action]}
         self._epoch = 0
 
+        # search helpers
+        self._search_bases = {}  # {id(first entity): [(entities, {key: SearchIndex})]}
+        self._derived_lists = {}  # {key: list}
+
+        # incremental reload helpers
+        self._raw_versions = {}  # {static data key: version of the loaded raw data}
+        self._changed_keys = set()  # static data keys whose raw data changed since the last build
+        self._models = {}  # {static data key or derived list name: models built from the raw data}
+
         self._base_path = os.path.relpath("res")
 
     async def reload_task(self, mdb=None):
@@ -109,76 +176,210 @@ def load_all_json(self, base_path=None):
         if base_path is not None:
             self._base_path = base_path
 
-        self.raw_classes = self.read_json("classes.json", [])
-        self.raw_feats = self.read_json("feats.json", [])
-        self.raw_monsters = self.read_json("monsters.json", [])
-        self.raw_backgrounds = self.read_json("backgrounds.json", [])
-        self.raw_adventuring_gear = self.read_json("adventuring-gear.json", [])
-        self.raw_armor = self.read_json("armor.json", [])
-        self.raw_magic_items = self.read_json("magic-items.json", [])
-        self.raw_weapons = self.read_json("weapons.json", [])
-        self.raw_races = self.read_json("races.json", [])
-        self.raw_subraces = self.read_json("subraces.json", [])
-        self.raw_spells = self.read_json("spells.json", [])
-        self.raw_books = self.read_json("books.json", [])
-        self.raw_actions = self.read_json("actions.json", [])
-
-        self.names = self.read_json("names.json", [])
-        self.rule_references = self.read_json("srd-references.json", [])
+        versions = {}
+        for key, (attr, filename) in RAW_DATA_SOURCES.items():
+            try:
+                stat = os.stat(os.path.join(self._base_path, filename))
+                versions[key] = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                versions[key] = _MISSING
 
-    async def load_all_mongodb(self, mdb):
-        lookup = {d["key"]: d["object"] async for d in mdb.static_data.find({})}
+        if self._load_snapshot(versions):
+            return
+        for key, version in versions.items():
+            if version != self._raw_versions.get(key, _NOT_LOADED):
+                self._set_raw_data(key, self.read_json(RAW_DATA_SOURCES[key][1], []), version)
 
-        self.raw_classes = lookup.get("classes", [])
-        self.raw_feats = lookup.get("feats", [])
+    async def load_all_mongodb(self, mdb):
+        """
+        Loads the static data keys that changed since they were last loaded.
 
+        Documents with a ``hash`` or ``version`` field are only downloaded if it changed; other documents are
+        downloaded without being decoded and hashed, and only decoded if the hash changed.
+        """
         ldclient.set_config(ldclient.Config(sdk_key=config.LAUNCHDARKLY_SDK_KEY))
 
+        monsters_stream = None
         # TODO: Try importing Context as a standalone method
         try:
             context = ldclient.Context.create("anonymous-user-start-bot")
             if ldclient.get().variation("data.monsters.gridfs", context, False) or config.TESTING:
                 fs = motor.motor_asyncio.AsyncIOMotorGridFSBucket(mdb)
-                data = await fs.open_download_stream_by_name(filename="monsters")
-                gridout = await data.read()
-                self.raw_monsters = json.loads(gridout)
-            else:
-                self.raw_monsters = lookup.get("monsters", [])
+                monsters_stream = await fs.open_download_stream_by_name(filename="monsters")
         except:
-            self.raw_monsters = lookup.get("monsters", [])
-        self.raw_backgrounds = lookup.get("backgrounds", [])
-        self.raw_adventuring_gear = lookup.get("adventuring-gear", [])
-        self.raw_armor = lookup.get("armor", [])
-        self.raw_magic_items = lookup.get("magic-items", [])
-        self.raw_weapons = lookup.get("weapons", [])
-        self.raw_races = lookup.get("races", [])
-        self.raw_subraces = lookup.get("subraces", [])
-        self.raw_spells = lookup.get("spells", [])
-        self.raw_books = lookup.get("books", [])
-        self.raw_actions = lookup.get("actions", [])
-
-        self.names = lookup.get("names", [])
-        self.rule_references = lookup.get("srd-references", [])
+            pass
+
+        static_versions = {}
+        async for d in mdb.static_data.find({}, projection={"object": False}):
+            static_versions[d["key"]] = d.get("hash", d.get("version"))
+        versions = {key: static_versions.get(key, _MISSING) for key in RAW_DATA_SOURCES}
+        if monsters_stream is not None:
+            # only download the file if a new revision was uploaded
+            versions["monsters"] = ("gridfs", monsters_stream._id, monsters_stream.upload_date)
+
+        raw_docs = await self._fetch_static_data(mdb, [key for key, version in versions.items() if version is None])
+        for key, raw_doc in raw_docs.items():
+            versions[key] = hashlib.sha256(raw_doc).hexdigest()
+
+        if self._load_snapshot(versions):
+            return
+        stale = [key for key, version in versions.items() if version != self._raw_versions.get(key, _NOT_LOADED)]
+        to_fetch = [
+            key
+            for key in stale
+            if key not in raw_docs
+            and versions[key] != _MISSING
+            and not (key == "monsters" and monsters_stream is not None)
+        ]
+        raw_docs.update(await self._fetch_static_data(mdb, to_fetch))
+
+        for key in stale:
+            version = versions[key]
+            if key in raw_docs:
+                data = bson.decode(raw_docs[key])["object"]
+            elif key == "monsters" and monsters_stream is not None:
+                try:
+                    data = json.loads(await monsters_stream.read())
+                except Exception:
+                    log.exception("Could not load monsters from GridFS, falling back to static data")
+                    raw_monsters = await self._fetch_static_data(mdb, ["monsters"])
+                    if "monsters" not in raw_monsters:
+                        data, version = [], _MISSING
+                    else:
+                        data = bson.decode(raw_monsters["monsters"])["object"]
+                        version = hashlib.sha256(raw_monsters["monsters"]).hexdigest()
+            else:
+                data = []
+            self._set_raw_data(key, data, version)
+
+    @staticmethod
+    async def _fetch_static_data(mdb, keys) -> dict[str, bytes]:
+        """Downloads the given static data keys without decoding them. Returns a dict of key to raw BSON document."""
+        if not keys:
+            return {}
+        raw_static_data = mdb.static_data.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+        return {raw_doc["key"]: raw_doc.raw async for raw_doc in raw_static_data.find({"key": {"$in": keys}})}
+
+    def _set_raw_data(self, key, data, version):
+        setattr(self, RAW_DATA_SOURCES[key][0], data)
+        self._raw_versions[key] = version
+        self._changed_keys.add(key)
+        log.info(f"Loaded new version of {key}: {version}")
 
-    # noinspection DuplicatedCode
     def load_common(self):
+        """
+        Builds the models, lookups, and search indexes from the raw data, reusing everything built from raw data that
+        has not changed since the last build.
+
+        The new state is built separately and swapped in all at once, so lookups running concurrently with a reload
+        always see a consistent compendium. If nothing changed, nothing is rebuilt and the epoch does not increase.
+        """
+        if not self._changed_keys and self._epoch:
+            log.info("Static data has not changed since the last build")
+            return
+
+        staging = copy.copy(self)
+        staging._models = self._models.copy()
+        staging._build()
+        staging._changed_keys = set()
+        # increase epoch for any dependents
+        staging._epoch = self._epoch + 1
+        self.__dict__.update(staging.__dict__)
+        self._write_snapshot()
+
+    # snapshots
+    def _snapshot_key(self, versions):
+        return SNAPSHOT_FORMAT_VERSION, config.GIT_COMMIT_SHA, versions
+
+    def _load_snapshot(self, versions) -> bool:
+        """
+        On a cold start, loads the built compendium from the on-disk snapshot if it was built from the given versions
+        of the static data by the same version of the bot. Returns whether the snapshot was loaded.
+        """
+        path = config.COMPENDIUM_SNAPSHOT_PATH
+        if not path or self._epoch:
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                if pickle.load(f) != self._snapshot_key(versions):
+                    log.info("Compendium snapshot is out of date")
+                    return False
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception:
+            log.exception("Could not load compendium snapshot")
+            return False
+
+        search_bases = {}
+        for attr, indexes in state.pop("_search_indexes").items():
+            self._register_search_base(state[attr], indexes, search_bases)
+        state.update({
+            "_search_bases": search_bases,
+            "_derived_lists": {},
+            "_changed_keys": set(),
+            # increase epoch for any dependents
+            "_epoch": self._epoch + 1,
+        })
+        self.__dict__.update(state)
+        log.info(f"Loaded compendium snapshot from {path}")
+        return True
+
+    def _write_snapshot(self):
+        """Writes the built compendium to disk, to be loaded on the next cold start if the static data is unchanged."""
+        path = config.COMPENDIUM_SNAPSHOT_PATH
+        if not path:
+            return
+
+        state = {k: v for k, v in self.__dict__.items() if k not in _UNSNAPSHOTTED_ATTRS}
+        # only the default indexes; indexes on other keys are built on demand, and their keys may not be picklable
+        state["_search_indexes"] = {}
+        for attr in SEARCHABLE_LISTS:
+            entities = getattr(self, attr)
+            for base, indexes in self._search_bases.get(id(entities[0]), ()) if entities else ():
+                if base is entities and entity_name in indexes:
+                    state["_search_indexes"][attr] = {entity_name: indexes[entity_name]}
+
+        # write to a temporary file and move it into place, so other processes never read a partial snapshot
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self._snapshot_key(self._raw_versions), f, protocol=5)
+                pickle.dump(state, f, protocol=5)
+            os.replace(tmp_path, path)
+        except Exception:
+            log.exception("Could not write compendium snapshot")
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+        else:
+            log.info(f"Wrote compendium snapshot to {path}")
+
+    # noinspection DuplicatedCode
+    def _build(self):
         self._entity_lookup = {}
         self._book_lookup = {}
 
-        self.backgrounds = self._deserialize_and_register_lookups(Background, self.raw_backgrounds)
-        self.classes = self._deserialize_and_register_lookups(Class, self.raw_classes)
-        self.races = self._deserialize_and_register_lookups(Race, self.raw_races)
-        self.subraces = self._deserialize_and_register_lookups(SubRace, self.raw_subraces)
+        self.backgrounds = self._deserialize_and_register_lookups("backgrounds", Background, self.raw_backgrounds)
+        self.classes = self._deserialize_and_register_lookups("classes", Class, self.raw_classes)
+        self.races = self._deserialize_and_register_lookups("races", Race, self.raw_races)
+        self.subraces = self._deserialize_and_register_lookups("subraces", SubRace, self.raw_subraces)
         # if a Feat has the hidden attribute, we skip registering it in the lookup list but still register it in
         # entity lookup so it can grant limiteduse/etc
-        self.feats = self._deserialize_and_register_lookups(Feat, self.raw_feats, skip_out_filter=lambda f: f.hidden)
-        self.adventuring_gear = self._deserialize_and_register_lookups(AdventuringGear, self.raw_adventuring_gear)
-        self.armor = self._deserialize_and_register_lookups(Armor, self.raw_armor)
-        self.magic_items = self._deserialize_and_register_lookups(MagicItem, self.raw_magic_items)
-        self.weapons = self._deserialize_and_register_lookups(Weapon, self.raw_weapons)
-        self.monsters = self._deserialize_and_register_lookups(Monster, self.raw_monsters)
-        self.spells = self._deserialize_and_register_lookups(gamedata.spell.Spell, self.raw_spells)
-        self.books = self._deserialize_and_register_lookups(Book, self.raw_books)
+        self.feats = self._deserialize_and_register_lookups(
+            "feats", Feat, self.raw_feats, skip_out_filter=lambda f: f.hidden
+        )
+        self.adventuring_gear = self._deserialize_and_register_lookups(
+            "adventuring-gear", AdventuringGear, self.raw_adventuring_gear
+        )
+        self.armor = self._deserialize_and_register_lookups("armor", Armor, self.raw_armor)
+        self.magic_items = self._deserialize_and_register_lookups("magic-items", MagicItem, self.raw_magic_items)
+        self.weapons = self._deserialize_and_register_lookups("weapons", Weapon, self.raw_weapons)
+        self.monsters = self._deserialize_and_register_lookups("monsters", LazyMonster, self.raw_monsters)
+        self.spells = self._deserialize_and_register_lookups("spells", gamedata.spell.LazySpell, self.raw_spells)
+        self.books = self._deserialize_and_register_lookups("books", Book, self.raw_books)
 
         # generated
         self._load_classfeats()
@@ -186,26 +387,31 @@ def load_common(self):
         self._load_racefeats()
         self._load_actions()  # actions don't register as DDB entities, they're their own thing
         self._register_book_lookups()
+        self._build_search_indexes()
 
-        # increase epoch for any dependents
-        self._epoch += 1
+    def _is_stale(self, name, *keys):
+        """Whether the models called *name*, built from the given static data keys, need to be rebuilt."""
+        return name not in self._models or not self._changed_keys.isdisjoint(keys)
 
     def _load_subclasses(self):
-        self.subclasses = []
+        rebuild = self._is_stale("subclasses", "classes")
+        subclasses = [] if rebuild else self._models["subclasses"]
         for cls in self.classes:
             for subcls in cls.subclasses:
-                copied = copy.copy(subcls)
-                copied.name = f"{cls.name}: {subcls.name}"
+                if rebuild:
+                    copied = copy.copy(subcls)
+                    copied.name = f"{cls.name}: {subcls.name}"
+                    subclasses.append(copied)
                 # register lookups
                 self._register_entity_lookup(subcls)
-                self.subclasses.append(copied)
+        self.subclasses = self._models["subclasses"] = subclasses
 
     def _load_classfeats(self):
         """
         Loads all class features by iterating over classes and subclasses.
         """
-        self.cfeats = []
-        self.optional_cfeats = []
+        rebuild = self._is_stale("cfeats", "classes")
+        cfeats, optional_cfeats = ([], []) if rebuild else self._models["cfeats"]
         seen = set()
 
         def handle_class(cls_or_sub):
@@ -213,31 +419,35 @@ def handle_class(cls_or_sub):
             # load classfeats
             for i, level in enumerate(cls_or_sub.levels):
                 for feature in level:
-                    copied = copy.copy(feature)
-                    copied.name = f"{cls_or_sub.name}: {feature.name}"
-                    if copied.name in seen:
-                        copied.name = f"{copied.name} (Level {i + 1})"
-                    seen.add(copied.name)
-                    self.cfeats.append(copied)
+                    if rebuild:
+                        copied = copy.copy(feature)
+                        copied.name = f"{cls_or_sub.name}: {feature.name}"
+                        if copied.name in seen:
+                            copied.name = f"{copied.name} (Level {i + 1})"
+                        seen.add(copied.name)
+                        cfeats.append(copied)
                     self._register_entity_lookup(feature)
 
                     for cfo in feature.options:
-                        copied = copy.copy(cfo)
-                        copied.name = f"{cls_or_sub.name}: {feature.name}: {cfo.name}"
-                        self.cfeats.append(copied)
+                        if rebuild:
+                            copied = copy.copy(cfo)
+                            copied.name = f"{cls_or_sub.name}: {feature.name}: {cfo.name}"
+                            cfeats.append(copied)
                         self._register_entity_lookup(cfo)
 
             # TCoE optional features and options
             for feature in cls_or_sub.optional_features:
-                copied = copy.copy(feature)
-                copied.name = f"{cls_or_sub.name}: {feature.name}"
-                self.optional_cfeats.append(copied)
+                if rebuild:
+                    copied = copy.copy(feature)
+                    copied.name = f"{cls_or_sub.name}: {feature.name}"
+                    optional_cfeats.append(copied)
                 self._register_entity_lookup(feature)
 
                 for cfo in feature.options:
-                    copied = copy.copy(cfo)
-                    copied.name = f"{cls_or_sub.name}: {feature.name}: {cfo.name}"
-                    self.optional_cfeats.append(copied)
+                    if rebuild:
+                        copied = copy.copy(cfo)
+                        copied.name = f"{cls_or_sub.name}: {feature.name}: {cfo.name}"
+                        optional_cfeats.append(copied)
                     self._register_entity_lookup(cfo)
 
         for cls in self.classes:
@@ -245,15 +455,18 @@ def handle_class(cls_or_sub):
             for subcls in cls.subclasses:
                 handle_class(subcls)
 
+        self.cfeats, self.optional_cfeats = self._models["cfeats"] = cfeats, optional_cfeats
+
     def _load_racefeats(self):
-        self.rfeats = []
-        self.subrfeats = []
+        rebuild = self._is_stale("rfeats", "races", "subraces")
+        rfeats, subrfeats = ([], []) if rebuild else self._models["rfeats"]
 
-        def handle_race(race):
+        def handle_race(race, out):
             for feature in race.traits:
-                copied = copy.copy(feature)
-                copied.name = f"{race.name}: {feature.name}"
-                yield copied
+                if rebuild:
+                    copied = copy.copy(feature)
+                    copied.name = f"{race.name}: {feature.name}"
+                    out.append(copied)
 
                 self._register_entity_lookup(feature, allow_overwrite=not feature.inherited)
                 # race feature options (e.g. breath weapon, silver dragon) are registered here as well
@@ -261,30 +474,44 @@ def handle_race(race):
                     self._register_entity_lookup(rfo, allow_overwrite=not feature.inherited)
 
         for base_race in self.races:
-            self.rfeats.extend(handle_race(base_race))
+            handle_race(base_race, rfeats)
 
         for subrace in self.subraces:
-            self.subrfeats.extend(handle_race(subrace))
+            handle_race(subrace, subrfeats)
+
+        self.rfeats, self.subrfeats = self._models["rfeats"] = rfeats, subrfeats
 
     def _load_actions(self):
+        if not self._is_stale("actions", "actions"):
+            return
+        # new containers rather than clearing the old ones, which may still be in use until the new state is swapped in
         self.actions = []
-        self._actions_by_eid.clear()
-        self._actions_by_uid.clear()
+        self._actions_by_eid = collections.defaultdict(list)
+        self._actions_by_uid = {}
         for action_data in self.raw_actions:
             action = Action.from_data(action_data)
             self.actions.append(action)
             self._actions_by_uid[action.uid] = action
             self._actions_by_eid[(action.type_id, action.id)].append(action)
+        self._models["actions"] = self.actions
 
     def _deserialize_and_register_lookups(
-        self, cls: Type[T], data_source: List[dict], skip_out_filter: Callable[[T], bool] = None, **kwargs
+        self,
+        key: str,
+        cls: Type[T],
+        data_source: List[dict],
+        skip_out_filter: Callable[[T], bool] = None,
+        **kwargs,
     ) -> List[T]:
-        out = []
-        for entity_data in data_source:
-            entity = cls.from_data(entity_data, **kwargs)
+        if self._is_stale(key, key):
+            entities = [cls.from_data(entity_data, **kwargs) for entity_data in data_source]
+            out = [entity for entity in entities if skip_out_filter is None or not skip_out_filter(entity)]
+            self._models[key] = entities, out
+        else:
+            entities, out = self._models[key]
+
+        for entity in entities:
             self._register_entity_lookup(entity)
-            if skip_out_filter is None or not skip_out_filter(entity):
-                out.append(entity)
         return out
 
     def _register_entity_lookup(self, entity: Sourced, allow_overwrite=True):
@@ -319,6 +546,35 @@ def _register_book_lookups(self):
         for book in self.books:
             self._book_lookup[book.source] = book
 
+    def _build_search_indexes(self):
+        """
+        Builds a search index over each searchable entity list. Runs in the same thread as the rest of the load, so
+        lookups never pay to lowercase and index thousands of names.
+        """
+        # lists that were reused from the last build keep their indexes
+        previous_indexes = {
+            id(entities): indexes for bases in self._search_bases.values() for entities, indexes in bases
+        }
+        search_bases = {}
+        for attr in SEARCHABLE_LISTS:
+            entities = getattr(self, attr)
+            indexes = previous_indexes.get(id(entities))
+            if indexes is None:
+                indexes = {entity_name: SearchIndex(entities, entity_name, index_partials=True)}
+            self._register_search_base(entities, indexes, search_bases)
+        self._derived_lists = {}
+        self._search_bases = search_bases
+
+    def _register_search_base(self, entities: list, indexes: dict = None, search_bases: dict = None):
+        if not entities:
+            return
+        if search_bases is None:
+            search_bases = self._search_bases
+        bases = search_bases.setdefault(id(entities[0]), [])
+        bases.append((entities, indexes if indexes is not None else {}))
+        # prefer the longest base when multiple lists start with the same entity
+        bases.sort(key=lambda base: len(base[0]), reverse=True)
+
     def read_json(self, filename, default):
         data = default
         filepath = os.path.join(self._base_path, filename)
@@ -365,6 +621,42 @@ def lookup_actions_for_entity(self, tid, eid):
         """
         return self._actions_by_eid[(tid, eid)]
 
+    def search_index(self, entities: list, key: Callable[[Any], str] = entity_name) -> SearchIndex:
+        """
+        Gets a SearchIndex over a list of entities.
+
+        If the list starts with one of the compendium's entity lists (e.g. the compendium monsters followed by
+        homebrew monsters), the index built for that list this epoch is reused and only the remainder is indexed.
+
+        :param entities: The list of entities to search.
+        :param key: The search key. Indexes are cached per key, so this should be a module-level function.
+        """
+        if entities:
+            for base, indexes in self._search_bases.get(id(entities[0]), ()):
+                n = len(base)
+                # list equality compares by identity first, so this is a fast C-level loop
+                if len(entities) < n or entities[n - 1] is not base[-1] or entities[:n] != base:
+                    continue
+                index = indexes.get(key)
+                if index is None:
+                    index = indexes[key] = SearchIndex(base, key, index_partials=True)
+                return index.extended(entities[n:])
+        return SearchIndex(entities, key)
+
+    def get_derived_list(self, key, factory: Callable[[], list]) -> list:
+        """
+        Gets a list derived from compendium data (e.g. the spells available in a given rules version), built by
+        *factory* once per epoch. Derived lists reuse their search indexes like the compendium's own entity lists.
+
+        :param key: A hashable key identifying the derived list.
+        :param factory: A function returning the derived list.
+        """
+        derived = self._derived_lists.get(key)
+        if derived is None:
+            derived = self._derived_lists[key] = factory()
+            self._register_search_base(derived)
+        return derived
+
     @property
     def epoch(self):
         """
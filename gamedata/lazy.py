@@ -0,0 +1,68 @@
+"""
+Stubs for compendium entities that are only fully deserialized when they are first used.
+
+Most monsters and spells are never looked at between reloads, but the compendium needs every one of them for lookups,
+searching, and entitlement checks. A stub only holds what those need (the entity's name and sourcing), and becomes
+the full model in place the first time anything else is accessed, so references to the stub (e.g. in the entity
+lookup) stay valid.
+"""
+
+import threading
+
+from .shared import Sourced
+
+__all__ = ("LazyEntity",)
+
+_materialize_lock = threading.Lock()
+
+
+class LazyEntity:
+    """
+    A mixin for stubs of a compendium model. Subclasses must list the model class first and this mixin second, must
+    not add any slots, and should override ``from_data`` to return a stub created with :meth:`stub`.
+
+    The full model is built with the model class' ``from_data`` the first time an attribute the stub does not have
+    is accessed, after which the stub is an instance of the model class.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def stub(cls, data: dict, **sourced_kwargs):
+        """
+        Creates a stub that will be materialized from *data*.
+
+        :param data: The data to build the full model from.
+        :param sourced_kwargs: The arguments to :class:`gamedata.shared.Sourced`.
+        """
+        stub = object.__new__(cls)
+        Sourced.__init__(stub, **sourced_kwargs)
+        stub._lazy_data = data
+        return stub
+
+    def __getattribute__(self, item):
+        try:
+            value = object.__getattribute__(self, item)
+        except AttributeError:
+            # protocols probe for optional dunders (e.g. pickle's __getnewargs_ex__), which the full model lacks too
+            if item.startswith("__"):
+                raise
+            value = ...
+        # attributes that are missing or only have a placeholder (e.g. Sourced.name) are set by the full model
+        if value is ...:
+            LazyEntity._materialize(self)
+            return getattr(self, item)
+        return value
+
+    def _materialize(self):
+        with _materialize_lock:
+            stub_cls = type(self)
+            # another thread materialized this entity first
+            if not issubclass(stub_cls, LazyEntity):
+                return
+            model_cls = stub_cls.__bases__[0]
+            attrs = object.__getattribute__(self, "__dict__")
+            full = model_cls.from_data(attrs["_lazy_data"])
+            attrs.update(full.__dict__)
+            del attrs["_lazy_data"]
+            self.__class__ = model_cls
@@ -18,9 +18,9 @@
 from cogs5e.models.homebrew.bestiary import Bestiary
 from cogsmisc.stats import Stats
 from utils.constants import HOMEBREW_EMOJI, HOMEBREW_ICON
-from utils.functions import get_selection, search_and_select, search
+from utils.functions import SearchIndex, get_selection, search_and_select, search
 from utils.settings.guild import LegacyPreference, ServerSettings
-from .compendium import compendium
+from .compendium import compendium, entity_name
 from .klass import ClassFeature
 from .race import RaceFeature
 
@@ -301,7 +301,7 @@ def slash_match_key(entity):
 
 def lookup_converter(entity_type: str) -> Callable:
     async def monster_converter(inter: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.monster:
-        choices = await get_monster_choices(inter)
+        choices = compendium.search_index(await get_monster_choices(inter), slash_match_key)
         result: gamedata.monster = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That monster doesn't exist")
@@ -309,13 +309,14 @@ async def monster_converter(inter: disnake.ApplicationCommandInteraction, arg: s
 
     async def item_converter(inter: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.item:
         choices = await get_item_entitlement_choice_map(inter)
-        result: gamedata.item = search(list(itertools.chain.from_iterable(choices.values())), arg, slash_match_key)[0]
+        index = SearchIndex.chain(*(compendium.search_index(items, slash_match_key) for items in choices.values()))
+        result: gamedata.item = search(index, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That item doesn't exist")
         return result
 
     async def spell_converter(inter: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.spell:
-        choices = await get_spell_choices(inter)
+        choices = compendium.search_index(await get_spell_choices(inter), slash_match_key)
         result: gamedata.spell = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That spell doesn't exist")
@@ -336,43 +337,59 @@ def rule_converter(inter: disnake.ApplicationCommandInteraction, arg: str):
         return result
 
     def background_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.Background:
-        result: gamedata.Background = search(compendium.backgrounds, arg, slash_match_key)[0]
+        choices = compendium.search_index(compendium.backgrounds, slash_match_key)
+        result: gamedata.Background = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That background doesn't exist")
         return result
 
     def feat_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.feat:
-        result: gamedata.feat = search(compendium.feats, arg, slash_match_key)[0]
+        choices = compendium.search_index(compendium.feats, slash_match_key)
+        result: gamedata.feat = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That feat doesn't exist")
         return result
 
     def race_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.race:
-        result: gamedata.race = search(compendium.races + compendium.subraces, arg, slash_match_key)[0]
+        choices = SearchIndex.chain(
+            compendium.search_index(compendium.races, slash_match_key),
+            compendium.search_index(compendium.subraces, slash_match_key),
+        )
+        result: gamedata.race = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That race doesn't exist")
         return result
 
     def racefeat_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> RaceFeature:
-        result: RaceFeature = search(compendium.rfeats + compendium.subrfeats, arg, slash_match_key)[0]
+        choices = SearchIndex.chain(
+            compendium.search_index(compendium.rfeats, slash_match_key),
+            compendium.search_index(compendium.subrfeats, slash_match_key),
+        )
+        result: RaceFeature = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That racial feature doesn't exist")
         return result
 
     def class_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.Class:
-        result: gamedata.Class = search(compendium.classes, arg, slash_match_key)[0]
+        choices = compendium.search_index(compendium.classes, slash_match_key)
+        result: gamedata.Class = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That class doesn't exist")
         return result
 
     def subclass_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> gamedata.Subclass:
-        result: gamedata.Subclass = search(compendium.subclasses, arg, slash_match_key)[0]
+        choices = compendium.search_index(compendium.subclasses, slash_match_key)
+        result: gamedata.Subclass = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That class doesn't exist")
         return result
 
     def classfeat_converter(_: disnake.ApplicationCommandInteraction, arg: str) -> ClassFeature:
-        result: ClassFeature = search(compendium.cfeats + compendium.optional_cfeats, arg, slash_match_key)[0]
+        choices = SearchIndex.chain(
+            compendium.search_index(compendium.cfeats, slash_match_key),
+            compendium.search_index(compendium.optional_cfeats, slash_match_key),
+        )
+        result: ClassFeature = search(choices, arg, slash_match_key)[0]
         if result is None:
             raise ValueError("That class feature doesn't exist")
         return result
@@ -430,9 +447,9 @@ async def search_entities(
 
     result, metadata = await search_and_select(
         ctx,
-        list(itertools.chain.from_iterable(entities.values())),
+        SearchIndex.chain(*(compendium.search_index(choices) for choices in entities.values())),
         query,
-        lambda e: e.name,
+        entity_name,
         selectkey=create_selectkey(available_ids),
         selector=_create_selector(available_ids),
         return_metadata=True,
@@ -511,8 +528,7 @@ async def select_spell_full(ctx, name, extra_choices=None, **kwargs):
 
     :rtype: :class:`gamedata.Spell`
     """
-    choices = await get_spell_choices(ctx)
-    choices = await filter_spells_by_version(ctx, choices)
+    choices = await get_versioned_spell_choices(ctx)
 
     await Stats.increase_stat(ctx, "spells_looked_up_life")
 
@@ -526,6 +542,10 @@ async def select_spell_full(ctx, name, extra_choices=None, **kwargs):
 async def filter_spells_by_version(ctx, spells: [], version: str = None, strict: bool = False):
     if not version:
         version = await get_lookup_version(ctx)
+    return _filter_spells_by_version(spells, version, strict)
+
+
+def _filter_spells_by_version(spells: [], version: str, strict: bool = False):
     out = []
     spell_names = set()
 
@@ -545,6 +565,28 @@ async def filter_spells_by_version(ctx, spells: [], version: str = None, strict:
     return out
 
 
+async def get_versioned_spell_choices(ctx, version: str = None, strict: bool = False):
+    """
+    Gets a list of spells in the current context for the user to choose from, filtered by rules version.
+    Equivalent to ``filter_spells_by_version(ctx, await get_spell_choices(ctx), ...)``, but the compendium spells are
+    only filtered once per epoch (and keep their search index), with the homebrew spells after them.
+
+    :param ctx: The context.
+    :param version: The rules version to filter by (defaults to the lookup version of the context).
+    :param strict: Whether to exclude homebrew spells and spells of other versions.
+    """
+    if not version:
+        version = await get_lookup_version(ctx)
+    # homebrew spells can shadow unversioned compendium spells with the same name, so they must be filtered together
+    if version == "Homebrew":
+        return _filter_spells_by_version(await get_spell_choices(ctx), version, strict)
+
+    compendium_spells = compendium.get_derived_list(
+        ("spells", version, strict), lambda: _filter_spells_by_version(compendium.spells, version, strict)
+    )
+    return compendium_spells + _filter_spells_by_version(await _get_homebrew_spells(ctx), version, strict)
+
+
 async def get_spell_choices(ctx, homebrew=True):
     """
     Gets a list of spells in the current context for the user to choose from.
@@ -558,6 +600,11 @@ async def get_spell_choices(ctx, homebrew=True):
     if not homebrew:
         return compendium_list
 
+    return list(itertools.chain(compendium_list, await _get_homebrew_spells(ctx)))
+
+
+async def _get_homebrew_spells(ctx):
+    """Gets a list of the homebrew spells in the current context (the active tome, then server tomes)."""
     # personal active tome
     try:
         tome = await Tome.from_ctx(ctx)
@@ -568,7 +615,7 @@ async def get_spell_choices(ctx, homebrew=True):
         tome_id = None
 
     # server tomes
-    choices = list(itertools.chain(compendium_list, custom_spells))  # replace compendium.spells with compendium_list
+    choices = list(custom_spells)
     if ctx.guild:
         async for servtome in Tome.server_active(ctx):
             if servtome.id != tome_id:
@@ -10,12 +10,15 @@
 from utils import config
 from utils.constants import SKILL_MAP
 from utils.functions import a_or_an, bubble_format, titlecase, rulescase
+from .lazy import LazyEntity
 from .shared import Sourced
 
 log = logging.getLogger(__name__)
 
 
 class Trait:
+    __slots__ = ("name", "desc")
+
     def __init__(self, name, desc):
         self.name = name
         self.desc = desc
@@ -423,6 +426,31 @@ def temp_hp(self, value):
         pass
 
 
+class LazyMonster(Monster, LazyEntity):
+    """A compendium monster that is only deserialized when it is first used."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_data(cls, d):
+        stub = cls.stub(
+            d,
+            homebrew=False,
+            source=d["source"],
+            entity_id=d["id"],
+            page=d["page"],
+            url=d["url"],
+            is_free=d["isFree"],
+            is_legacy=d.get("isLegacy", False),
+        )
+        stub._name = d["name"]
+        # entity autocomplete checks these on every monster
+        stub.image_url = d["image_url"]
+        stub.token_free_fp = d["token_free"]
+        stub.token_sub_fp = d["token_sub"]
+        return stub
+
+
 def parse_type(_type):
     if isinstance(_type, dict):
         if "tags" in _type:
@@ -1,4 +1,5 @@
 import abc
+import sys
 
 __all__ = ("Sourced", "Trait", "LimitedUse", "CachedSourced")
 
@@ -37,7 +38,7 @@ def __init__(
         :param limited_use_only: Whether this entity is to be used for limited use only, or be allowed in lookup
         """
         self.homebrew = homebrew
-        self.source = source
+        self.source = sys.intern(source) if isinstance(source, str) else source
         self.entity_id = entity_id
         self.page = page
         self._url = url
@@ -86,6 +87,8 @@ def __repr__(self):
 
 
 class Trait:
+    __slots__ = ("name", "text")
+
     def __init__(self, name, text):
         self.name = name
         self.text = text
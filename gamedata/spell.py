@@ -1,6 +1,7 @@
 import logging
 import re
 
+from .lazy import LazyEntity
 from .mixins import AutomatibleMixin, DescribableMixin
 from .shared import Sourced
 
@@ -152,6 +153,27 @@ def to_dicecloud(self):
         }
 
 
+class LazySpell(Spell, LazyEntity):
+    """A compendium spell that is only deserialized when it is first used."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_data(cls, d):
+        stub = cls.stub(
+            d,
+            homebrew=False,
+            source=d["source"],
+            entity_id=d["id"],
+            page=d["page"],
+            url=d["url"],
+            is_free=d["isFree"],
+            rulesVersion=d["rulesVersion"],
+        )
+        stub.name = d["name"]
+        return stub
+
+
 def parse_homebrew_components(components):
     v = components.get("verbal")
     s = components.get("somatic")
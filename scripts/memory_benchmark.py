@@ -0,0 +1,78 @@
+"""
+Reports the resident memory used per fully built compendium monster and per character.
+
+Run it before and after a change to a model's layout to compare.
+"""
+
+import argparse
+import copy
+import gc
+import glob
+import json
+import os
+import sys
+import tracemalloc
+
+# path hack to import from parent folder
+sys.path.insert(1, os.path.join(sys.path[0], ".."))
+
+from cogs5e.models.character import Character  # noqa: E402
+from gamedata.monster import Monster  # noqa: E402
+
+STATIC_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "static")
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--monsters",
+    default=os.path.join(STATIC_PATH, "compendium", "monsters.json"),
+    help="A JSON file of compendium monster data.",
+)
+parser.add_argument(
+    "--characters",
+    default=os.path.join(STATIC_PATH, "char-*.json"),
+    help="A glob of JSON files of character documents.",
+)
+parser.add_argument("-n", type=int, default=100, help="How many copies of each entity to build.")
+
+
+def bytes_per_object(factory, data, n):
+    """Returns the mean number of bytes held by an object built by *factory* from each of *data*, *n* times over."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    # copy the data first, so only the built objects are counted
+    copies = [copy.deepcopy(d) for _ in range(n) for d in data]
+    data_size, _ = tracemalloc.get_traced_memory()
+    built = [factory(d) for d in copies]
+    del copies
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the data copies are freed, so what is left is the built objects (and anything they still share with the data)
+    del built
+    return (after - before) / (n * len(data)), (data_size - before) / (n * len(data))
+
+
+def main():
+    args = parser.parse_args()
+
+    with open(args.monsters) as f:
+        monsters = json.load(f)
+    characters = []
+    for filename in sorted(glob.glob(args.characters)):
+        with open(filename) as f:
+            characters.append(json.load(f))
+
+    for name, factory, data in (
+        ("monster", Monster.from_data, monsters),
+        ("character", Character.from_dict, characters),
+    ):
+        if not data:
+            print(f"{name}: no data")
+            continue
+        obj_bytes, data_bytes = bytes_per_object(factory, data, args.n)
+        print(f"{name}: {obj_bytes:,.0f} bytes per object ({data_bytes:,.0f} bytes per source document)")
+
+
+if __name__ == "__main__":
+    main()
@@ -107,10 +107,12 @@ def character(request, avrae):
     avrae.mdb.characters.delegate.update_one(
         {"owner": char.owner, "upstream": char.upstream}, {"$set": char.to_dict()}, upsert=True
     )
+    Character.invalidate_cached_bindings(char.owner)
     if request.cls is not None:
         request.cls.character = char
     yield char
     avrae.mdb.characters.delegate.delete_one({"owner": char.owner, "upstream": char.upstream})
+    Character.invalidate_cached_bindings(char.owner)
     # noinspection PyProtectedMember
     Character._cache.clear()
 
@@ -13,6 +13,22 @@ async def test_echo_alias(avrae, dhttp):
     await dhttp.receive_message(".+: foobar")
 
 
+async def test_alias_namespace_changes(avrae, dhttp):
+    # an unbound name is remembered as unbound until an alias is added
+    avrae.message("!foobaz")
+    await dhttp.drain()
+    avrae.message("!alias foobaz echo foobaz")
+    await dhttp.receive_message()
+    avrae.message("!foobaz")
+    await dhttp.receive_delete()
+    await dhttp.receive_message(".+: foobaz")
+
+    avrae.message("!alias delete foobaz")
+    await dhttp.receive_message("Alias foobaz removed.")
+    avrae.message("!foobaz")
+    await dhttp.drain()
+
+
 async def test_alias_newlines(avrae, dhttp):
     # ensure newlines directly after the alias name won't break anything.
     avrae.message("!alias foobar\necho hello!")
@@ -37,6 +53,27 @@ async def test_variables(avrae, dhttp):
     await dhttp.receive_message(".+: Hello world 0 Hello world\nI am a gvar")
 
 
+async def test_uvar_changes(avrae, dhttp):
+    avrae.message("!uvar uv_c gone")
+    await dhttp.receive_message()
+    avrae.message("!alias foobar <drac2>\nset_uvar('uv_a', 'a')\nset_uvar('uv_b', 'b')\ndelete_uvar('uv_c')\n</drac2>")
+    await dhttp.receive_message()
+    avrae.message("!foobar")
+    await dhttp.drain()
+
+    # uvars read as names are loaded before the alias runs
+    avrae.message("!alias foobar echo {{uv_a + uv_b}} {{exists('uv_c')}}")
+    await dhttp.receive_message()
+    avrae.message("!foobar")
+    await dhttp.receive_delete()
+    await dhttp.receive_message(".+: ab False")
+
+    avrae.message("!uvar deleteall")
+    await dhttp.receive_message()
+    avrae.message("Yes, I am sure")
+    await dhttp.drain()
+
+
 async def test_alias_percent_arguments(avrae, dhttp):
     avrae.message("!alias foobar echo the first argument is %1% yay")
     await dhttp.drain()
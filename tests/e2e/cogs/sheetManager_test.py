@@ -64,6 +64,10 @@ async def test_sheet(self, avrae, dhttp):
     async def test_character(self, avrae, dhttp):
         avrae.message("!char")
 
+    async def test_character_select(self, avrae, dhttp):
+        character = await active_character(avrae)
+        avrae.message(f"!char {character.name}")
+
     async def test_character_list(self, avrae, dhttp):
         avrae.message("!char list")
 
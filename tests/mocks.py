@@ -1,5 +1,6 @@
 import asyncio
 import copy
+import json
 import logging
 import urllib.parse
 from contextlib import contextmanager
@@ -188,5 +189,52 @@ async def variation(self, key, user, default):
     async def variation_for_ddb_user(self, key, user, default, *__, **___):
         return await self.variation(key, user, default)
 
+    def flag_stats(self):
+        return {}
+
     def close(self):
         pass
+
+
+class MockHTTPResponse:
+    """A canned response returned by :class:`MockHTTPTransport`."""
+
+    def __init__(self, status=200, body=b"", headers=None, reason="OK"):
+        self.status = status
+        self.reason = reason
+        self.headers = headers or {}
+        self._body = body if isinstance(body, bytes) else json.dumps(body).encode()
+
+    async def read(self):
+        return self._body
+
+    async def text(self, encoding="utf-8"):
+        return self._body.decode(encoding)
+
+    async def json(self, encoding="utf-8"):
+        return json.loads(self._body.decode(encoding))
+
+    def release(self):
+        pass
+
+
+class MockHTTPTransport:
+    """
+    A transport for :class:`utils.httpclient.HTTPClient` that returns canned responses instead of making requests.
+    Responses are queued per (method, URL glob) and returned in order; requests are recorded in ``requests``.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._responses = []
+
+    def add_response(self, method, url_pattern, response: MockHTTPResponse):
+        self._responses.append((method.upper(), url_pattern, response))
+
+    async def __call__(self, method, url, **kwargs):
+        self.requests.append(Request(method, url, kwargs.get("data") or kwargs.get("json")))
+        for i, (r_method, pattern, response) in enumerate(self._responses):
+            if r_method == method and fnmatchcase(url, pattern):
+                del self._responses[i]
+                return response
+        raise AssertionError(f"No mock response for {method} {url}")
@@ -4,7 +4,8 @@
 import pytest
 import yaml.constructor
 
-from aliasing.evaluators import ScriptingEvaluator
+from aliasing import helpers
+from aliasing.evaluators import PARSE_CACHE, ParseCache, ScriptingEvaluator
 from tests.utils import ContextBotProxy
 
 pytestmark = pytest.mark.asyncio
@@ -373,6 +374,103 @@ async def test_naughty_yaml(draconic_evaluator):
             assert result == expected_result
 
 
+async def test_parse_cache_shared(avrae):
+    PARSE_CACHE.clear()
+    code = "a = 1\nb = a + 2\nreturn b"
+    first = ScriptingEvaluator(ctx=ContextBotProxy(avrae))
+    second = ScriptingEvaluator(ctx=ContextBotProxy(avrae))
+    assert first.execute(code) == 3
+    assert (PARSE_CACHE.hits, PARSE_CACHE.misses) == (0, 1)
+    # identical code in a different interpreter is not parsed again, and executes independently
+    assert second.execute(code) == 3
+    assert (PARSE_CACHE.hits, PARSE_CACHE.misses) == (1, 1)
+    assert second.names["b"] == 3
+
+    with pytest.raises(draconic.DraconicSyntaxError):
+        first.execute("a = ")
+    with pytest.raises(draconic.DraconicSyntaxError):
+        first.execute("a = ")
+    assert PARSE_CACHE.misses == 3
+
+
+def test_parse_cache_too_large():
+    cache = ParseCache(max_source_size=10)
+    assert cache.parse("x" * 20, len) == 20
+    assert cache.parse("x" * 20, len) == 20
+    assert len(cache) == 0
+    assert cache.parse("x", len) == 1
+    assert cache.parse("x", len) == 1
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+async def test_prefetch_gvars(avrae):
+    await avrae.mdb.gvars.insert_many([
+        {"key": "prefetch-a", "value": "using(b='prefetch-b')\nx = b.y"},
+        {"key": "prefetch-b", "value": "y = get_gvar('prefetch-c')"},
+        {"key": "prefetch-c", "value": "hello"},
+    ])
+    try:
+        evaluator = ScriptingEvaluator(ctx=ContextBotProxy(avrae))
+        await evaluator.prefetch_gvars("<drac2>\nusing(a='prefetch-a')\nreturn a.x\n</drac2> {{get_gvar('missing')}}")
+        assert evaluator._cache["gvars"] == {
+            "prefetch-a": "using(b='prefetch-b')\nx = b.y",
+            "prefetch-b": "y = get_gvar('prefetch-c')",
+            "prefetch-c": "hello",
+        }
+        assert await evaluator.transformed_str_async("<drac2>\nusing(a='prefetch-a')\nreturn a.x\n</drac2>") == "hello"
+    finally:
+        await avrae.mdb.gvars.delete_many({"key": {"$in": ["prefetch-a", "prefetch-b", "prefetch-c"]}})
+        for key in ("prefetch-a", "prefetch-b", "prefetch-c"):
+            helpers.invalidate_cached_gvar(key)
+
+
+
+
+def test_gvar_cache_generation():
+    generation = helpers.gvar_cache_generation()
+    helpers.cache_gvar("generation-a", "old", generation)
+    assert helpers.get_cached_gvar("generation-a") == "old"
+
+    # a load that started before a change is not cached
+    generation = helpers.gvar_cache_generation()
+    helpers.invalidate_cached_gvar("generation-a")
+    helpers.cache_gvar("generation-a", "old", generation)
+    assert helpers.get_cached_gvar("generation-a") is None
+
+    helpers.cache_gvar("generation-a", "new", helpers.gvar_cache_generation())
+    assert helpers.get_cached_gvar("generation-a") == "new"
+    helpers.invalidate_cached_gvar("generation-a")
+
+@pytest.mark.parametrize(
+    "string, expected",
+    [
+        ("echo hello", False),
+        ("echo <name>", True),
+        ("echo {uv}", True),
+        ("{{uv}}", True),
+        ("{{get_uvar('uv')}}", True),
+        ("<drac2>\nx = 1\nreturn x\n</drac2>", False),
+        ("<drac2>\nx = 1\n</drac2> {{x}}", False),
+        ("<drac2>\nreturn [y for y in range(3)] + [(lambda z: z)(1)]\n</drac2>", False),
+        ("<drac2>\nfor i in range(3):\n  x = i\nreturn i\n</drac2>", True),
+        ("<drac2>\nfor i in range(3):\n  x = i\n  x += i\n</drac2>", False),
+        ("<drac2>\nusing(m='some-gvar')\nreturn m.x\n</drac2>", False),
+        ("<drac2>\ndef f(a):\n  return a + b\nb = 1\nreturn f(1)\n</drac2>", True),
+        ("<drac2>\ndef f(a):\n  return f(a - 1) if a else a\nreturn f(1)\n</drac2>", False),
+        # names bound on only some paths might be uvars
+        ("<drac2>\nif cond:\n  pass\n</drac2>", True),
+        ("<drac2>\nif True:\n  x = 1\nreturn x\n</drac2>", True),
+        ("<drac2>\nif True:\n  x = 1\n</drac2> {{x}}", True),
+        ("<drac2>\ntry:\n  x = 1\nexcept:\n  pass\nreturn x\n</drac2>", True),
+        ("<drac2>\nx = [y := 1, y]\n</drac2>", True),
+        ("<drac2>\nx += 1\n</drac2>", True),
+        ("{{x}} <drac2>\nx = 1\n</drac2>", True),
+    ],
+)
+async def test_might_use_uvars(avrae, string, expected):
+    evaluator = ScriptingEvaluator(ctx=ContextBotProxy(avrae))
+    assert evaluator._might_use_uvars(string) is expected
+
 # ==== evaulator fixture ====
 @pytest.fixture(scope="function")
 def draconic_evaluator(avrae):
@@ -0,0 +1,40 @@
+import pytest
+
+from aliasing import namespace
+from aliasing.namespace import NamespaceEntry
+
+
+class Alias:
+    pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.commands = []
+
+    async def publish_command(self, command, *args):
+        self.commands.append((command, *args))
+
+
+@pytest.mark.asyncio
+async def test_invalidate_namespace_publishes():
+    names = {"foo": NamespaceEntry(personal=True, workshop_ids=[])}
+    namespace.cache_namespace(Alias, 1234, names, namespace.namespace_generation())
+    assert namespace.get_cached_namespace(Alias, "1234") is names
+
+    rdb = FakeRedis()
+    await namespace.invalidate_namespace(Alias, 1234, rdb)
+    assert namespace.get_cached_namespace(Alias, 1234) is None
+    assert rdb.commands == [(namespace.NAMESPACE_INVALIDATE_COMMAND, "Alias", "1234")]
+
+
+def test_invalidate_cached_namespace():
+    # what other clusters do when they receive the published command
+    generation = namespace.namespace_generation()
+    namespace.cache_namespace(Alias, 1234, {}, generation)
+    namespace.invalidate_cached_namespace("Alias", "1234")
+    assert namespace.get_cached_namespace(Alias, 1234) is None
+
+    # a namespace built before the invalidation is not cached
+    namespace.cache_namespace(Alias, 1234, {}, generation)
+    assert namespace.get_cached_namespace(Alias, 1234) is None
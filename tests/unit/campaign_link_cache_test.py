@@ -0,0 +1,32 @@
+import pytest
+
+from ddb.gamelog import CampaignLink
+from ddb.gamelog.errors import NoCampaignLink
+from ddb.gamelog.link import invalidate_cached_campaign_link
+
+pytestmark = pytest.mark.asyncio
+
+CAMPAIGN_ID = "314159"
+
+
+async def test_campaign_link_cached(avrae):
+    mdb = avrae.mdb
+    await mdb.gamelog_campaigns.delete_one({"campaign_id": CAMPAIGN_ID})
+    invalidate_cached_campaign_link(CAMPAIGN_ID)
+
+    # campaigns without a link are cached too
+    with pytest.raises(NoCampaignLink):
+        await CampaignLink.from_id(mdb, CAMPAIGN_ID)
+    link = CampaignLink(CAMPAIGN_ID, "Test Campaign", 1234, 5678, 9012)
+    await mdb.gamelog_campaigns.insert_one(link.to_dict())
+    with pytest.raises(NoCampaignLink):
+        await CampaignLink.from_id(mdb, CAMPAIGN_ID)
+
+    # until they are invalidated
+    invalidate_cached_campaign_link(CAMPAIGN_ID)
+    assert (await CampaignLink.from_id(mdb, CAMPAIGN_ID)).guild_id == 5678
+
+    # deleting the link invalidates it
+    await link.delete(mdb)
+    with pytest.raises(NoCampaignLink):
+        await CampaignLink.from_id(mdb, CAMPAIGN_ID)
@@ -0,0 +1,29 @@
+import pytest
+
+from cogs5e.models.character import Character
+from tests.discord_mock_data import DEFAULT_USER_ID, TEST_CHANNEL_ID, TEST_GUILD_ID
+from tests.utils import ContextBotProxy
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.usefixtures("character")
+class TestCharacterBindings:
+    async def test_bindings_cached(self, avrae):
+        bindings = await Character.get_bindings(avrae.mdb, DEFAULT_USER_ID)
+        assert bindings.resolve(use_global=True) == self.character.upstream
+        assert bindings.resolve(str(TEST_CHANNEL_ID), str(TEST_GUILD_ID)) is None
+        assert await Character.get_bindings(avrae.mdb, DEFAULT_USER_ID) is bindings
+
+    async def test_bindings_invalidated(self, avrae):
+        ctx = ContextBotProxy(avrae)
+        character = await Character.from_ctx(ctx, use_global=True)
+
+        await character.set_channel_active(ctx, None)
+        bindings = await Character.get_bindings(avrae.mdb, DEFAULT_USER_ID)
+        assert bindings.resolve(str(TEST_CHANNEL_ID), str(TEST_GUILD_ID)) == character.upstream
+        assert (await Character.from_ctx(ctx, use_channel=True)).upstream == character.upstream
+
+        await character.unset_channel_active(ctx)
+        bindings = await Character.get_bindings(avrae.mdb, DEFAULT_USER_ID)
+        assert bindings.resolve(str(TEST_CHANNEL_ID), str(TEST_GUILD_ID)) is None
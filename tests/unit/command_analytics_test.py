@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cogsmisc import stats
+from cogsmisc.stats import CommandAnalyticsBuffer
+
+pytestmark = pytest.mark.asyncio
+
+
+def _ctx(user_id, guild_id, command_name):
+    return SimpleNamespace(
+        author=SimpleNamespace(id=user_id),
+        guild=SimpleNamespace(id=guild_id) if guild_id else None,
+        command=SimpleNamespace(qualified_name=command_name),
+    )
+
+
+async def test_command_analytics_coalesced(avrae):
+    mdb = avrae.mdb
+    await mdb.analytics_user_activity.delete_many({"user_id": {"$in": [1001, 1002]}})
+    await mdb.analytics_command_activity.delete_many({"name": "analytics test"})
+    await mdb.analytics_command_events.delete_many({"command_name": "analytics test"})
+
+    buffer = CommandAnalyticsBuffer(mdb)
+    buffer.record_command(_ctx(1001, 2001, "analytics test"))
+    buffer.record_command(_ctx(1001, None, "analytics test"))
+    buffer.record_command(_ctx(1002, 2001, "analytics test"))
+    await buffer.flush()
+
+    assert (await mdb.analytics_user_activity.find_one({"user_id": 1001}))["commands_called"] == 2
+    assert (await mdb.analytics_user_activity.find_one({"user_id": 1002}))["commands_called"] == 1
+    assert (await mdb.analytics_command_activity.find_one({"name": "analytics test"}))["num_invocations"] == 3
+    assert await mdb.analytics_command_events.count_documents({"command_name": "analytics test"}) == 3
+
+    # flushing again with nothing buffered writes nothing
+    await buffer.flush()
+    assert (await mdb.analytics_command_activity.find_one({"name": "analytics test"}))["num_invocations"] == 3
+
+
+async def test_command_events_bounded(avrae, monkeypatch):
+    monkeypatch.setattr(stats, "MAX_PENDING_COMMAND_EVENTS", 2)
+    buffer = CommandAnalyticsBuffer(avrae.mdb)
+    for _ in range(5):
+        buffer.record_command(_ctx(1003, 0, "analytics test bounded"))
+    assert len(buffer.command_events) == 2
+    assert buffer.dropped_events == 3
+    # counters are still exact
+    assert buffer.command_activity["analytics test bounded"][0] == 5
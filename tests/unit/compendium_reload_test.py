@@ -0,0 +1,82 @@
+"""
+Unit tests for incremental compendium reloads (gamedata.compendium.Compendium).
+"""
+
+import os
+import shutil
+
+import pytest
+
+from gamedata.compendium import Compendium
+from utils import config
+
+STATIC_COMPENDIUM = os.path.join(os.path.dirname(__file__), "..", "static", "compendium")
+
+
+@pytest.fixture()
+def local_compendium(tmp_path):
+    base_path = tmp_path / "compendium"
+    shutil.copytree(STATIC_COMPENDIUM, base_path)
+    compendium = Compendium()
+    compendium.load_all_json(base_path=str(base_path))
+    compendium.load_common()
+    return compendium, base_path
+
+
+def test_reload_unchanged(local_compendium):
+    compendium, _ = local_compendium
+    epoch = compendium.epoch
+    entity_lookup = compendium._entity_lookup
+
+    compendium.load_all_json()
+    compendium.load_common()
+    assert compendium.epoch == epoch
+    assert compendium._entity_lookup is entity_lookup
+
+
+def test_reload_changed_key(local_compendium):
+    compendium, base_path = local_compendium
+    epoch = compendium.epoch
+    classes, cfeats, spells = compendium.classes, compendium.cfeats, compendium.spells
+    cfeats_index = compendium.search_index(cfeats)
+    num_lookups = len(compendium._entity_lookup)
+
+    spells_path = base_path / "spells.json"
+    stat = os.stat(spells_path)
+    os.utime(spells_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    compendium.load_all_json()
+    compendium.load_common()
+
+    assert compendium.epoch == epoch + 1
+    # only spells are rebuilt
+    assert compendium.spells is not spells
+    assert [s.name for s in compendium.spells] == [s.name for s in spells]
+    assert compendium.classes is classes
+    assert compendium.cfeats is cfeats
+    assert compendium.search_index(compendium.cfeats) is cfeats_index
+    # every lookup is still registered
+    assert len(compendium._entity_lookup) == num_lookups
+    spell = compendium.spells[-1]
+    assert compendium.lookup_entity(spell.entity_type, spell.entity_id) is spell
+
+
+def test_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "COMPENDIUM_SNAPSHOT_PATH", str(tmp_path / "compendium.pickle"))
+    built = Compendium()
+    built.load_all_json(base_path=STATIC_COMPENDIUM)
+    built.load_common()
+    assert os.path.exists(tmp_path / "compendium.pickle")
+
+    # a cold start loads the snapshot instead of rebuilding
+    loaded = Compendium()
+    loaded.load_all_json(base_path=STATIC_COMPENDIUM)
+    assert loaded.epoch == 1
+    assert [s.name for s in loaded.spells] == [s.name for s in built.spells]
+    assert len(loaded._entity_lookup) == len(built._entity_lookup)
+    assert loaded.search_index(loaded.spells) is not None
+
+    # a snapshot of other static data is ignored
+    monkeypatch.setattr(config, "GIT_COMMIT_SHA", "some other commit")
+    rebuilt = Compendium()
+    rebuilt.load_all_json(base_path=STATIC_COMPENDIUM)
+    assert rebuilt.epoch == 0
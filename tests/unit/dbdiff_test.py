@@ -0,0 +1,70 @@
+"""
+Unit tests for the document diffing helpers used by partial commits (utils.dbdiff).
+"""
+
+from utils.dbdiff import copy_document, document_update
+
+
+def test_unchanged():
+    doc = {"name": "Ara", "hp": 10, "stats": {"str": 10}, "attacks": [{"name": "Dagger"}], "flags": (1, 2)}
+    assert document_update(copy_document(doc), doc) == {}
+    assert document_update(copy_document(doc), doc, recurse_lists=True) == {}
+
+
+def test_nested_set_and_unset():
+    old = {"hp": 10, "stats": {"str": 10, "dex": 12}, "cvars": {"a": "1", "b": "2"}}
+    new = {"hp": 8, "stats": {"str": 10, "dex": 14}, "cvars": {"a": "1", "c": "3"}}
+    assert document_update(old, new) == {
+        "$set": {"hp": 8, "stats.dex": 14, "cvars.c": "3"},
+        "$unset": {"cvars.b": ""},
+    }
+
+
+def test_top_level_keys_never_unset():
+    old = {"hp": 10, "active": True, "_id": 1}
+    new = {"hp": 10}
+    assert document_update(old, new) == {}
+
+
+def test_new_top_level_key():
+    assert document_update({}, {"coinpurse": {"gp": 1}}) == {"$set": {"coinpurse": {"gp": 1}}}
+
+
+def test_lists_replaced_whole():
+    old = {"consumables": [{"name": "Ki", "value": 3}, {"name": "Rage", "value": 2}]}
+    new = {"consumables": [{"name": "Ki", "value": 2}, {"name": "Rage", "value": 2}]}
+    assert document_update(old, new) == {"$set": {"consumables": new["consumables"]}}
+
+
+def test_lists_recursed():
+    old = {"turn": 1, "combatants": [{"name": "A", "hp": 3}, {"name": "B", "hp": 5, "notes": "x"}]}
+    new = {"turn": 2, "combatants": [{"name": "A", "hp": 3}, {"name": "B", "hp": 4}]}
+    assert document_update(old, new, recurse_lists=True) == {
+        "$set": {"turn": 2, "combatants.1.hp": 4},
+        "$unset": {"combatants.1.notes": ""},
+    }
+
+
+def test_list_length_change_replaces_list():
+    old = {"combatants": [{"name": "A"}]}
+    new = {"combatants": [{"name": "A"}, {"name": "B"}]}
+    assert document_update(old, new, recurse_lists=True) == {"$set": {"combatants": new["combatants"]}}
+
+
+def test_unsafe_keys_replace_parent():
+    old = {"cvars": {"a": "1"}}
+    new = {"cvars": {"a": "1", "b.c": "2"}}
+    assert document_update(old, new) == {"$set": {"cvars": new["cvars"]}}
+
+
+def test_type_changes():
+    assert document_update({"hp": 1}, {"hp": True}) == {"$set": {"hp": True}}
+    assert document_update({"hp": None}, {"hp": 0}) == {"$set": {"hp": 0}}
+    assert document_update({"x": {"a": 1}}, {"x": [1]}) == {"$set": {"x": [1]}}
+
+
+def test_copy_document_is_independent():
+    doc = {"cvars": {"a": "1"}, "levels": ("Fighter", 1)}
+    copied = copy_document(doc)
+    doc["cvars"]["a"] = "2"
+    assert copied == {"cvars": {"a": "1"}, "levels": ["Fighter", 1]}
@@ -0,0 +1,22 @@
+from ddb.entitlements import EntityEntitlements, EntityLicenseIndex, SharedLicense, UserEntitlements
+
+
+def test_license_index_matches_scan():
+    e10s = [
+        EntityEntitlements("spell", 1, True, []),
+        EntityEntitlements("spell", 2, False, [10]),
+        EntityEntitlements("spell", 3, False, [10, 11]),
+        EntityEntitlements("spell", 4, False, [12]),
+        EntityEntitlements("spell", 5, True, [12]),
+        EntityEntitlements("spell", 6, False, []),
+    ]
+    index = EntityLicenseIndex(e10s)
+    for licenses in (frozenset(), frozenset({10}), frozenset({11}), frozenset({11, 12}), frozenset({99})):
+        expected = {e.entity_id for e in e10s if e.is_free or licenses & e.license_ids}
+        assert index.accessible_ids(licenses) == expected
+
+
+def test_user_licenses():
+    user = UserEntitlements([1, 2], [SharedLicense(100, [2, 3]), SharedLicense(101, [4])])
+    assert user.licenses == {1, 2, 3, 4}
+    assert user.licenses is user.licenses
@@ -0,0 +1,45 @@
+import asyncio
+
+import ldclient
+import pytest
+from ldclient.integrations.test_data import TestData
+
+from utils.feature_flags import AsyncLaunchDarklyClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture()
+def flag_data():
+    return TestData.data_source()
+
+
+@pytest.fixture()
+async def client(flag_data):
+    client = AsyncLaunchDarklyClient(
+        asyncio.get_event_loop(), sdk_key="test", update_processor_class=flag_data, send_events=False
+    )
+    yield client
+    client.close()
+
+
+async def test_variation_memoized(client, flag_data):
+    flag_data.update(flag_data.flag("test.flag").variation_for_all(True))
+    context = ldclient.Context.create("1234")
+
+    assert await client.variation("test.flag", context, False) is True
+    flag_data.update(flag_data.flag("test.flag").variation_for_all(False))
+    assert await client.variation("test.flag", context, False) is True
+    # memoized per context
+    assert await client.variation("test.flag", ldclient.Context.create("5678"), True) is False
+
+    client._memo.clear()
+    assert await client.variation("test.flag", context, True) is False
+    assert client.flag_stats() == {"test.flag": {"memo": 1, "sync": 3, "executor": 0}}
+
+
+async def test_unknown_flag_not_memoized(client):
+    context = ldclient.Context.create("1234")
+    assert await client.variation("unknown.flag", context, "a") == "a"
+    assert await client.variation("unknown.flag", context, "b") == "b"
+    assert client.flag_stats() == {"unknown.flag": {"memo": 0, "sync": 2, "executor": 0}}
@@ -0,0 +1,52 @@
+import aiohttp
+import pytest
+
+from tests.mocks import MockHTTPResponse, MockHTTPTransport
+from utils import httpclient
+from utils.httpclient import HTTPClient
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture()
+def transport(monkeypatch):
+    monkeypatch.setattr(httpclient, "RETRY_BASE_DELAY", 0)
+    return MockHTTPTransport()
+
+
+async def test_retries_overloaded(transport):
+    client = HTTPClient(transport=transport)
+    transport.add_response("GET", "https://example.com/*", MockHTTPResponse(503, headers={"Retry-After": "0"}))
+    transport.add_response("GET", "https://example.com/*", MockHTTPResponse(200, {"foo": "bar"}))
+
+    async with client.get("https://example.com/foo") as resp:
+        assert resp.status == 200
+        assert await resp.json() == {"foo": "bar"}
+    assert len(transport.requests) == 2
+    assert client.stats_dict()["example.com"]["retries"] == 1
+
+
+async def test_returns_last_response(transport):
+    client = HTTPClient(transport=transport)
+    for _ in range(httpclient.DEFAULT_MAX_TRIES):
+        transport.add_response("GET", "https://example.com/*", MockHTTPResponse(429))
+
+    async with client.get("https://example.com/foo") as resp:
+        assert resp.status == 429
+    assert len(transport.requests) == httpclient.DEFAULT_MAX_TRIES
+
+    # no retries if the caller handles them
+    transport.add_response("GET", "https://example.com/*", MockHTTPResponse(429))
+    async with client.get("https://example.com/foo", max_tries=1) as resp:
+        assert resp.status == 429
+
+
+async def test_does_not_retry_unsafe_methods():
+    async def transport(method, url, **kwargs):
+        raise aiohttp.ClientConnectionError()
+
+    client = HTTPClient(transport=transport)
+    with pytest.raises(aiohttp.ClientConnectionError):
+        async with client.post("https://example.com/foo"):
+            pass
+    assert client.stats_dict()["example.com"]["requests"] == 1
@@ -0,0 +1,94 @@
+"""
+Unit tests for lazily materialized compendium entities (gamedata.lazy.LazyEntity).
+"""
+
+import pickle
+
+from gamedata.lazy import LazyEntity
+from gamedata.monster import LazyMonster
+from gamedata.shared import Sourced
+
+
+class Thing(Sourced):
+    entity_type = "thing"
+    type_id = 1
+    num_built = 0
+
+    def __init__(self, name, description, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.description = description
+        Thing.num_built += 1
+
+    @classmethod
+    def from_data(cls, d):
+        return cls(d["name"], d["description"], homebrew=False, source=d["source"], entity_id=d["id"])
+
+    def describe(self):
+        return f"{self.name}: {self.description}"
+
+
+class LazyThing(Thing, LazyEntity):
+    __slots__ = ()
+
+    @classmethod
+    def from_data(cls, d):
+        stub = cls.stub(d, homebrew=False, source=d["source"], entity_id=d["id"])
+        stub.name = d["name"]
+        return stub
+
+
+DATA = {"name": "Widget", "description": "A small device.", "source": "PHB", "id": 123}
+
+
+def test_stub_not_built():
+    Thing.num_built = 0
+    thing = LazyThing.from_data(DATA)
+    assert isinstance(thing, Thing)
+    assert (thing.name, thing.source, thing.entity_id, thing.is_free) == ("Widget", "PHB", 123, False)
+    assert thing.source_str() == "PHB"
+    assert Thing.num_built == 0
+
+
+def test_materialized_on_access():
+    Thing.num_built = 0
+    thing = LazyThing.from_data(DATA)
+    assert thing.describe() == "Widget: A small device."
+    assert type(thing) is Thing
+    assert "_lazy_data" not in thing.__dict__
+    assert thing.description == "A small device."
+    assert Thing.num_built == 1
+
+
+def test_missing_attribute():
+    thing = LazyThing.from_data(DATA)
+    assert not hasattr(thing, "nonexistent")
+    assert type(thing) is Thing
+
+
+def test_pickle_stub():
+    thing = pickle.loads(pickle.dumps(LazyThing.from_data(DATA), protocol=5))
+    assert type(thing) is LazyThing
+    assert thing.description == "A small device."
+    assert type(thing) is Thing
+
+
+def test_monster_stub_has_media():
+    data = {
+        "name": "Goblin",
+        "source": "MM",
+        "id": 456,
+        "page": 166,
+        "url": None,
+        "isFree": True,
+        "image_url": "https://example.com/goblin.png",
+        "token_free": None,
+        "token_sub": "goblin.png",
+    }
+    monster = LazyMonster.from_data(data)
+    assert (monster.image_url, monster.token_free_fp, monster.token_sub_fp) == (
+        "https://example.com/goblin.png",
+        None,
+        "goblin.png",
+    )
+    assert type(monster) is LazyMonster
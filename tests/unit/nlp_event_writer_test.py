@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from cogs5e.initiative import upenn_nlp
+from cogs5e.initiative.upenn_nlp import FirehoseEventWriter, RecordedEvent
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeFirehose:
+    def __init__(self, fail_first=0):
+        self.batches = []
+        self.fail_first = fail_first
+
+    async def put_record_batch(self, DeliveryStreamName, Records):
+        self.batches.append([r["Data"] for r in Records])
+        failed = Records[: self.fail_first]
+        self.fail_first = 0
+        return {
+            "FailedPutCount": len(failed),
+            "RequestResponses": [
+                {"ErrorCode": "ServiceUnavailableException"} if i < len(failed) else {"RecordId": str(i)}
+                for i in range(len(Records))
+            ],
+        }
+
+
+async def enabled():
+    return True
+
+
+@pytest.fixture(autouse=True)
+def fast_writer(monkeypatch):
+    monkeypatch.setattr(upenn_nlp, "FIREHOSE_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(upenn_nlp, "FIREHOSE_RETRY_BASE_DELAY", 0)
+
+
+def event(i):
+    return RecordedEvent(combat_id=str(i), event_type="test")
+
+
+async def test_writer_batches_and_drains_on_close():
+    firehose = FakeFirehose()
+    writer = FirehoseEventWriter(firehose, "test-stream", enabled)
+    for i in range(upenn_nlp.FIREHOSE_MAX_BATCH_RECORDS + 1):
+        writer.put(event(i))
+    await writer.close()
+
+    assert [len(batch) for batch in firehose.batches] == [upenn_nlp.FIREHOSE_MAX_BATCH_RECORDS, 1]
+    assert json.loads(firehose.batches[0][0])["combat_id"] == "0"
+    assert writer.written_records == upenn_nlp.FIREHOSE_MAX_BATCH_RECORDS + 1
+    assert writer.queue_depth == 0
+
+
+async def test_writer_retries_failed_records():
+    firehose = FakeFirehose(fail_first=2)
+    writer = FirehoseEventWriter(firehose, "test-stream", enabled)
+    for i in range(5):
+        writer.put(event(i))
+    await writer.close()
+
+    # only the 2 failed records are retried
+    assert [len(batch) for batch in firehose.batches] == [5, 2]
+    assert writer.written_records == 5
+    assert writer.failed_records == 0
+
+
+async def test_writer_drops_when_full(monkeypatch):
+    monkeypatch.setattr(upenn_nlp, "MAX_PENDING_NLP_EVENTS", 2)
+    writer = FirehoseEventWriter(FakeFirehose(), "test-stream", enabled)
+    for i in range(3):
+        writer.put(event(i))
+    assert writer.dropped_events == 1
+    await writer.close()
+    # the count is cumulative, not reset when it is logged
+    writer.put(event(3))
+    assert writer.dropped_events == 2
+
+
+async def test_writer_disabled():
+    async def disabled():
+        return False
+
+    firehose = FakeFirehose()
+    writer = FirehoseEventWriter(firehose, "test-stream", disabled)
+    writer.put(event(0))
+    await writer.close()
+    assert firehose.batches == []
@@ -82,3 +82,16 @@ def test_resistances_util_methods():
     assert r.is_neutral("immune neutral")
     assert r.is_neutral("vuln neutral")
     assert not r.is_neutral("foo")
+
+
+def test_resistance_shared_tokens():
+    fire = Resistance("Fire")
+    other_fire = Resistance.from_str("fire")
+    assert fire.dtype is other_fire.dtype
+    assert fire.unless is other_fire.only
+    assert fire == other_fire
+
+    magical = Resistance("fire", unless=["Magical"])
+    assert magical.unless == {"magical"}
+    assert magical.to_dict() == {"dtype": "fire", "unless": ["magical"]}
+    assert magical.copy() == magical
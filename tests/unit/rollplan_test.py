@@ -0,0 +1,148 @@
+import random
+import threading
+from unittest.mock import patch
+
+import cachetools
+import d20
+import pytest
+
+from cogs5e.models.automation import utils as autoutils
+from utils import rollplan
+from utils.dice import PersistentRollContext
+from utils.enums import CritDamageType
+
+# rr/ro/e/ra are left out: d20 applies them to its dice in set order, so even d20 doesn't roll them the same way twice
+# from the same seed
+EXPRESSIONS = [
+    "1d20",
+    "d20",
+    "1d20+5",
+    "1d20 - 3",
+    "1d20+ 5\n",
+    "2d20kh1+7",
+    "2d20kl1-1",
+    "3d20kh1",
+    "8d6",
+    "4d6kh3",
+    "1d%",
+    "1d8+4 [fire] + 2d6 [cold]",
+    "1d20+5 to hit the goblin",
+    "(1d6, 1d8, 1d10)kh2",
+    "2*(1d4+1)//3",
+    "-1d6 + +2",
+    "4d6mi2ma5",
+    "1d20 kh1",
+    "1d20 >= 10",
+]
+
+
+def assert_same_result(a, b):
+    assert str(a) == str(b)
+    assert a.total == b.total
+    assert a.crit == b.crit
+    assert a.comment == b.comment
+    assert str(a.ast) == str(b.ast)
+
+
+@pytest.mark.parametrize("expr", EXPRESSIONS)
+@pytest.mark.parametrize("advantage", [d20.AdvType.NONE, d20.AdvType.ADV, d20.AdvType.DIS])
+@pytest.mark.parametrize("allow_comments", [False, True])
+def test_roll_matches_d20(expr, advantage, allow_comments):
+    for seed in range(10):
+        random.seed(seed)
+        try:
+            expected = d20.roll(expr, advantage=advantage, allow_comments=allow_comments)
+        except d20.RollSyntaxError:
+            with pytest.raises(d20.RollSyntaxError):
+                rollplan.roll(expr, advantage=advantage, allow_comments=allow_comments)
+            return
+
+        random.seed(seed)
+        assert_same_result(rollplan.roll(expr, advantage=advantage, allow_comments=allow_comments), expected)
+
+
+@pytest.mark.parametrize("expr", ["1d20+5", "1d20-5", "2d20kh1+7", "2d20kl1", "8d6", "d20", "1d20 + 5", "10d8 - 2 "])
+def test_common_shapes_skip_grammar(expr):
+    common = rollplan._parse_common(expr)
+    assert common is not None
+    assert str(common) == str(d20.parse(expr))
+
+
+@pytest.mark.parametrize("expr", [" 1d20", "1D20", "1d20kh", "2d20k1", "1d20++5", "1d20+5[fire]", "1d20 kh1", "1 d20"])
+def test_other_shapes_use_grammar(expr):
+    assert rollplan._parse_common(expr) is None
+
+
+def test_roll_errors_match_d20():
+    with pytest.raises(d20.RollSyntaxError):
+        rollplan.roll("1d20+")
+    with pytest.raises(d20.RollValueError):
+        rollplan.roll("1d0")
+    with pytest.raises(d20.TooManyRolls):
+        rollplan.roll("1001d6")
+
+    # limits are shared across rolls with the same context
+    context = PersistentRollContext(max_rolls=10, max_total_rolls=6)
+    for _ in range(3):
+        rollplan.roll("2d6", context=context)
+    with pytest.raises(d20.TooManyRolls):
+        rollplan.roll("1d6", context=context)
+
+
+def test_plans_cached():
+    transforms = [autoutils.MinimumDice(2)]
+    plan = rollplan.get_plan("1d6+1", transforms)
+    assert rollplan.get_plan("1d6+1", [autoutils.MinimumDice(2)]) is plan
+    assert rollplan.get_plan("1d6+1", [autoutils.ScaleDice(2)]) is not plan
+    assert rollplan.get_plan("1d6+1", [autoutils.MaximizeDice()]) is not rollplan.get_plan(
+        "1d6+1", [autoutils.KeepHigherRoll()]
+    )
+    assert plan.with_advantage(d20.AdvType.ADV) is plan.with_advantage(d20.AdvType.ADV)
+    # the parsed AST is not modified by transforms
+    assert str(rollplan.parse("1d6+1")) == "1d6 + 1"
+
+
+@pytest.mark.parametrize(
+    "transforms, expected",
+    [
+        ([autoutils.ScaleDice(3), autoutils.AddRoll("2d8")], "3d6 [fire] + 4 + 2d8"),
+        ([autoutils.MinimumDice(2), autoutils.MaximizeDice()], "1d6mi6mi2 [fire] + 4"),
+        ([autoutils.CritDamage(CritDamageType.NORMAL, 2)], "4d6 [fire] + 4"),
+        ([autoutils.CritDamage(CritDamageType.MAX_ADD)], "1d6 + 6 [fire] + 4"),
+        ([autoutils.CritDamage(CritDamageType.DOUBLE_ALL, 1)], "(1d6 [fire] + 4) * 2 + 1d6"),
+        ([autoutils.CritDamage(CritDamageType.DOUBLE_DICE)], "1d6 * 2 [fire] + 4"),
+        ([autoutils.KeepHigherRoll()], "(1d6 [fire] + 4, 1d6 [fire] + 4)kh1"),
+    ],
+)
+def test_automation_transforms(transforms, expected):
+    assert str(rollplan.get_plan("1d6[fire]+4", transforms).ast) == expected
+
+
+def test_results_render_independently():
+    # results are rendered lazily, possibly from other threads, so they must not share stringifier state
+    plan = rollplan.get_plan("10d6kh3+4d6kl1")
+    a, b = plan.roll(), plan.roll()
+    assert a.stringifier is not b.stringifier
+
+
+def test_plans_threadsafe():
+    # alias roll()/vroll() make plans from scripting executor threads while the bot makes them on the event loop
+    errors = []
+
+    def make_plans(offset):
+        try:
+            for i in range(2000):
+                rollplan.get_plan(f"1d{offset + i % 50 + 1}+{i % 7}").roll()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=make_plans, args=(n * 25,)) for n in range(8)]
+    # small caches, so that the threads are constantly evicting each other's entries
+    with patch.object(rollplan, "_parse_cache", cachetools.LRUCache(64)), patch.object(
+        rollplan, "_plan_cache", cachetools.LRUCache(64)
+    ):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert not errors
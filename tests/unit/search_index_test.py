@@ -0,0 +1,121 @@
+"""
+Unit tests for the precomputed search index (utils.functions.SearchIndex).
+"""
+
+from gamedata.autocomplete import AutocompleteSession
+from utils.functions import SearchIndex, search
+
+NAMES = [
+    "Fireball",
+    "Fire Bolt",
+    "Delayed Blast Fireball",
+    "Fire Shield",
+    "Wall of Fire",
+    "Magic Missile",
+    "Mage Armor",
+    "Mage Hand",
+    "Cure Wounds",
+    "Mass Cure Wounds",
+    "fireball",
+]
+
+
+class _Entity:
+    def __init__(self, name, limited_use_only=False):
+        self.name = name
+        self.limited_use_only = limited_use_only
+
+    def __repr__(self):
+        return f"<_Entity {self.name!r}>"
+
+
+def _key(e):
+    return e.name
+
+
+def _names(result):
+    if isinstance(result, list):
+        return [e.name for e in result]
+    return result.name
+
+
+def test_exact():
+    entities = [_Entity(n) for n in NAMES]
+    index = SearchIndex(entities, _key, index_partials=True)
+    result, strict = search(index, "FIRE BOLT", _key)
+    assert strict
+    assert result is entities[1]
+
+    # exact matches are case insensitive and return every match
+    result, strict = search(index, "fireball", _key)
+    assert not strict
+    assert result == [entities[0], entities[10]]
+
+
+def test_strict():
+    index = SearchIndex([_Entity(n) for n in NAMES], _key)
+    assert search(index, "firebal", _key, strict=True) == ([], False)
+
+
+def test_single_partial():
+    entities = [_Entity(n) for n in NAMES]
+    result, strict = search(SearchIndex(entities, _key, index_partials=True), "missile", _key)
+    assert strict
+    assert result is entities[5]
+
+
+def test_limited_use_only():
+    entities = [_Entity("Fireball", limited_use_only=True), _Entity("Fire Bolt")]
+    result, strict = search(SearchIndex(entities, _key), "fire", _key)
+    assert strict
+    assert result is entities[1]
+
+
+def test_empty():
+    assert search([], "foo", _key) == ([], False)
+    assert search(SearchIndex([], _key), "foo", _key) == ([], False)
+
+
+def test_partial_index_matches_scan():
+    entities = [_Entity(n) for n in NAMES]
+    indexed = SearchIndex(entities, _key, index_partials=True)
+    scanned = SearchIndex(entities, _key)
+    for query in ("fire", "ire b", "mage", "cure", "ma", "", "wounds", "zzz", "all of f", "ball"):
+        assert _names(indexed.search(query)[0]) == _names(scanned.search(query)[0]), query
+
+
+def test_chain_matches_concatenation():
+    entities = [_Entity(n) for n in NAMES]
+    homebrew = [_Entity("Fireball"), _Entity("Homebrew Fire"), _Entity("Mage Missile")]
+    whole = SearchIndex(entities + homebrew, _key)
+    chained = SearchIndex(entities, _key, index_partials=True).extended(homebrew)
+    assert len(chained) == len(whole)
+    assert list(chained) == entities + homebrew
+    for query in ("fireball", "fire", "mage", "missile", "homebrew fire", "cure wound", "x"):
+        assert whole.search(query) == chained.search(query), query
+
+
+def test_list_filter_iterates_index():
+    entities = [_Entity(n) for n in NAMES]
+    index = SearchIndex(entities, _key)
+    assert [e for e in index if e.name.startswith("Mage")] == [entities[6], entities[7]]
+
+
+def test_limit_matches_slice():
+    entities = [_Entity(n) for n in NAMES]
+    index = SearchIndex(entities, _key)
+    for query in ("fire", "mage", "cure", "wall", "a", "zzz"):
+        full, _ = index.search(query)
+        limited, _ = index.search(query, limit=3)
+        if isinstance(full, list):
+            assert limited == full[:3], query
+
+
+def test_autocomplete_narrowing():
+    entities = [_Entity(n) for n in NAMES]
+    index = SearchIndex(entities, _key, index_partials=True)
+    session = AutocompleteSession(index, _key)
+    for typed in ("f", "fi", "fir", "fire", "fire ", "fire b", "m", "ma", "mag", "ma", "xyz"):
+        expected, strict = search(index, typed, _key)
+        expected = [expected.name] if strict else [e.name for e in expected][:25]
+        assert session.complete(typed) == expected, typed
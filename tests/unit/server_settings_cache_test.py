@@ -0,0 +1,34 @@
+import pytest
+
+from utils.settings import ServerSettings
+from utils.settings.guild import invalidate_server_settings
+
+pytestmark = pytest.mark.asyncio
+
+GUILD_ID = 314159
+
+
+async def test_server_settings_cached(avrae):
+    mdb = avrae.mdb
+    await mdb.guild_settings.delete_one({"guild_id": GUILD_ID})
+    invalidate_server_settings(GUILD_ID)
+
+    # guilds without settings are cached too
+    settings = await ServerSettings.for_guild(mdb, GUILD_ID)
+    assert settings.lookup_dm_required
+    await mdb.guild_settings.insert_one({"guild_id": GUILD_ID, "lookup_dm_required": False})
+    assert (await ServerSettings.for_guild(mdb, GUILD_ID)).lookup_dm_required
+
+    # until they are invalidated
+    invalidate_server_settings(GUILD_ID)
+    settings = await ServerSettings.for_guild(mdb, GUILD_ID)
+    assert not settings.lookup_dm_required
+
+    # changes to a returned instance do not leak into the cache until committed
+    settings.lookup_pm_dm = True
+    assert not (await ServerSettings.for_guild(mdb, GUILD_ID)).lookup_pm_dm
+    await settings.commit(mdb)
+    assert (await ServerSettings.for_guild(mdb, GUILD_ID)).lookup_pm_dm
+
+    await mdb.guild_settings.delete_one({"guild_id": GUILD_ID})
+    invalidate_server_settings(GUILD_ID)
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from tests.mocks import MockHTTPResponse, MockHTTPTransport
+from utils import config, httpclient, img
+
+
+def source_image(color="red"):
+    out = BytesIO()
+    Image.new("RGB", (300, 200), color).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture()
+def transport(monkeypatch, tmp_path):
+    transport = MockHTTPTransport()
+    monkeypatch.setattr(httpclient, "client", httpclient.HTTPClient(transport=transport))
+    monkeypatch.setattr(config, "TOKEN_CACHE_PATH", str(tmp_path))
+    img._token_cache.clear()
+    img._token_url_cache.clear()
+    yield transport
+    img.shutdown_render_pool()
+
+
+def test_render_token():
+    token = Image.open(BytesIO(img.render_token(source_image())))
+    assert token.size == img.TOKEN_SIZE
+    assert token.mode == "RGBA"
+
+
+def test_render_token_threads():
+    # tokens are rendered in several threads at once, sharing the decoded templates
+    sources = [source_image(color) for color in ("red", "green", "blue", "white")] * 2
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(img.render_token, sources)) == [img.render_token(source) for source in sources]
+
+
+@pytest.mark.asyncio
+async def test_token_cache(transport):
+    image = MockHTTPResponse(200, source_image(), headers={"Content-Type": "image/png"})
+    transport.add_response("GET", "https://example.com/a.png", image)
+    transport.add_response("GET", "https://example.com/b.png", image)
+
+    token = await img.generate_token("https://example.com/a.png")
+    # the same URL is not downloaded again
+    assert (await img.generate_token("https://example.com/a.png")).getvalue() == token.getvalue()
+    assert len(transport.requests) == 1
+    # the same image at another URL is not rendered again
+    assert (await img.generate_token("https://example.com/b.png")).getvalue() == token.getvalue()
+    assert len(img._token_cache) == 1
+
+    # rendered tokens are kept on disk too
+    img._token_cache.clear()
+    img.shutdown_render_pool()
+    transport.add_response("GET", "https://example.com/a.png", image)
+    img._token_url_cache.clear()
+    assert (await img.generate_token("https://example.com/a.png")).getvalue() == token.getvalue()
+    assert img._render_pool is None
+
+
+def test_token_disk_cache_pruned(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "TOKEN_CACHE_PATH", str(tmp_path))
+    monkeypatch.setattr(img, "TOKEN_DISK_CACHE_SIZE", 250)
+    monkeypatch.setattr(img, "TOKEN_DISK_CACHE_PRUNE_INTERVAL", 1)
+
+    def write(key, last_used):
+        img._write_cached_token(key, b"x" * 100)
+        os.utime(img._token_cache_path(key), (last_used, last_used))
+
+    write("a", 1)
+    write("b", 2)
+    write("c", 3)
+    # the least recently used tokens are deleted once the cache is too large
+    assert sorted(os.listdir(tmp_path)) == ["b.png", "c.png"]
+    # reading a token counts as using it
+    assert img._read_cached_token("b") == b"x" * 100
+    img._write_cached_token("d", b"x" * 100)
+    assert sorted(os.listdir(tmp_path)) == ["b.png", "d.png"]
@@ -31,7 +31,7 @@ class ServerSettingsMenuBase(MenuBase, abc.ABC):
 
     async def commit_settings(self):
         """Commits any changed guild settings to the db."""
-        await self.settings.commit(self.bot.mdb)
+        await self.settings.commit(self.bot.mdb, self.bot.rdb)
 
     async def get_inline_rolling_desc(self) -> str:
         flag_enabled = await self.bot.ldclient.variation_for_discord_user(
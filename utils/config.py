@@ -14,6 +14,8 @@
 NUM_CLUSTERS = int(os.getenv("NUM_CLUSTERS")) if "NUM_CLUSTERS" in os.environ else None
 NUM_SHARDS = int(os.getenv("NUM_SHARDS")) if "NUM_SHARDS" in os.environ else None
 RELOAD_INTERVAL = os.getenv("RELOAD_INTERVAL", "0")  # compendium static data reload interval
+COMPENDIUM_SNAPSHOT_PATH = os.getenv("COMPENDIUM_SNAPSHOT_PATH")  # optional: on-disk cache of the built compendium
+TOKEN_CACHE_PATH = os.getenv("TOKEN_CACHE_PATH")  # optional: on-disk cache of rendered tokens
 ECS_METADATA_ENDPT = os.getenv("ECS_CONTAINER_METADATA_URI")  # set by ECS
 MONSTER_TOKEN_ENDPOINT = os.getenv("MONSTER_TOKEN_ENDPOINT")  # S3: monster tokens
 # secret for the draconic signature() function
@@ -65,6 +67,9 @@
 DDB_WATERDEEP_URL = os.getenv("DDB_WATERDEEP_URL", "https://www.dndbeyond.com")
 # game log base endpoint
 DDB_GAMELOG_ENDPOINT = os.getenv("DDB_GAMELOG_ENDPOINT", "https://game-log-rest-live.dndbeyond.com/v1")
+# game log event routing: "broadcast" (every cluster reads every event), "router" (cluster 0 forwards each event to the
+# channel of the shard its campaign's guild is on), or "publisher" (the publisher sends events to the shard channels)
+DDB_GAMELOG_ROUTING = os.getenv("DDB_GAMELOG_ROUTING", "broadcast")
 DDB_CHARACTER_SERVICE_URL = os.getenv(
     "DDB_CHARACTER_SERVICE_URL", "https://character-service.dndbeyond.com/character/v5"
 )
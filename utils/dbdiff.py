@@ -0,0 +1,91 @@
+"""
+Helpers to turn the difference between two serialized documents into a minimal MongoDB update.
+
+Models that are loaded from and committed back to a single document (characters, combats) keep a copy of the
+document as it was last read or written, then diff their current serialized form against it on commit to only
+write the fields that actually changed.
+"""
+
+from collections.abc import Mapping, Sequence
+
+import bson
+
+__all__ = ("copy_document", "document_update")
+
+
+def copy_document(doc: Mapping) -> dict:
+    """
+    Returns a deep copy of a BSON-serializable document that shares no references with the original, normalizing
+    types the same way a round-trip through the database would (e.g. tuples become lists).
+    """
+    return bson.decode(bson.encode(doc))
+
+
+def document_update(old: Mapping, new: Mapping, recurse_lists=False) -> dict:
+    """
+    Returns the update operators (``$set`` and ``$unset``) that turn the document *old* into *new*. Only the keys
+    present in *new* are considered at the top level - top-level keys missing from *new* are never unset, so that
+    fields that the serialized form omits on purpose are left alone.
+
+    :param old: The document as it currently exists in the database.
+    :param new: The document as it should exist.
+    :param recurse_lists: Whether to diff lists of the same length element-wise (emitting positional paths like
+        ``combatants.3.hp``) rather than replacing the whole list when any element changed. Only safe if nothing
+        else can reorder the list in the database between reads and writes.
+    :return: An update document, which is empty if nothing changed.
+    """
+    to_set = {}
+    to_unset = {}
+    for key, value in new.items():
+        if key in old:
+            _diff_value(old[key], value, key, to_set, to_unset, recurse_lists)
+        else:
+            to_set[key] = value
+
+    update = {}
+    if to_set:
+        update["$set"] = to_set
+    if to_unset:
+        update["$unset"] = to_unset
+    return update
+
+
+def _is_sequence(value) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+
+def _is_safe_key(key) -> bool:
+    """Whether a key can be used as part of a dotted field path."""
+    return isinstance(key, str) and key and "." not in key and not key.startswith("$")
+
+
+def _diff_value(old, new, path, to_set, to_unset, recurse_lists):
+    # fast path: most of a document is unchanged between commits
+    if type(old) is type(new) and old == new:
+        return
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        if not all(map(_is_safe_key, new)) or not all(map(_is_safe_key, old)):
+            to_set[path] = new
+            return
+        for key, value in new.items():
+            if key in old:
+                _diff_value(old[key], value, f"{path}.{key}", to_set, to_unset, recurse_lists)
+            else:
+                to_set[f"{path}.{key}"] = value
+        for key in old:
+            if key not in new:
+                to_unset[f"{path}.{key}"] = ""
+    elif _is_sequence(old) and _is_sequence(new) and len(old) == len(new):
+        # tuples and lists serialize the same way, so compare them by value
+        if not recurse_lists:
+            sub_set = {}
+            for i, (old_item, new_item) in enumerate(zip(old, new)):
+                _diff_value(old_item, new_item, str(i), sub_set, sub_set, False)
+                if sub_set:
+                    to_set[path] = new
+                    return
+            return
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            _diff_value(old_item, new_item, f"{path}.{i}", to_set, to_unset, True)
+    elif old != new or isinstance(old, bool) != isinstance(new, bool):
+        to_set[path] = new
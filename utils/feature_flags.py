@@ -2,8 +2,10 @@
 Asyncio wrapper for launchdarkly client to ensure flag evaluation is not a blocking call.
 """
 
+import collections
 from typing import Optional, TYPE_CHECKING
 
+import cachetools
 import ldclient
 from ldclient.config import Config
 
@@ -12,17 +14,52 @@
     import disnake
 
 
+# flags are checked for the same users on most messages, but rarely change; so evaluations are memoized per
+# (flag, context) for a few seconds
+FLAG_MEMO_TTL = 5
+FLAG_MEMO_SIZE = 100_000
+_MISSING = object()
+
+
 class AsyncLaunchDarklyClient(ldclient.LDClient):
-    """Works exactly like a normal LDClient, except certain blocking methods run in a separate thread."""
+    """
+    Works exactly like a normal LDClient, except flag evaluation never blocks the event loop.
 
-    def __init__(self, loop, sdk_key, *args, **kwargs):
-        super().__init__(
-            config=Config(sdk_key=sdk_key)
-        )  # Required for SDK 8.0 and above. *args, **kwargs are not supported
-        self.loop = loop
+    Once the client has received flag data, flags are evaluated in memory on the event loop; until then, evaluations
+    run in a separate thread, as they may block waiting for data.
+    """
 
-    async def variation(self, key, user, default):  # run variation evaluation in a separate thread
-        return await self.loop.run_in_executor(None, super().variation, key, user, default)
+    def __init__(self, loop, sdk_key, **config_kwargs):
+        super().__init__(config=Config(sdk_key=sdk_key, **config_kwargs))  # Required for SDK 8.0 and above.
+        self.loop = loop
+        self._memo = cachetools.TTLCache(maxsize=FLAG_MEMO_SIZE, ttl=FLAG_MEMO_TTL)
+        # {(flag key, "memo" | "sync" | "executor"): number of evaluations}
+        self.evaluation_counts = collections.Counter()
+
+    async def variation(self, key, user, default):
+        if not self.is_initialized():
+            self.evaluation_counts[key, "executor"] += 1
+            return await self.loop.run_in_executor(None, super().variation, key, user, default)
+
+        memo_key = (key, user.fully_qualified_key)
+        value = self._memo.get(memo_key, _MISSING)
+        if value is not _MISSING:
+            self.evaluation_counts[key, "memo"] += 1
+            return value
+
+        self.evaluation_counts[key, "sync"] += 1
+        detail = super().variation_detail(key, user, default)
+        # errors (e.g. an unknown flag) return the caller's default, which may differ between callers
+        if detail.reason.get("kind") != "ERROR":
+            self._memo[memo_key] = detail.value
+        return detail.value
+
+    def flag_stats(self):
+        """Returns a dict of {flag key: {"memo": int, "sync": int, "executor": int}} of evaluations in this process."""
+        stats = collections.defaultdict(lambda: {"memo": 0, "sync": 0, "executor": 0})
+        for (key, source), count in self.evaluation_counts.items():
+            stats[key][source] = count
+        return dict(stats)
 
     async def variation_for_discord_user(self, key: str, user: "disnake.User", default):
         """
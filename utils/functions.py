@@ -5,11 +5,13 @@
 """
 
 import asyncio
+import collections
+import heapq
 import logging
 import random
 import re
 from contextlib import suppress
-from typing import Callable, TYPE_CHECKING, TypeVar
+from typing import Callable, Generic, Iterable, TYPE_CHECKING, TypeVar
 
 import disnake
 from rapidfuzz import fuzz, process
@@ -47,12 +49,201 @@ def get_positivity(string):
 _HaystackT = TypeVar("_HaystackT")
 
 
+class _SearchSegment(Generic[_HaystackT]):
+    """A contiguous run of searchable objects with their names precomputed. See :class:`SearchIndex`."""
+
+    NGRAM_SIZE = 3
+
+    def __init__(self, haystack: Iterable[_HaystackT], key: Callable[[_HaystackT], str], index_partials: bool):
+        # Remove limited use only items from search results
+        self.items = [a for a in haystack if not getattr(a, "limited_use_only", False)]
+        self.names = [key(a) for a in self.items]
+        self.lowered = [n.lower() for n in self.names]
+        self.exact = collections.defaultdict(list)  # type: dict[str, list[int]]
+        for idx, name in enumerate(self.lowered):
+            self.exact[name].append(idx)
+        self.index_partials = index_partials
+        self._ngrams = None  # type: dict[str, set[int]] | None
+
+    def exact_matches(self, value: str) -> list[int]:
+        return self.exact.get(value, [])
+
+    def partial_matches(self, value: str) -> list[int]:
+        if not self.index_partials or len(value) < self.NGRAM_SIZE:
+            return [idx for idx, name in enumerate(self.lowered) if value in name]
+
+        # any name containing the value must contain every n-gram of the value
+        ngrams = self._get_ngrams()
+        postings = []
+        for ngram in {value[i : i + self.NGRAM_SIZE] for i in range(len(value) - self.NGRAM_SIZE + 1)}:
+            posting = ngrams.get(ngram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return sorted(idx for idx in candidates if value in self.lowered[idx])
+
+    def fuzzy_matches(self, value: str, cutoff, limit: int) -> list[tuple[float, int]]:
+        return [
+            (score, idx)
+            for _, score, idx in process.extract(
+                value, self.lowered, scorer=fuzz.WRatio, limit=limit, score_cutoff=cutoff
+            )
+        ]
+
+    def _get_ngrams(self) -> dict[str, set[int]]:
+        if self._ngrams is None:
+            ngrams = collections.defaultdict(set)
+            for idx, name in enumerate(self.lowered):
+                for i in range(len(name) - self.NGRAM_SIZE + 1):
+                    ngrams[name[i : i + self.NGRAM_SIZE]].add(idx)
+            self._ngrams = ngrams
+        return self._ngrams
+
+
+class SearchIndex(Generic[_HaystackT]):
+    """
+    A precomputed index over a list of objects, used to fuzzy search the list repeatedly without recomputing
+    (and lowercasing) every object's key on each search.
+
+    Indexes can be chained together cheaply (e.g. a long-lived compendium index followed by a short list of homebrew),
+    in which case they behave exactly as if one index had been built over the concatenation of their haystacks.
+    """
+
+    FUZZY_LIMIT = 5
+
+    def __init__(self, haystack: Iterable[_HaystackT], key: Callable[[_HaystackT], str], index_partials=False):
+        """
+        :param haystack: The objects to index.
+        :param key: A function defining what to search for.
+        :param index_partials: Whether to build an n-gram index for partial matches. Only worth it for long-lived
+                               indexes that will be searched many times.
+        """
+        self.key = key
+        self._segments = (_SearchSegment(haystack, key, index_partials),)  # type: tuple[_SearchSegment, ...]
+
+    @classmethod
+    def chain(cls, *indexes: "SearchIndex[_HaystackT]") -> "SearchIndex[_HaystackT]":
+        """Returns a new index that searches each of the given indexes, in order, as if they were one list."""
+        if not indexes:
+            raise ValueError("At least 1 index must be passed in")
+        inst = cls.__new__(cls)
+        inst.key = indexes[0].key
+        inst._segments = tuple(segment for index in indexes for segment in index._segments)
+        return inst
+
+    def extended(self, extra: list[_HaystackT]) -> "SearchIndex[_HaystackT]":
+        """Returns a new index that searches this index's objects followed by *extra*."""
+        if not extra:
+            return self
+        return self.chain(self, SearchIndex(extra, self.key))
+
+    def __iter__(self):
+        for segment in self._segments:
+            yield from segment.items
+
+    def __len__(self):
+        return sum(len(segment.items) for segment in self._segments)
+
+    def partial_matches(self, value_lower: str, within: list[tuple] = None) -> list[tuple]:
+        """
+        Returns a list of opaque references to every object whose lowercased key contains *value_lower*, for use with
+        :meth:`search`.
+
+        :param value_lower: The lowercased value to search for.
+        :param within: The partial matches of a substring of *value_lower* (e.g. the previous input when the user is
+                       still typing). If given, only those objects are checked.
+        """
+        if within is not None:
+            return [(segment, idx) for segment, idx in within if value_lower in segment.lowered[idx]]
+        return [(segment, idx) for segment in self._segments for idx in segment.partial_matches(value_lower)]
+
+    def search(
+        self, value: str, cutoff=5, strict=False, limit: int = None, partial_matches: list[tuple] = None
+    ) -> tuple[_HaystackT | list[_HaystackT], bool]:
+        """
+        See :func:`search`.
+
+        :param limit: If given, return at most this many results (selecting only the best ones rather than sorting
+                      every match).
+        :param partial_matches: The precomputed :meth:`partial_matches` of the lowercased value, if available.
+        """
+        value_lower = value.lower()
+
+        # full match, return result
+        exact_matches = [segment.items[idx] for segment in self._segments for idx in segment.exact_matches(value_lower)]
+        if exact_matches or strict:
+            results = exact_matches
+        else:
+            if partial_matches is None:
+                partial_matches = self.partial_matches(value_lower)
+            if len(partial_matches) == 1:
+                results = [partial_matches[0][0].items[partial_matches[0][1]]]
+            else:
+                results = self._weighted_results(value, value_lower, partial_matches, cutoff, limit)
+        if limit is not None:
+            results = results[:limit]
+
+        if len(results) > 1:
+            return results, False
+        elif not results:
+            return [], False
+        else:
+            return results[0], True
+
+    def _weighted_results(self, value, value_lower, partial_matches, cutoff, limit=None) -> list[_HaystackT]:
+        # each segment returns its best matches, ordered by score then position; the best of those across all
+        # segments (ties broken by segment order) are the best matches over the whole index
+        fuzzy_results = sorted(
+            (
+                (-score, segment_idx, idx)
+                for segment_idx, segment in enumerate(self._segments)
+                for score, idx in segment.fuzzy_matches(value_lower, cutoff, self.FUZZY_LIMIT)
+            )
+        )[: self.FUZZY_LIMIT]
+        fuzzy_sum = -sum(r[0] for r in fuzzy_results)
+
+        # display the results in order of confidence
+        weighted_results = []
+        weighted_results.extend(
+            ((self._segments[segment_idx], idx), -neg_score / fuzzy_sum)
+            for neg_score, segment_idx, idx in fuzzy_results
+        )
+        weighted_results.extend(
+            ((segment, idx), len(value) / len(segment.names[idx])) for segment, idx in partial_matches
+        )
+        weighted_results.sort(key=lambda e: e[1], reverse=True)
+
+        # build results list, unique
+        seen = set()
+        results = []
+        for (segment, idx), _ in weighted_results:
+            if (id(segment), idx) in seen:
+                continue
+            seen.add((id(segment), idx))
+            results.append((segment, idx))
+
+        # Sort
+        sort_key = lambda r: fuzz.token_set_ratio(value_lower, r[0].lowered[r[1]])
+        if limit is None:
+            results.sort(key=sort_key, reverse=True)
+        else:
+            # equivalent to sorting and slicing (including the order of ties), without sorting every match
+            results = heapq.nlargest(limit, results, key=sort_key)
+        return [segment.items[idx] for segment, idx in results]
+
+
 def search(
-    list_to_search: list[_HaystackT], value: str, key: Callable[[_HaystackT], str], cutoff=5, strict=False
+    list_to_search: list[_HaystackT] | SearchIndex[_HaystackT],
+    value: str,
+    key: Callable[[_HaystackT], str],
+    cutoff=5,
+    strict=False,
 ) -> tuple[_HaystackT | list[_HaystackT], bool]:
     """Fuzzy searches a list for an object
     result can be either an object or list of objects
-    :param list_to_search: The list to search.
+    :param list_to_search: The list to search, or a prebuilt SearchIndex (in which case the index's key is used).
     :param value: The value to search for.
     :param key: A function defining what to search for.
     :param cutoff: The scorer cutoff value for fuzzy searching.
@@ -62,55 +253,9 @@ def search(
     if len(list_to_search) == 0:
         return [], False
 
-    # Remove limited use only items from search results
-    try:
-        list_to_search = list(filter(lambda a: not a.limited_use_only, list_to_search))
-    except AttributeError:
-        pass
-
-    # full match, return result
-    exact_matches = [a for a in list_to_search if value.lower() == key(a).lower()]
-    if not (exact_matches or strict):
-        partial_matches = [a for a in list_to_search if value.lower() in key(a).lower()]
-        if len(partial_matches) > 1 or not partial_matches:
-            names = [key(d).lower() for d in list_to_search]
-            fuzzy_map = {key(d).lower(): d for d in list_to_search}
-            fuzzy_results = [r for r in process.extract(value.lower(), names, scorer=fuzz.WRatio) if r[1] >= cutoff]
-            fuzzy_sum = sum(r[1] for r in fuzzy_results)
-            fuzzy_matches_and_confidences = [(fuzzy_map[r[0]], r[1] / fuzzy_sum) for r in fuzzy_results]
-
-            # display the results in order of confidence
-            weighted_results = []
-            weighted_results.extend((match, confidence) for match, confidence in fuzzy_matches_and_confidences)
-            weighted_results.extend((match, len(value) / len(key(match))) for match in partial_matches)
-            sorted_weighted = sorted(weighted_results, key=lambda e: e[1], reverse=True)
-
-            # build results list, unique
-            results = []
-            for r in sorted_weighted:
-                if r[0] not in results:
-                    results.append(r[0])
-
-            # print out the results
-            ratio_results = {}
-            for result in results:
-                ratio_results[key(result)] = fuzz.token_set_ratio(value.lower(), key(result).lower())
-
-            # Sort
-            sorted_results = sorted(results, key=lambda e: ratio_results[key(e)], reverse=True)
-            results = sorted_results
-
-        else:
-            results = partial_matches
-    else:
-        results = exact_matches
-
-    if len(results) > 1:
-        return results, False
-    elif not results:
-        return [], False
-    else:
-        return results[0], True
+    if not isinstance(list_to_search, SearchIndex):
+        list_to_search = SearchIndex(list_to_search, key)
+    return list_to_search.search(value, cutoff, strict)
 
 
 def paginate(choices: list[_HaystackT], per_page: int) -> list[list[_HaystackT]]:
@@ -218,7 +363,7 @@ def chk(msg):
 
 async def search_and_select(
     ctx: "AvraeContext",
-    list_to_search: list[_HaystackT],
+    list_to_search: list[_HaystackT] | SearchIndex[_HaystackT],
     query: str,
     key: Callable[[_HaystackT], str],
     cutoff=5,
@@ -235,7 +380,7 @@ async def search_and_select(
     Guaranteed to return a result - raises if there is no result.
 
     :param ctx: The context of the search.
-    :param list_to_search: The list of objects to search.
+    :param list_to_search: The list of objects to search, or a prebuilt SearchIndex.
     :param query: The value to search for.
     :param key: How to search - compares key(obj) to value
     :param cutoff: The cutoff percentage of fuzzy searches.
@@ -0,0 +1,203 @@
+"""
+A shared HTTP client for requests to external services (sheet imports, live sync, homebrew imports, images).
+
+Every request goes through one connection pool, so connections to a host are kept alive and reused between requests
+instead of paying TCP and TLS setup each time. Requests to each host are limited to a number in flight, and retried on
+connection errors and overload responses, honouring ``Retry-After``.
+"""
+
+import asyncio
+import collections
+import email.utils
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+# connection pool limits
+MAX_CONNECTIONS = 100
+MAX_CONNECTIONS_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=60, connect=10)
+
+# the most requests in flight to a host at once; hosts not listed here use MAX_CONNECTIONS_PER_HOST
+HOST_CONCURRENCY_LIMITS = {
+    "v1.dicecloud.com": 5,
+    "dicecloud.com": 5,
+    "critterdb.com": 5,
+    "bestiarybuilder.com": 5,
+}
+
+# requests are tried at most DEFAULT_MAX_TRIES times, waiting RETRY_BASE_DELAY * 2^n seconds between tries unless the
+# response says how long to wait (up to MAX_RETRY_DELAY seconds)
+DEFAULT_MAX_TRIES = 3
+RETRY_BASE_DELAY = 0.5
+MAX_RETRY_DELAY = 30
+RETRY_STATUSES = frozenset((429, 502, 503, 504))
+# methods that are safe to retry after a connection error, when the request may have reached the server
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+# requests slower than this are logged
+SLOW_REQUEST_SECONDS = 5
+
+
+class HostStats:
+    """Request timing metrics for one host."""
+
+    __slots__ = ("requests", "retries", "errors", "total_seconds", "max_seconds", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.statuses = collections.Counter()
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "mean_seconds": self.total_seconds / self.requests if self.requests else 0,
+            "max_seconds": self.max_seconds,
+            "statuses": dict(self.statuses),
+        }
+
+
+class HTTPClient:
+    """
+    A pooled HTTP client. Use the shared :data:`client` instead of creating one.
+
+    Requests are made with ``async with client.request(method, url, **kwargs) as resp``, where *kwargs* and *resp* are
+    those of :meth:`aiohttp.ClientSession.request`.
+    """
+
+    def __init__(self, transport=None, concurrency_limits: dict = None):
+        """
+        :param transport: If given, a coroutine function ``(method, url, **kwargs) -> response`` that is used to make
+            requests instead of the connection pool (e.g. a fake transport in tests). The response must have the
+            ``status``, ``reason``, and ``headers`` attributes and ``release()`` method of an aiohttp response.
+        :param concurrency_limits: The most requests in flight at once, by host.
+        """
+        self.transport = transport
+        self.concurrency_limits = HOST_CONCURRENCY_LIMITS if concurrency_limits is None else concurrency_limits
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._host_semaphores = {}
+        self.stats = collections.defaultdict(HostStats)
+
+    # ==== lifecycle ====
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS_PER_HOST, keepalive_timeout=KEEPALIVE_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=DEFAULT_TIMEOUT)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ==== requests ====
+    @asynccontextmanager
+    async def request(self, method: str, url: str, *, max_tries: int = DEFAULT_MAX_TRIES, **kwargs):
+        """
+        Makes a request, retrying connection errors (for idempotent methods) and responses with a status in
+        RETRY_STATUSES, up to *max_tries* times in all. Yields the last response.
+        """
+        method = method.upper()
+        host = urlsplit(url).hostname or ""
+        stats = self.stats[host]
+        semaphore = self._host_semaphore(host)
+
+        for attempt in range(max_tries):
+            is_last = attempt == max_tries - 1
+            if attempt:
+                stats.retries += 1
+            # the host's slot is held until the response is released, so the limit covers reading the body too
+            async with semaphore:
+                start = time.monotonic()
+                try:
+                    resp = await self._send(method, url, **kwargs)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    self._record_timing(method, url, stats, time.monotonic() - start)
+                    stats.errors += 1
+                    if is_last or method not in IDEMPOTENT_METHODS:
+                        raise
+                    delay = self._backoff(attempt)
+                    log.info(f"{method} {url} failed ({e!r}), retrying in {delay:.2f}s")
+                else:
+                    self._record_timing(method, url, stats, time.monotonic() - start)
+                    stats.statuses[resp.status] += 1
+                    if resp.status not in RETRY_STATUSES or is_last:
+                        try:
+                            yield resp
+                        finally:
+                            resp.release()
+                        return
+                    delay = self._retry_after(resp) or self._backoff(attempt)
+                    log.info(f"{method} {url} returned {resp.status}, retrying in {delay:.2f}s")
+                    resp.release()
+            await asyncio.sleep(delay)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    # ==== helpers ====
+    async def _send(self, method, url, **kwargs):
+        if self.transport is not None:
+            return await self.transport(method, url, **kwargs)
+        return await self._get_session().request(method, url, **kwargs)
+
+    def _host_semaphore(self, host):
+        try:
+            return self._host_semaphores[host]
+        except KeyError:
+            semaphore = asyncio.Semaphore(self.concurrency_limits.get(host, MAX_CONNECTIONS_PER_HOST))
+            self._host_semaphores[host] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _record_timing(method, url, stats, elapsed):
+        stats.requests += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if elapsed > SLOW_REQUEST_SECONDS:
+            log.warning(f"Slow request: {method} {url} took {elapsed:.2f}s")
+
+    @staticmethod
+    def _backoff(attempt):
+        return min(RETRY_BASE_DELAY * 2**attempt, MAX_RETRY_DELAY)
+
+    @staticmethod
+    def _retry_after(resp):
+        """Returns the number of seconds the response's Retry-After header asks us to wait, or None."""
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0), MAX_RETRY_DELAY)
+
+    def stats_dict(self):
+        """Returns the request metrics of each host."""
+        return {host: stats.to_dict() for host, stats in self.stats.items()}
+
+
+# the client shared by the whole process; closed when the bot closes
+client = HTTPClient()
@@ -4,16 +4,51 @@
 
 import asyncio
 import hashlib
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
-import aiohttp
+import cachetools
 from PIL import Image, ImageChops
 
 from cogs5e.models.errors import ExternalImportError
-from utils import config
+from utils import config, httpclient
+
+log = logging.getLogger(__name__)
 
 TOKEN_SIZE = (256, 256)
+TOKEN_MASK_PATH = "res/alphatemplate.tif"
+TOKEN_TEMPLATE_PATHS = ("res/template-f.png", "res/template-s.png")
+
+# rendered tokens are cached by the hash of their source image and their template, up to this many bytes in memory
+TOKEN_CACHE_SIZE = 64 * 1024 * 1024
+# and on disk under config.TOKEN_CACHE_PATH, if set, up to about this many bytes; every TOKEN_DISK_CACHE_PRUNE_INTERVAL
+# writes, the least recently used tokens are deleted until it is back under the limit
+TOKEN_DISK_CACHE_SIZE = 1024 * 1024 * 1024
+TOKEN_DISK_CACHE_PRUNE_INTERVAL = 100
+# remembers which rendered token a source URL produced, so tokenizing the same URL again does not download it
+TOKEN_URL_CACHE_TTL = 3600
+# tokens are rendered in a small pool of threads (PIL releases the GIL while resizing and encoding); at most
+# MAX_CONCURRENT_TOKENS are rendered or waiting to be rendered at once
+TOKEN_RENDER_THREADS = 2
+MAX_CONCURRENT_TOKENS = 4
+
+# content key -> PNG bytes
+_token_cache = cachetools.LRUCache(maxsize=TOKEN_CACHE_SIZE, getsizeof=len)
+# (source URL, template) -> content key
+_token_url_cache = cachetools.TTLCache(maxsize=50_000, ttl=TOKEN_URL_CACHE_TTL)
+_token_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOKENS)
+_render_pool = None
+
+# the decoded mask and templates, loaded once and shared by the render threads
+_token_assets = {}
+_token_assets_lock = threading.Lock()
+
+# disk cache writes since the last prune, from any thread
+_disk_writes = 0
+_disk_writes_lock = threading.Lock()
 
 
 def preprocess_url(url):
@@ -26,64 +61,186 @@ def preprocess_url(url):
 
 
 async def generate_token(img_url, is_subscriber=False, token_args=None):
+    """
+    Generates a token from the image at the given URL.
+
+    :returns: A file-like object containing the token PNG.
+    :rtype: BytesIO
+    """
     img_url = preprocess_url(img_url)
-    template = "res/template-s.png" if is_subscriber else "res/template-f.png"
+    template = TOKEN_TEMPLATE_PATHS[1] if is_subscriber else TOKEN_TEMPLATE_PATHS[0]
     if token_args:
         border = token_args.last("border")
         if border == "plain":
-            template = "res/template-f.png"
+            template = TOKEN_TEMPLATE_PATHS[0]
         elif border == "none":
             template = None
 
-    def process_img(the_img_bytes, template_fp="res/template-f.png"):
-        # open the image
-        b = BytesIO(the_img_bytes)
-        img = Image.open(b).convert("RGBA")
-
-        # crop/resize the token image
-        width, height = img.size
-        if height >= width:
-            box = (0, 0, width, width)
-        else:
-            box = (width / 2 - height / 2, 0, width / 2 + height / 2, height)
-        img = img.resize(TOKEN_SIZE, Image.Resampling.LANCZOS, box)
-
-        # paste mask
-        mask_img = Image.open("res/alphatemplate.tif")
-        mask_img = ImageChops.darker(mask_img, img.getchannel("A"))
-        img.putalpha(mask_img)
-        mask_img.close()
-
-        # paste template
-        if template_fp:
-            template_img = Image.open(template_fp)
-            img.paste(template_img, mask=template_img)
-            template_img.close()
-
-        # save the image, close files
-        out_bytes = BytesIO()
-        img.save(out_bytes, "PNG")
-        img.close()
-        out_bytes.seek(0)
-        return out_bytes
+    token = await _get_token(img_url, template)
+    return BytesIO(token)
+
+
+async def _get_token(img_url, template):
+    content_key = _token_url_cache.get((img_url, template))
+    if content_key is not None and (token := _token_cache.get(content_key)) is not None:
+        return token
+
+    async with httpclient.client.get(img_url) as resp:
+        if not 199 < resp.status < 300:
+            raise ExternalImportError(f"I was unable to download the image to tokenize. ({resp.status} {resp.reason})")
+        # get the image type from the content type header
+        content_type = resp.headers.get("Content-Type", "")
+        if not content_type.startswith("image/"):
+            raise ExternalImportError(f"This does not look like an image file (content type {content_type}).")
+        img_bytes = await resp.read()
+
+    template_name = os.path.splitext(os.path.basename(template))[0] if template else "none"
+    content_key = f"{hashlib.sha256(img_bytes).hexdigest()}-{template_name}"
+    loop = asyncio.get_event_loop()
+    token = _token_cache.get(content_key)
+    if token is None:
+        token = await loop.run_in_executor(None, _read_cached_token, content_key)
+    if token is None:
+        # limit how many tokens are rendered at once, so bursts of tokens do not hold up other commands
+        async with _token_semaphore:
+            token = await _render(img_bytes, template)
+        await loop.run_in_executor(None, _write_cached_token, content_key, token)
+
+    _token_cache[content_key] = token
+    _token_url_cache[img_url, template] = content_key
+    return token
+
+
+async def _render(img_bytes, template):
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ThreadPoolExecutor(max_workers=TOKEN_RENDER_THREADS, thread_name_prefix="token-render")
+    return await asyncio.get_event_loop().run_in_executor(_render_pool, render_token, img_bytes, template)
+
+
+def shutdown_render_pool():
+    """Stops the token render threads, if any are running."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+# ---- disk tier (blocking, runs in the default executor) ----
+def _token_cache_path(content_key):
+    return os.path.join(config.TOKEN_CACHE_PATH, f"{content_key}.png")
 
+
+def _read_cached_token(content_key):
+    if config.TOKEN_CACHE_PATH is None:
+        return None
+    path = _token_cache_path(content_key)
+    try:
+        with open(path, "rb") as f:
+            token = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        log.warning(f"Could not read token from disk cache: {e}")
+        return None
+    # the modification time is used as the last use time when pruning
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return token
+
+
+def _write_cached_token(content_key, token):
+    global _disk_writes
+    if config.TOKEN_CACHE_PATH is None:
+        return
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(img_url) as resp:
-                if not 199 < resp.status < 300:
-                    raise ExternalImportError(
-                        f"I was unable to download the image to tokenize. ({resp.status} {resp.reason})"
-                    )
-                # get the image type from the content type header
-                content_type = resp.headers.get("Content-Type", "")
-                if not content_type.startswith("image/"):
-                    raise ExternalImportError(f"This does not look like an image file (content type {content_type}).")
-                img_bytes = await resp.read()
-        processed = await asyncio.get_event_loop().run_in_executor(None, process_img, img_bytes, template)
-    except Exception:
-        raise
-
-    return processed
+        os.makedirs(config.TOKEN_CACHE_PATH, exist_ok=True)
+        with open(_token_cache_path(content_key), "wb") as f:
+            f.write(token)
+    except OSError as e:
+        log.warning(f"Could not write token to disk cache: {e}")
+        return
+
+    with _disk_writes_lock:
+        _disk_writes += 1
+        if _disk_writes < TOKEN_DISK_CACHE_PRUNE_INTERVAL:
+            return
+        _disk_writes = 0
+    _prune_token_cache()
+
+
+def _prune_token_cache():
+    """Deletes the least recently used tokens on disk until the disk cache is no larger than TOKEN_DISK_CACHE_SIZE."""
+    entries = []
+    try:
+        with os.scandir(config.TOKEN_CACHE_PATH) as it:
+            for entry in it:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # deleted by another process
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except OSError as e:
+        log.warning(f"Could not prune token disk cache: {e}")
+        return
+
+    total = sum(size for _, size, _ in entries)
+    entries.sort()
+    for _, size, path in entries:
+        if total <= TOKEN_DISK_CACHE_SIZE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning(f"Could not prune token disk cache: {e}")
+            return
+        total -= size
+
+
+# ---- rendering (runs in the render pool) ----
+def _load_token_assets():
+    """Decodes the token mask and templates, if they have not been yet."""
+    with _token_assets_lock:
+        if _token_assets:
+            return
+        for path in (TOKEN_MASK_PATH, *TOKEN_TEMPLATE_PATHS):
+            with Image.open(path) as asset:
+                _token_assets[path] = asset.copy()
+
+
+def render_token(img_bytes, template_fp=TOKEN_TEMPLATE_PATHS[0]):
+    """Renders a token from the given source image bytes, using the given template. Returns the PNG bytes."""
+    _load_token_assets()
+
+    # open the image
+    img = Image.open(BytesIO(img_bytes)).convert("RGBA")
+
+    # crop/resize the token image
+    width, height = img.size
+    if height >= width:
+        box = (0, 0, width, width)
+    else:
+        box = (width / 2 - height / 2, 0, width / 2 + height / 2, height)
+    img = img.resize(TOKEN_SIZE, Image.Resampling.LANCZOS, box)
+
+    # paste mask
+    mask_img = ImageChops.darker(_token_assets[TOKEN_MASK_PATH], img.getchannel("A"))
+    img.putalpha(mask_img)
+
+    # paste template
+    if template_fp:
+        template_img = _token_assets[template_fp]
+        img.paste(template_img, mask=template_img)
+
+    # save the image
+    out_bytes = BytesIO()
+    img.save(out_bytes, "PNG")
+    img.close()
+    return out_bytes.getvalue()
 
 
 async def fetch_monster_image(img_url: str):
@@ -101,11 +258,10 @@ async def fetch_monster_image(img_url: str):
     if os.path.exists(cache_path):
         return cache_path
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(img_url) as resp:
-            if not 199 < resp.status < 300:
-                raise ExternalImportError(f"I was unable to retrieve the monster token. ({resp.status} {resp.reason})")
-            img_bytes = await resp.read()
+    async with httpclient.client.get(img_url) as resp:
+        if not 199 < resp.status < 300:
+            raise ExternalImportError(f"I was unable to retrieve the monster token. ({resp.status} {resp.reason})")
+        img_bytes = await resp.read()
 
     # cache
     with open(cache_path, "wb") as f:
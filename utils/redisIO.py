@@ -9,6 +9,10 @@
 import logging
 import uuid
 
+from utils import config
+
+COMMAND_PUBSUB_CHANNEL = f"admin-commands:{config.ENVIRONMENT}"  # >:c
+
 
 class RedisIO:
     """
@@ -140,6 +144,13 @@ async def subscribe(self, *channels):
     async def publish(self, channel, data):
         return await self._db.publish(channel, data)
 
+    async def publish_command(self, command, *args):
+        """
+        Sends a pubsub command to every cluster, without waiting for replies (e.g. to invalidate a cached value).
+        """
+        request = PubSubCommand(str(uuid.uuid4()), None, command, list(args), {})
+        return await self.publish(COMMAND_PUBSUB_CHANNEL, request.to_json())
+
     # ==== misc ====
     async def close(self):
         await self._db.aclose()  # changed to aclose after close deprecated
@@ -0,0 +1,246 @@
+"""
+Compiled roll plans.
+
+A roll plan is a parsed dice expression, plus any transforms applied to it (e.g. automation's crit and minimum mappers),
+compiled once into a tree of small evaluation functions. Rolling a plan only draws the dice and builds the result tree;
+parsing, transforming, and the roller's per-node dispatch happen once per plan, and plans are cached by expression and
+transform set. The most common shapes (``1d20+K``, ``NdM+K``, ``2d20kh1+K``) are recognized without running the dice
+grammar, and everything else falls back to d20's parser.
+
+Results are ordinary :class:`d20.RollResult` objects built from the same nodes d20 would build, with the dice drawn in
+the same order, so a plan's results (and their strings, which are only rendered when asked for) are identical to
+``d20.roll``'s.
+"""
+
+import re
+import threading
+from typing import Callable, Optional, Sequence
+
+import cachetools
+import d20
+from d20 import ast
+
+PARSE_CACHE_SIZE = 4096
+PLAN_CACHE_SIZE = 4096
+
+# NdM or NdMkhX/NdMklX, optionally followed by +/- an integer - d20 only allows whitespace around the operator and at
+# the end of these
+_WS = r"[ \t\f\r\n]*"
+COMMON_DICE_RE = re.compile(rf"([0-9]*)d([0-9]+)(?:k([hl])([0-9]+))?(?:{_WS}([+-]){_WS}([0-9]+))?{_WS}")
+
+_parse_cache = cachetools.LRUCache(maxsize=PARSE_CACHE_SIZE)
+_plan_cache = cachetools.LRUCache(maxsize=PLAN_CACHE_SIZE)
+# plans are also made from scripting executor threads (alias roll()/vroll()), and cachetools caches are not thread-safe
+_cache_lock = threading.Lock()
+
+# a transform takes an AST and returns a transformed copy of it; it must not modify the AST it's given, and must be
+# hashable and compare equal to transforms that do the same thing, since it's part of the plan's cache key
+Transform = Callable[[ast.Expression], ast.Expression]
+
+
+# ==== parsing ====
+def parse(expr: str, allow_comments: bool = False) -> ast.Expression:
+    """
+    Parses a dice expression into the same AST as :func:`d20.parse`. The returned AST is shared, so it must be copied
+    before it is modified.
+
+    :raises d20.RollSyntaxError: if the expression is invalid.
+    """
+    key = (expr, allow_comments)
+    with _cache_lock:
+        the_ast = _parse_cache.get(key)
+    if the_ast is not None:
+        return the_ast
+
+    the_ast = _parse_common(expr)
+    if the_ast is None:
+        the_ast = d20.parse(expr, allow_comments)  # parse errors are not cached
+    with _cache_lock:
+        _parse_cache[key] = the_ast
+    return the_ast
+
+
+def _parse_common(expr: str) -> Optional[ast.Expression]:
+    """Parses an expression of one of the common shapes without the grammar, or returns None if it isn't one."""
+    match = COMMON_DICE_RE.fullmatch(expr)
+    if match is None:
+        return None
+    num, size, keep_cat, keep_num, op, literal = match.groups()
+
+    node = ast.Dice(num or 1, size)
+    if keep_cat:
+        node = ast.OperatedDice(node, ast.SetOperator("k", [ast.SetSelector(keep_cat, keep_num)]))
+    if op:
+        node = ast.BinOp(node, op, ast.Literal(int(literal)))
+    return ast.Expression(node)
+
+
+# ==== plans ====
+class RollPlan:
+    """A dice AST compiled for repeated rolling. Use :func:`get_plan` instead of creating these."""
+
+    __slots__ = ("ast", "_evaluate", "_adv_plans")
+
+    def __init__(self, the_ast: ast.Expression):
+        self.ast = the_ast
+        self._evaluate = _compile(the_ast)
+        self._adv_plans = {}
+
+    def roll(
+        self,
+        stringifier: Optional[d20.Stringifier] = None,
+        advantage: d20.AdvType = d20.AdvType.NONE,
+        context: Optional[d20.RollContext] = None,
+    ) -> d20.RollResult:
+        """
+        Rolls the plan. Takes the same arguments as :meth:`d20.Roller.roll`, and *context* in place of the roller.
+
+        :raises d20.RollError: if the roll could not be evaluated.
+        """
+        if advantage != d20.AdvType.NONE:
+            return self.with_advantage(advantage).roll(stringifier, context=context)
+        # stringifiers and contexts keep per-roll state, and results may be rolled or rendered from other threads (e.g.
+        # alias vroll()), so each roll without its own gets new ones
+        if stringifier is None:
+            stringifier = d20.MarkdownStringifier()
+        if context is None:
+            context = d20.RollContext()
+
+        context.reset()
+        return d20.RollResult(self.ast, self._evaluate(context), stringifier)
+
+    def with_advantage(self, advantage: d20.AdvType) -> "RollPlan":
+        """Returns the plan for this roll made at *advantage*."""
+        try:
+            return self._adv_plans[advantage]
+        except KeyError:
+            plan = self._adv_plans[advantage] = RollPlan(d20.utils.ast_adv_copy(self.ast, advantage))
+            return plan
+
+    def __repr__(self):
+        return f"<RollPlan ast={str(self.ast)!r}>"
+
+
+def get_plan(expr: str, transforms: Sequence[Transform] = (), allow_comments: bool = False) -> RollPlan:
+    """
+    Returns the plan for the dice expression *expr* with each of *transforms* applied to its AST in order.
+
+    :raises d20.RollSyntaxError: if the expression is invalid.
+    """
+    transforms = tuple(transforms)
+    key = (expr, transforms, allow_comments)
+    with _cache_lock:
+        plan = _plan_cache.get(key)
+    if plan is not None:
+        return plan
+
+    the_ast = parse(expr, allow_comments)
+    for transform in transforms:
+        the_ast = transform(the_ast)
+    plan = RollPlan(the_ast)
+    with _cache_lock:
+        _plan_cache[key] = plan
+    return plan
+
+
+def roll(
+    expr: str,
+    stringifier: Optional[d20.Stringifier] = None,
+    allow_comments: bool = False,
+    advantage: d20.AdvType = d20.AdvType.NONE,
+    context: Optional[d20.RollContext] = None,
+) -> d20.RollResult:
+    """Rolls a dice expression. A drop-in replacement for :func:`d20.roll` that also takes a roll *context*."""
+    return get_plan(expr, allow_comments=allow_comments).roll(stringifier, advantage, context)
+
+
+# ==== compiler ====
+# each compiler takes an AST node and returns a function that takes a roll context and evaluates the node into the
+# expression node d20.Roller would have returned for it
+def _compile(node: ast.Node) -> Callable[[d20.RollContext], d20.Number]:
+    try:
+        compiler = _COMPILERS[type(node)]
+    except KeyError:
+        raise ValueError(f"Cannot compile {type(node).__name__} nodes") from None
+    return compiler(node)
+
+
+def _compile_expression(node: ast.Expression):
+    roll_ = _compile(node.roll)
+    comment = node.comment
+    return lambda context: d20.Expression(roll_(context), comment)
+
+
+def _compile_annotatednumber(node: ast.AnnotatedNumber):
+    value = _compile(node.value)
+    annotation = "".join(node.annotations)
+
+    def evaluate(context):
+        target = value(context)
+        target.annotation = annotation
+        return target
+
+    return evaluate
+
+
+def _compile_literal(node: ast.Literal):
+    value = node.value
+    return lambda context: d20.Literal(value)
+
+
+def _compile_parenthetical(node: ast.Parenthetical):
+    value = _compile(node.value)
+    return lambda context: d20.Parenthetical(value(context))
+
+
+def _compile_unop(node: ast.UnOp):
+    op = node.op
+    value = _compile(node.value)
+    return lambda context: d20.UnOp(op, value(context))
+
+
+def _compile_binop(node: ast.BinOp):
+    left = _compile(node.left)
+    op = node.op
+    right = _compile(node.right)
+    return lambda context: d20.BinOp(left(context), op, right(context))
+
+
+def _compile_operatedset(node: ast.OperatedSet):
+    value = _compile(node.value)
+    # operators are never modified once evaluated, so each roll can share them
+    operations = [d20.SetOperator.from_ast(op) for op in node.operations]
+
+    def evaluate(context):
+        target = value(context)
+        for op in operations:
+            op.operate(target)
+            target.operations.append(op)
+        return target
+
+    return evaluate
+
+
+def _compile_numberset(node: ast.NumberSet):
+    values = [_compile(n) for n in node.values]
+    return lambda context: d20.Set([value(context) for value in values])
+
+
+def _compile_dice(node: ast.Dice):
+    num = node.num
+    size = node.size
+    return lambda context: d20.Dice.new(num, size, context=context)
+
+
+_COMPILERS = {
+    ast.Expression: _compile_expression,
+    ast.AnnotatedNumber: _compile_annotatednumber,
+    ast.Literal: _compile_literal,
+    ast.Parenthetical: _compile_parenthetical,
+    ast.UnOp: _compile_unop,
+    ast.BinOp: _compile_binop,
+    ast.OperatedSet: _compile_operatedset,
+    ast.NumberSet: _compile_numberset,
+    ast.OperatedDice: _compile_operatedset,
+    ast.Dice: _compile_dice,
+}
@@ -1,6 +1,7 @@
 import enum
 from typing import List, Optional, Literal
 
+import cachetools
 import disnake
 from pydantic import BaseModel
 
@@ -9,6 +10,17 @@
 
 DEFAULT_DM_ROLE_NAMES = {"dm", "gm", "dungeon master", "game master"}
 
+# settings are invalidated over pubsub when committed; the TTL only bounds staleness if an invalidation is missed
+SERVER_SETTINGS_CACHE_TTL = 600
+SERVER_SETTINGS_INVALIDATE_COMMAND = "invalidate_server_settings"
+# guild prefixes are cached by the bot (see Avrae.get_guild_prefix), and invalidated over pubsub when changed
+PREFIX_INVALIDATE_COMMAND = "invalidate_prefix"
+
+# guild id -> ServerSettings, including the defaults for guilds without any settings
+_settings_cache = cachetools.TTLCache(maxsize=50_000, ttl=SERVER_SETTINGS_CACHE_TTL)
+# incremented on every change, so a load that raced with a change is not cached
+_settings_generation = 0
+
 
 class InlineRollingType(enum.IntEnum):
     DISABLED = 0
@@ -54,7 +66,22 @@ class ServerSettings(SettingsBaseModel):
     # ==== lifecycle ====
     @classmethod
     async def for_guild(cls, mdb, guild_id: int):
-        """Returns the server settings for a given guild."""
+        """
+        Returns the server settings for a given guild. The settings are cached, so the returned instance is a copy
+        that is safe to modify.
+        """
+        cached = _settings_cache.get(guild_id)
+        if cached is not None:
+            return cached.copy(deep=True)
+
+        generation = _settings_generation
+        settings = await cls._load(mdb, guild_id)
+        if generation == _settings_generation:
+            _settings_cache[guild_id] = settings.copy(deep=True)
+        return settings
+
+    @classmethod
+    async def _load(cls, mdb, guild_id: int):
         # new-style
         existing = await mdb.guild_settings.find_one({"guild_id": guild_id})
         if existing is not None:
@@ -77,9 +104,18 @@ def from_old_lookupsettings(cls, guild_id: int, d):
             lookup_pm_result=d.get("pm_result", False),
         )
 
-    async def commit(self, mdb):
-        """Commits the settings to the database."""
+    async def commit(self, mdb, rdb=None):
+        """
+        Commits the settings to the database.
+
+        :param rdb: If given, tells every cluster to drop its cached copy of these settings.
+        :type rdb: utils.redisIO.RedisIO
+        """
         await mdb.guild_settings.update_one({"guild_id": self.guild_id}, {"$set": self.dict()}, upsert=True)
+        invalidate_server_settings(self.guild_id)
+        _settings_cache[self.guild_id] = self.copy(deep=True)
+        if rdb is not None:
+            await rdb.publish_command(SERVER_SETTINGS_INVALIDATE_COMMAND, self.guild_id)
 
     # ==== helpers ====
     def is_dm(self, member: disnake.Member):
@@ -88,3 +124,10 @@ def is_dm(self, member: disnake.Member):
             return any(r.name.lower() in DEFAULT_DM_ROLE_NAMES for r in member.roles)
         dm_role_set = set(self.dm_roles)
         return any(r.id in dm_role_set for r in member.roles)
+
+
+def invalidate_server_settings(guild_id: int):
+    """Drops the cached server settings for a guild, if any."""
+    global _settings_generation
+    _settings_generation += 1
+    _settings_cache.pop(guild_id, None)